@@ -8,6 +8,18 @@ import config
 
 logger = logging.getLogger(__name__)
 
+# Columns of commercial_injector_prep, written by CommercialInjectorPrep and, in cutless mode,
+# by VirtualCut which builds its rows in this order and fills in the start and end times
+PREP_COLUMNS = {
+    'SHOW_NAME_1': 'TEXT',
+    'Season and Episode': 'TEXT',
+    'Part Number': 'INTEGER',
+    'FULL_FILE_PATH': 'TEXT',
+    'ORIGINAL_FILE_PATH': 'TEXT',
+    'startTime': 'INTEGER',
+    'endTime': 'INTEGER',
+}
+
 
 class DatabaseManager:
     """
@@ -271,6 +283,80 @@ class DatabaseManager:
         cursor = self.execute(query, params)
         return cursor.rowcount
     
+    def add_missing_columns(self, table_name: str, columns: Dict[str, str]):
+        """
+        Add the columns a table doesn't have yet.
+
+        Args:
+            table_name: Name of the table
+            columns: Dictionary of column names to SQL types
+        """
+        existing = {row['name'] for row in self.fetchall(f"PRAGMA table_info({table_name})")}
+        for column, column_type in columns.items():
+            if column not in existing:
+                self.execute(f'ALTER TABLE {table_name} ADD COLUMN "{column}" {column_type}')
+
+    def ensure_unique_index(self, table_name: str, column: str):
+        """
+        Create a unique index on a column, first removing duplicate rows.
+
+        Of each set of rows sharing a value, the most recently inserted one is kept.
+        Rows without a value are left alone, the index doesn't consider NULLs equal.
+
+        Args:
+            table_name: Name of the table
+            column: Column that must be unique
+        """
+        index_name = f"idx_{table_name}_{column}_unique".lower().replace(' ', '_')
+        if self.fetchone("SELECT name FROM sqlite_master WHERE type='index' AND name=?", (index_name,)):
+            return
+        with self.transaction() as conn:
+            conn.execute(
+                f'DELETE FROM {table_name} WHERE "{column}" IS NOT NULL AND rowid NOT IN '
+                f'(SELECT MAX(rowid) FROM {table_name} WHERE "{column}" IS NOT NULL GROUP BY "{column}")'
+            )
+            conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {table_name} ("{column}")')
+
+    def upsert_many(self, table_name: str, rows: List[Dict[str, Any]], key: str) -> int:
+        """
+        Insert rows, updating the existing row with the same key instead, in one transaction.
+
+        The key column needs a unique index (see ensure_unique_index). Existing
+        rows whose values are all unchanged are left alone.
+
+        Args:
+            table_name: Name of the table
+            rows: Dictionaries of column names to values, all with the same columns
+            key: Column identifying a row
+
+        Returns:
+            int: Number of rows inserted or changed
+        """
+        if not rows:
+            return 0
+        columns = list(rows[0])
+        quoted = {column: f'"{column}"' for column in columns}
+        updated = [quoted[column] for column in columns if column != key]
+        query = (
+            f"INSERT INTO {table_name} ({', '.join(quoted.values())}) "
+            f"VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT({quoted[key]}) "
+        )
+        if updated:
+            # Only rewrite rows where something actually changed
+            set_clause = ', '.join(f"{column} = excluded.{column}" for column in updated)
+            changed = ' OR '.join(f"{column} IS NOT excluded.{column}" for column in updated)
+            query += f"DO UPDATE SET {set_clause} WHERE {changed}"
+        else:
+            query += "DO NOTHING"
+        params_list = [tuple(row[column] for column in columns) for row in rows]
+
+        def _upsert():
+            with self.transaction() as conn:
+                return conn.executemany(query, params_list).rowcount
+
+        return self._execute_with_retry(_upsert)
+
     def delete(self, table_name: str, where: str, where_params: Tuple) -> int:
         """
         Delete rows from a table.
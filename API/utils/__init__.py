@@ -1,5 +1,5 @@
 from .FlagManager import FlagManager
 from .MessageBroker import get_message_broker, MessageBroker
-from .DatabaseManager import DatabaseManager, get_db_manager
+from .DatabaseManager import DatabaseManager, get_db_manager, PREP_COLUMNS
 
-__all__ = ['FlagManager', 'MessageBroker', 'get_message_broker', 'DatabaseManager', 'get_db_manager']
\ No newline at end of file
+__all__ = ['FlagManager', 'MessageBroker', 'get_message_broker', 'DatabaseManager', 'get_db_manager', 'PREP_COLUMNS']
\ No newline at end of file
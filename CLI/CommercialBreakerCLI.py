@@ -254,7 +254,7 @@ class CommercialBreakerCLI:
         print(f"\nTotal files found in selected folders: {len(files)}")
 
     def delete_txt_files(self):
-        """Delete the .txt files in the output directory."""
+        """Delete the stored timestamps and .txt files of the output directory."""
         if not self.output_path:
             print("Error", "Please specify an output directory.")
             return
@@ -413,7 +413,7 @@ class CommercialBreakerCLI:
             self.task_complete.wait()
             
         print("We are done processing the anime.")
-        if self.confirm("Would you like to delete the .txt files in the output directory? (y/n): "):
+        if self.confirm("Would you like to delete the timestamps of the output directory? (y/n): "):
             self.delete_txt_files()
 
     def run(self):
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
+import config
+from API.utils import get_db_manager
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """
+    Persistent cache of media analysis results keyed by file identity.
+
+    Results such as chapters, silence periods, raw black frame timestamps,
+    duration and FPS are stored in the application database. An entry is only
+    returned while the file's path, size and modification time (and, when
+    ANALYSIS_CACHE_PARTIAL_HASH is enabled, a hash of its first and last bytes)
+    still match, so replaced or re-encoded files are analyzed again.
+
+    The cache is best effort: database errors are logged and treated as misses.
+    """
+
+    TABLE_NAME = 'media_analysis_cache'
+    PARTIAL_HASH_BYTES = 1024 * 1024
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """Singleton pattern so every ComBreak component shares one cache."""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(AnalysisCache, cls).__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self.db_manager = get_db_manager()
+        self._table_ready = False
+        self._hashes = {}
+        self._initialized = True
+
+    @property
+    def enabled(self):
+        return config.ANALYSIS_CACHE_ENABLED
+
+    def get(self, file_path, kind, params=""):
+        """
+        Return the cached value for a file, or None if it is missing or stale.
+
+        Args:
+            file_path: Path of the analyzed media file
+            kind: Type of result, e.g. 'chapters', 'silence', 'black_frames'
+            params: Signature of the settings the result depends on
+        """
+        value = self._fetch(file_path, kind, params)
+        return json.loads(value) if value is not None else None
+
+    def put(self, file_path, kind, value, params=""):
+        """Store a JSON-serializable analysis result for a file."""
+        self._store(file_path, kind, json.dumps(value), params)
+
+    def get_array(self, file_path, kind, params=""):
+        """Return a cached float64 NumPy array for a file, or None if it is missing or stale."""
+        value = self._fetch(file_path, kind, params)
+        return np.frombuffer(value, dtype=np.float64) if value is not None else None
+
+    def put_array(self, file_path, kind, array, params=""):
+        """Store a float64 array for a file as a compact binary blob."""
+        self._store(file_path, kind, np.ascontiguousarray(array, dtype=np.float64).tobytes(), params)
+
+    def _fetch(self, file_path, kind, params):
+        if not self.enabled:
+            return None
+        try:
+            identity = self._identity(file_path)
+            if identity is None:
+                return None
+            self._ensure_table()
+            row = self.db_manager.fetchone(
+                f"SELECT size, mtime, partial_hash, value FROM {self.TABLE_NAME} "
+                "WHERE path = ? AND kind = ? AND params = ?",
+                (str(file_path), kind, params)
+            )
+            if row is None or (row['size'], row['mtime'], row['partial_hash']) != identity:
+                return None
+            return row['value']
+        except Exception as e:
+            logger.warning(f"Analysis cache lookup failed for {file_path}: {e}")
+            return None
+
+    def _store(self, file_path, kind, value, params):
+        if not self.enabled:
+            return
+        try:
+            identity = self._identity(file_path)
+            if identity is None:
+                return
+            self._ensure_table()
+            size, mtime, partial_hash = identity
+            self.db_manager.execute(
+                f"INSERT OR REPLACE INTO {self.TABLE_NAME} "
+                "(path, kind, params, size, mtime, partial_hash, value, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(file_path), kind, params, size, mtime, partial_hash, value, time.time())
+            )
+        except Exception as e:
+            logger.warning(f"Analysis cache update failed for {file_path}: {e}")
+
+    def clear(self):
+        """Remove every cached analysis result."""
+        self._ensure_table()
+        self.db_manager.execute(f"DELETE FROM {self.TABLE_NAME}")
+
+    def _ensure_table(self):
+        if self._table_ready:
+            return
+        self.db_manager.create_table(self.TABLE_NAME, """
+            path TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            params TEXT NOT NULL,
+            size INTEGER,
+            mtime REAL,
+            partial_hash TEXT,
+            value TEXT,
+            updated_at REAL,
+            PRIMARY KEY (path, kind, params)
+        """)
+        self._table_ready = True
+
+    def _identity(self, file_path):
+        """Return (size, mtime, partial hash) for a file, or None if it doesn't exist."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        partial_hash = ""
+        if config.ANALYSIS_CACHE_PARTIAL_HASH:
+            key = (str(file_path), stat.st_size, stat.st_mtime)
+            partial_hash = self._hashes.get(key)
+            if partial_hash is None:
+                partial_hash = self._partial_hash(file_path, stat.st_size)
+                self._hashes[key] = partial_hash
+        return stat.st_size, stat.st_mtime, partial_hash
+
+    def _partial_hash(self, file_path, size):
+        """Hash the first and last PARTIAL_HASH_BYTES of a file."""
+        digest = hashlib.sha1()
+        with open(file_path, "rb") as f:
+            digest.update(f.read(self.PARTIAL_HASH_BYTES))
+            if size > self.PARTIAL_HASH_BYTES * 2:
+                f.seek(-self.PARTIAL_HASH_BYTES, os.SEEK_END)
+                digest.update(f.read(self.PARTIAL_HASH_BYTES))
+        return digest.hexdigest()
+
+
+def get_analysis_cache():
+    """Get the singleton AnalysisCache instance."""
+    return AnalysisCache()
@@ -1,14 +1,13 @@
 import os
 from pathlib import Path
-import subprocess
-import json
 import config
-# Import the utility function directly
-from ComBreak.utils import get_executable_path
+from ComBreak.MediaProbe import MediaProbe
+from ComBreak.TimestampStore import get_timestamp_store
 
 class ChapterExtractor:
     def __init__(self, input_handler):
         self.input_handler = input_handler
+        self.timestamp_store = get_timestamp_store()
 
     # ------------------- Extract Chapters Methods -------------------
     def extract_chapters(self, input_path, output_path, unprocessed_files_manager, status_callback=None, progress_callback=None, reset_callback=None):
@@ -19,6 +18,7 @@ class ChapterExtractor:
         if self.input_handler.has_input():
             input_files = self.input_handler.get_consolidated_paths()
             total_videos = len(input_files)
+            MediaProbe().probe_files(input_files, status_callback, progress_callback)
 
             for i, file_path in enumerate(input_files):
                 processed_videos += 1
@@ -39,14 +39,14 @@ class ChapterExtractor:
                     output_dir = self.input_handler.get_output_path_for_file(file_path, output_path)
                     output_dir.mkdir(parents=True, exist_ok=True)
 
-                    # Create and write chapters to a text file
-                    with open(output_dir / f"{filename}.txt", "w") as f:
-                        for chapter in chapters:
-                            f.write(f"{chapter['start']}\n")
+                    # Store the chapter start times as the video's breaks
+                    self.timestamp_store.put(
+                        output_dir / filename, [chapter['start'] for chapter in chapters], 'chapter', file_path
+                    )
 
                     # Debug log
                     if status_callback:
-                        status_callback(f"Wrote chapters to {output_dir / f'{filename}.txt'}")
+                        status_callback(f"Stored chapters of {output_dir / filename}")
                         status_callback(f"Removing {filename} from unprocessed_files_manager")
 
                     # Remove this file from the unprocessed files manager since we found chapters
@@ -70,10 +70,13 @@ class ChapterExtractor:
         else:
             # Legacy folder mode
             # Count total videos
+            video_paths = []
             for dirpath, _, filenames in os.walk(input_path):
                 for filename in filenames:
                     if filename.endswith(tuple(config.video_file_types)):
                         total_videos += 1
+                        video_paths.append(str(Path(dirpath) / filename))
+            MediaProbe().probe_files(video_paths, status_callback, progress_callback)
 
             # Process videos
             for dirpath, _, filenames in os.walk(input_path):
@@ -95,10 +98,10 @@ class ChapterExtractor:
                         output_dir = Path(output_path) / relative_path
                         output_dir.mkdir(parents=True, exist_ok=True)
 
-                        # Create and write chapters to a text file in the output directory
-                        with open(output_dir / f"{filename}.txt", "w") as f:
-                            for chapter in chapters:
-                                f.write(f"{chapter['start']}\n")
+                        # Store the chapter start times as the video's breaks
+                        self.timestamp_store.put(
+                            output_dir / filename, [chapter['start'] for chapter in chapters], 'chapter', original_file
+                        )
 
                         # Remove this file from the unprocessed files manager since we found chapters
                         unprocessed_files_manager.remove_file(str(original_file), str(dirpath), filename)
@@ -112,21 +115,8 @@ class ChapterExtractor:
     def get_chapters(video_file):
         chapters = []
         try:
-            command = [
-                get_executable_path("ffprobe", config.ffprobe_path),
-                '-v', 'quiet',
-                '-print_format', 'json',
-                '-show_chapters',
-                video_file
-            ]
-            output = subprocess.check_output(command).decode()
-            chapters_data = json.loads(output)
-
-            # Extract start times of each chapter in seconds
-            for chapter in chapters_data.get('chapters', []):
-                start_time = float(chapter['start_time'])
-                end_time = float(chapter['end_time'])
-                chapters.append({'start': start_time, 'end': end_time})
+            # Chapters come from the shared metadata record, probed once per file
+            chapters = MediaProbe().get_chapters(video_file)
         except Exception as e:
             print(f"Failed to extract chapters for {video_file}. Error: {e}")
         return chapters
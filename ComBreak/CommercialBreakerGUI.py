@@ -301,7 +301,7 @@ class CommercialBreakerGUI:
             self.output_path.set(directory)
 
     def delete_txt_files(self):
-        """Delete the .txt files in the output directory."""
+        """Delete the stored timestamps and .txt files of the output directory."""
         if not self.output_path.get():
             messagebox.showerror("Error", "Please specify an output directory.")
             return
@@ -12,6 +12,9 @@ from ComBreak.SilentBlackFrameDetector import SilentBlackFrameDetector
 from ComBreak.ChapterExtractor import ChapterExtractor
 from ComBreak.VideoCutter import VideoCutter
 from ComBreak.TimestampManager import TimestampManager
+from ComBreak.TimestampStore import get_timestamp_store
+from ComBreak.ThrottledReporter import ThrottledReporter
+from ComBreak.Tracer import get_tracer
 from bisect import bisect_left
 import config
 
@@ -34,11 +37,39 @@ class CommercialBreakerLogic:
     # ------------------ Orchestrating All Timestamp Methods ------------------
     def detect_commercials(self, input_path, output_path, progress_callback=None, status_callback=None,
                            low_power_mode=False, fast_mode=False, reset_callback=None):
+        # Coalesce the flood of per-frame progress and per-segment status updates
+        reporter = ThrottledReporter(progress_callback, status_callback)
+        progress_callback, status_callback = reporter.callbacks()
+        if reset_callback:
+            reset_callback = self._reset_with(reporter, reset_callback)
+        try:
+            # Time and resource usage of every stage and file go to the trace, summarized at the end
+            with get_tracer().run('detect_commercials', status_callback):
+                self._detect_commercials(input_path, output_path, progress_callback, status_callback,
+                                         low_power_mode, fast_mode, reset_callback)
+        finally:
+            reporter.flush()
+
+    @staticmethod
+    def _reset_with(reporter, reset_callback):
+        """Reset the progress bar without letting older throttled progress land after it."""
+        def reset():
+            reporter.reset()
+            reset_callback()
+        return reset
+
+    def _detect_commercials(self, input_path, output_path, progress_callback, status_callback,
+                            low_power_mode, fast_mode, reset_callback):
         total_frames = 0
         total_videos = 0
         file_counter = 0
         video_files_data = [] # This might be redundant now as detection logic is separate
 
+        # Pick up timestamp files from older versions or edited by hand, so those videos are skipped
+        tracer = get_tracer()
+        with tracer.span('import_txt'):
+            get_timestamp_store().import_txt(output_path, status_callback)
+
         # Clear the unprocessed files manager
         unprocessed_files_manager = VideoFilesManager()
         unprocessed_files_manager.clear_files()  # Ensure we start with a clean state
@@ -66,16 +97,17 @@ class CommercialBreakerLogic:
                         unprocessed_files_manager.add_file(str(original_file), dirpath, filename)
 
         # Get an initial count of files
-        initial_files = len(unprocessed_files_manager.get_files())
+        initial_files = len(unprocessed_files_manager)
         if status_callback:
             status_callback(f"Starting with {initial_files} video files to check")
 
         # Now, try to extract chapters from the selected videos and remove those with chapters
         # Delegate to the ChapterExtractor instance
-        self.chapter_extractor.extract_chapters(input_path, output_path, unprocessed_files_manager, status_callback, progress_callback, reset_callback)
+        with tracer.span('chapters'):
+            self.chapter_extractor.extract_chapters(input_path, output_path, unprocessed_files_manager, status_callback, progress_callback, reset_callback)
         
         # Check how many files are left after chapter extraction
-        remaining_files = len(unprocessed_files_manager.get_files())
+        remaining_files = len(unprocessed_files_manager)
         if status_callback:
             status_callback(f"After chapter extraction: {remaining_files} videos remaining for processing")
         
@@ -92,51 +124,63 @@ class CommercialBreakerLogic:
             if status_callback:
                 status_callback("Low Power Mode Enabled: Skipping black frame detection")
             # Delegate to the TimestampManager instance
-            self.timestamp_manager.read_timestamps(
-                input_path, output_path, total_frames, video_files_data, total_videos,
-                file_counter, unprocessed_files_manager, progress_callback, status_callback
-            )
+            with tracer.span('plex_timestamps'):
+                self.timestamp_manager.read_timestamps(
+                    input_path, output_path, total_frames, video_files_data, total_videos,
+                    file_counter, unprocessed_files_manager, progress_callback, status_callback
+                )
         elif fast_mode:
             # Check for timestamps in plex_timestamps.txt first
             # Delegate to the TimestampManager instance
-            self.timestamp_manager.read_timestamps(
-                input_path, output_path, total_frames, video_files_data, total_videos,
-                file_counter, unprocessed_files_manager, progress_callback, status_callback
-            )
+            with tracer.span('plex_timestamps'):
+                self.timestamp_manager.read_timestamps(
+                    input_path, output_path, total_frames, video_files_data, total_videos,
+                    file_counter, unprocessed_files_manager, progress_callback, status_callback
+                )
             # Then detect silent black frames for files not found in plex_timestamps.txt
             # Delegate to the SilentBlackFrameDetector instance
-            self.silent_black_frame_detector.detect_silent_black_frames(
-                input_path, output_path, total_frames, video_files_data, total_videos,
-                file_counter, unprocessed_files_manager, progress_callback, status_callback,
-                reset_callback
-            )
+            with tracer.span('black_frame_detection'):
+                self.silent_black_frame_detector.detect_silent_black_frames(
+                    input_path, output_path, total_frames, video_files_data, total_videos,
+                    file_counter, unprocessed_files_manager, progress_callback, status_callback,
+                    reset_callback
+                )
         else:
             # Detect silent black frames first
             # Delegate to the SilentBlackFrameDetector instance
-            self.silent_black_frame_detector.detect_silent_black_frames(
-                input_path, output_path, total_frames, video_files_data, total_videos,
-                file_counter, unprocessed_files_manager, progress_callback, status_callback,
-                reset_callback
-            )
+            with tracer.span('black_frame_detection'):
+                self.silent_black_frame_detector.detect_silent_black_frames(
+                    input_path, output_path, total_frames, video_files_data, total_videos,
+                    file_counter, unprocessed_files_manager, progress_callback, status_callback,
+                    reset_callback
+                )
             # Then read timestamps for any remaining files
             # Delegate to the TimestampManager instance
-            self.timestamp_manager.read_timestamps(
-                input_path, output_path, total_frames, video_files_data, total_videos,
-                file_counter, unprocessed_files_manager, progress_callback, status_callback
-            )
+            with tracer.span('plex_timestamps'):
+                self.timestamp_manager.read_timestamps(
+                    input_path, output_path, total_frames, video_files_data, total_videos,
+                    file_counter, unprocessed_files_manager, progress_callback, status_callback
+                )
 
         # Final step: Clean up timestamps by reducing points that are too close together
         if status_callback:
             status_callback("Cleaning up timestamps...")
         # Delegate to the TimestampManager instance
-        self.timestamp_manager.cleanup_timestamps(output_path, progress_callback, status_callback)
+        with tracer.span('cleanup'):
+            self.timestamp_manager.cleanup_timestamps(output_path, progress_callback, status_callback)
         if status_callback:
             status_callback("Timestamp cleanup complete!")
 
     # ------------------ Cutting Videos Methods (Facade) ------------------
     def cut_videos(self, input_path, output_path, progress_callback=None, status_callback=None, destructive_mode=False, cutless_mode=False):
         """Facade method to delegate video cutting to the VideoCutter instance."""
-        self.video_cutter.cut_videos(input_path, output_path, progress_callback, status_callback, destructive_mode, cutless_mode)
+        reporter = ThrottledReporter(progress_callback, status_callback)
+        progress_callback, status_callback = reporter.callbacks()
+        try:
+            with get_tracer().run('cut_videos', status_callback):
+                self.video_cutter.cut_videos(input_path, output_path, progress_callback, status_callback, destructive_mode, cutless_mode)
+        finally:
+            reporter.flush()
 
     def delete_files(self, output_path):
         """Facade method to delegate file deletion to the VideoCutter instance."""
@@ -0,0 +1,167 @@
+import json
+import logging
+import os
+import threading
+import time
+import config
+from API.utils import get_db_manager
+
+logger = logging.getLogger(__name__)
+
+
+class DetectionJournal:
+    """
+    Per-file checkpoint journal of silent black frame detection runs.
+
+    Each file's latest completed stage is stored in the application database
+    together with the results needed to resume from it, so a run restarted
+    after a crash or container restart skips the work that already finished.
+    An entry is only used while the file's size and modification time and the
+    detection settings signature still match, and its results only as far as
+    its stage goes. Once a file's timestamps are written it is finished and its
+    entry is removed, later runs reuse its analysis from the AnalysisCache.
+
+    Only the orchestrator's process writes the journal; worker processes
+    report their stages through the event queue.
+    """
+
+    TABLE_NAME = 'detection_journal'
+    STAGES = ('probed', 'silence_scanned', 'downscaled', 'analyzed', 'written')
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """Singleton pattern so the orchestrator and its helpers share one journal."""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(DetectionJournal, cls).__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self.db_manager = get_db_manager()
+        self._table_ready = False
+        self._initialized = True
+
+    @property
+    def enabled(self):
+        return config.DETECTION_JOURNAL_ENABLED
+
+    def load(self, file_paths, params):
+        """
+        Return the usable journal entries of the given files.
+
+        Args:
+            file_paths: Paths of the files about to be processed
+            params: Signature of the detection settings of this run
+
+        Returns:
+            dict: {file path: {'stage': name, 'payload': dict}} for unfinished
+                  files whose entry still matches the file and the settings
+        """
+        if not self.enabled:
+            return {}
+        entries = {}
+        try:
+            self._ensure_table()
+            for file_path in file_paths:
+                row = self.db_manager.fetchone(
+                    f"SELECT stage, params, size, mtime, payload FROM {self.TABLE_NAME} WHERE path = ?",
+                    (str(file_path),)
+                )
+                if row is None or row['params'] != params or (row['size'], row['mtime']) != self._identity(file_path):
+                    continue
+                # Finished files aren't resumed, entries of older versions may still say so
+                if row['stage'] not in self.STAGES or row['stage'] == 'written':
+                    continue
+                entries[str(file_path)] = {'stage': row['stage'], 'payload': json.loads(row['payload'])}
+        except Exception as e:
+            logger.warning(f"Detection journal could not be read: {e}")
+        return entries
+
+    def record(self, file_path, stage, params, **payload):
+        """
+        Record that a file completed a stage, merging payload into its saved results.
+
+        Entries from a different file version or with other settings are replaced,
+        and the entry of a file that reached 'written' is removed.
+        """
+        if stage not in self.STAGES:
+            raise ValueError(f"Unknown detection stage '{stage}'")
+        if not self.enabled:
+            return
+        if stage == 'written':
+            self.remove(file_path)
+            return
+        try:
+            identity = self._identity(file_path)
+            if identity is None:
+                return
+            self._ensure_table()
+            row = self.db_manager.fetchone(
+                f"SELECT params, size, mtime, payload FROM {self.TABLE_NAME} WHERE path = ?",
+                (str(file_path),)
+            )
+            merged = {}
+            if row is not None and row['params'] == params and (row['size'], row['mtime']) == identity:
+                merged = json.loads(row['payload'])
+            merged.update(payload)
+            self.db_manager.execute(
+                f"INSERT OR REPLACE INTO {self.TABLE_NAME} "
+                "(path, stage, params, size, mtime, payload, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(file_path), stage, params, identity[0], identity[1], json.dumps(merged), time.time())
+            )
+        except Exception as e:
+            logger.warning(f"Detection journal update failed for {file_path}: {e}")
+
+    def remove(self, file_path):
+        """Forget the entry of one file."""
+        try:
+            self._ensure_table()
+            self.db_manager.delete(self.TABLE_NAME, "path = ?", (str(file_path),))
+        except Exception as e:
+            logger.warning(f"Detection journal entry of {file_path} could not be removed: {e}")
+
+    def clear(self):
+        """Forget every journaled run."""
+        try:
+            self._ensure_table()
+            self.db_manager.execute(f"DELETE FROM {self.TABLE_NAME}")
+        except Exception as e:
+            logger.warning(f"Detection journal could not be cleared: {e}")
+
+    @classmethod
+    def reached(cls, entry, stage):
+        """Whether a loaded entry got as far as a stage, so the results of that stage can be used."""
+        return cls.STAGES.index(entry['stage']) >= cls.STAGES.index(stage)
+
+    def _ensure_table(self):
+        if self._table_ready:
+            return
+        self.db_manager.create_table(self.TABLE_NAME, """
+            path TEXT PRIMARY KEY,
+            stage TEXT NOT NULL,
+            params TEXT NOT NULL,
+            size INTEGER,
+            mtime REAL,
+            payload TEXT,
+            updated_at REAL
+        """)
+        self._table_ready = True
+
+    @staticmethod
+    def _identity(file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+
+def get_detection_journal():
+    """Get the singleton DetectionJournal instance."""
+    return DetectionJournal()
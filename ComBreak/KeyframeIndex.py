@@ -0,0 +1,137 @@
+import subprocess
+import threading
+import numpy as np
+import config
+from ComBreak.utils import get_executable_path
+from ComBreak.AnalysisCache import get_analysis_cache
+
+
+class KeyframeIndex:
+    """
+    Sorted keyframe times of a source video's first video stream.
+
+    The index is built once per file from ffprobe's packet index, so nothing is
+    decoded, and stored in the AnalysisCache as a float64 array. Lookups use
+    binary search, so snapping or validating a break costs O(log n) however
+    long the video is.
+    """
+
+    _indexes = {}
+    _lock = threading.Lock()
+
+    def __init__(self, times):
+        self.times = np.unique(np.asarray(times, dtype=np.float64))
+
+    @classmethod
+    def for_file(cls, file_path):
+        """Return the keyframe index of a file, reading it from the cache or building it now."""
+        file_path = str(file_path)
+        with cls._lock:
+            index = cls._indexes.get(file_path)
+        if index is not None:
+            return index
+
+        cache = get_analysis_cache()
+        times = cache.get_array(file_path, 'keyframe_index')
+        if times is None:
+            times = cls._run_packet_probe(file_path)
+            cache.put_array(file_path, 'keyframe_index', times)
+        index = cls(times)
+        with cls._lock:
+            cls._indexes[file_path] = index
+        return index
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._indexes.clear()
+
+    def __len__(self):
+        return len(self.times)
+
+    def floor(self, timestamps):
+        """Keyframe at or before each timestamp, NaN where there is none."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        idx = np.searchsorted(self.times, timestamps, side='right') - 1
+        return np.where(idx >= 0, self.times[np.clip(idx, 0, len(self.times) - 1)], np.nan)
+
+    def ceil(self, timestamps):
+        """Keyframe at or after each timestamp, NaN where there is none."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        idx = np.searchsorted(self.times, timestamps, side='left')
+        return np.where(idx < len(self.times), self.times[np.clip(idx, 0, len(self.times) - 1)], np.nan)
+
+    def nearest(self, timestamps):
+        """Keyframe closest to each timestamp."""
+        before = self.floor(timestamps)
+        after = self.ceil(timestamps)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        use_after = np.isnan(before) | (~np.isnan(after) & (after - timestamps < timestamps - before))
+        return np.where(use_after, after, before)
+
+    def snap(self, timestamps):
+        """
+        Move breaks to their nearest keyframes.
+
+        Breaks that land on the first keyframe, or on the same keyframe as the
+        previous break, are dropped.
+
+        Raises:
+            ValueError: If the index holds no keyframes
+        """
+        if not len(self.times):
+            raise ValueError("No video keyframes found to snap breaks to")
+        snapped = np.unique(self.nearest(np.sort(np.asarray(timestamps, dtype=np.float64))))
+        return snapped[snapped > self.times[0]].tolist()
+
+    def cut_problems(self, timestamps, duration=None):
+        """
+        Describe breaks that a cut with stream-copied video can't honor, without decoding anything.
+
+        Copied video can only be split on a keyframe, so each part really starts at
+        the first keyframe at or after its break.
+
+        Args:
+            timestamps: Break times in seconds
+            duration: Optional length of the video in seconds
+
+        Returns:
+            list: Human readable problem descriptions, empty if every break is usable
+        """
+        problems = []
+        breaks = np.sort(np.asarray(timestamps, dtype=np.float64))
+        if not len(breaks):
+            return problems
+        if not len(self.times):
+            return ["the video has no keyframes to split on"]
+        splits = self.ceil(breaks)
+        for t, split in zip(breaks, splits):
+            if t <= 0 or (duration is not None and t >= duration):
+                problems.append(f"break at {t:.3f}s is outside the video")
+            elif np.isnan(split):
+                problems.append(f"break at {t:.3f}s comes after the last keyframe")
+        same_split = np.flatnonzero(~np.isnan(splits[1:]) & (splits[1:] == splits[:-1]))
+        for i in same_split:
+            problems.append(
+                f"breaks at {breaks[i]:.3f}s and {breaks[i + 1]:.3f}s both split at keyframe {splits[i]:.3f}s"
+            )
+        return problems
+
+    @staticmethod
+    def _run_packet_probe(file_path):
+        command = [
+            get_executable_path("ffprobe", config.ffprobe_path),
+            '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries', 'packet=pts_time,flags',
+            '-of', 'csv=p=0',
+            file_path
+        ]
+        output = subprocess.check_output(command).decode()
+        keyframes = []
+        for line in output.splitlines():
+            # Lines look like "12.345000,K__"
+            pts_time, _, flags = line.partition(',')
+            if 'K' in flags and pts_time not in ('', 'N/A'):
+                keyframes.append(float(pts_time))
+        return np.unique(np.asarray(keyframes, dtype=np.float64))
@@ -0,0 +1,166 @@
+import json
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import config
+from ComBreak.utils import get_executable_path
+from ComBreak.AnalysisCache import get_analysis_cache
+from ComBreak.Tracer import get_tracer
+
+
+class MediaProbe:
+    """
+    Shared in-memory metadata records gathered with one ffprobe call per file.
+
+    A single `ffprobe -show_chapters -show_format -show_streams` run provides the
+    chapters used by ChapterExtractor, the duration used by VideoCutter and the
+    frame rate and frame size used by black frame detection. Files can be probed
+    up front concurrently with probe_files(), or on demand through the getters.
+    Records are also stored in the AnalysisCache so unchanged files are never
+    probed twice.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(MediaProbe, cls).__new__(cls)
+                    cls._instance.records = {}
+                    cls._instance.cache = get_analysis_cache()
+        return cls._instance
+
+    def probe_files(self, file_paths, status_callback=None, progress_callback=None):
+        """
+        Probe every file that doesn't have a record yet, using a thread pool.
+
+        Args:
+            file_paths: Iterable of media file paths
+            status_callback: Function to report status messages
+            progress_callback: Function receiving (completed, total)
+        """
+        pending = []
+        for file_path in dict.fromkeys(str(p) for p in file_paths):
+            if self._get_record(file_path) is not None:
+                continue
+            cached_record = self.cache.get(file_path, 'probe')
+            if cached_record is not None:
+                self._set_record(file_path, cached_record)
+            else:
+                pending.append(file_path)
+
+        if not pending:
+            return
+        if status_callback:
+            status_callback(f"Reading metadata of {len(pending)} videos")
+
+        workers = max(1, min(int(config.PROBE_WORKERS), len(pending)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self._run_ffprobe, file_path): file_path for file_path in pending}
+            for completed, future in enumerate(as_completed(futures), start=1):
+                file_path = futures[future]
+                try:
+                    record = future.result()
+                    self._set_record(file_path, record)
+                    self.cache.put(file_path, 'probe', record)
+                except Exception as e:
+                    if status_callback:
+                        status_callback(f"Failed to read metadata for {file_path}: {e}")
+                if progress_callback:
+                    progress_callback(completed, len(pending))
+
+    def get(self, file_path):
+        """Return the metadata record of a file, probing it now if needed."""
+        file_path = str(file_path)
+        record = self._get_record(file_path)
+        if record is None:
+            record = self.cache.get(file_path, 'probe')
+            if record is None:
+                record = self._run_ffprobe(file_path)
+                self.cache.put(file_path, 'probe', record)
+            self._set_record(file_path, record)
+        return record
+
+    def add_record(self, file_path, record):
+        """Use a metadata record saved elsewhere, such as the detection journal, instead of probing."""
+        self._set_record(str(file_path), record)
+
+    def get_chapters(self, file_path):
+        return self.get(file_path)['chapters']
+
+    def get_duration(self, file_path):
+        return self.get(file_path)['duration']
+
+    def get_fps(self, file_path):
+        return self.get(file_path)['fps']
+
+    def get_frame_size(self, file_path):
+        record = self.get(file_path)
+        return record['width'], record['height']
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+    def _get_record(self, file_path):
+        with self._lock:
+            return self.records.get(file_path)
+
+    def _set_record(self, file_path, record):
+        with self._lock:
+            self.records[file_path] = record
+
+    @staticmethod
+    def _run_ffprobe(file_path):
+        command = [
+            get_executable_path("ffprobe", config.ffprobe_path),
+            '-v', 'quiet',
+            '-print_format', 'json',
+            '-show_chapters',
+            '-show_format',
+            '-show_streams',
+            file_path
+        ]
+        with get_tracer().span('probe', file_path):
+            output = subprocess.check_output(command).decode()
+        return MediaProbe._parse(json.loads(output))
+
+    @staticmethod
+    def _parse(data):
+        """Reduce ffprobe's JSON output to the fields ComBreak uses."""
+        chapters = [
+            {'start': float(chapter['start_time']), 'end': float(chapter['end_time'])}
+            for chapter in data.get('chapters', [])
+        ]
+
+        duration = data.get('format', {}).get('duration')
+        video_stream = next(
+            (stream for stream in data.get('streams', [])
+             if stream.get('codec_type') == 'video'
+             and not stream.get('disposition', {}).get('attached_pic')),
+            {}
+        )
+        fps = MediaProbe._parse_rate(video_stream.get('avg_frame_rate')) or \
+            MediaProbe._parse_rate(video_stream.get('r_frame_rate'))
+
+        return {
+            'chapters': chapters,
+            'duration': float(duration) if duration is not None else None,
+            'fps': fps,
+            'width': video_stream.get('width'),
+            'height': video_stream.get('height'),
+        }
+
+    @staticmethod
+    def _parse_rate(rate):
+        """Convert an ffprobe rate such as '24000/1001' to a float, or None."""
+        if not rate:
+            return None
+        numerator, _, denominator = rate.partition('/')
+        try:
+            value = float(numerator) / float(denominator or 1)
+        except (ValueError, ZeroDivisionError):
+            return None
+        return value if value > 0 else None
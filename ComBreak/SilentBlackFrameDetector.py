@@ -1,12 +1,27 @@
 import os
+import re
 from pathlib import Path
 import subprocess
-from bisect import bisect_left
+import tempfile
+import multiprocessing
+import queue
+from collections import deque
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 import config
 import cv2
 import numpy as np
 from ComBreak.VideoLoader import VideoLoader
-from ComBreak.utils import get_executable_path
+from ComBreak.utils import (
+    get_executable_path, get_detection_profile, limit_workers,
+    video_decode_args, audio_decode_args
+)
+from ComBreak.AnalysisCache import get_analysis_cache
+from ComBreak.MediaProbe import MediaProbe
+from ComBreak.DetectionJournal import get_detection_journal
+from ComBreak.TimestampStore import get_timestamp_store
+from ComBreak.Tracer import Span, get_tracer
 
 
 class SilentBlackFrameDetector:
@@ -71,10 +86,19 @@ class ProgressManager:
         # elif self.silence_done == self.silence_total:
         #     print("Warning: Tried to step silence beyond total")
 
-    def step_frame(self):
+    def add_work(self, downscale_count=0, frame_count=0):
+        """Grow the downscale and frame totals once a file's silence scan is done."""
+        self.downscale_total += downscale_count
+        self.frame_total += frame_count
+        self.total = max(1, self.downscale_total + self.silence_total + self.frame_total)
+        self._update_progress()
+
+    def step_frame(self, count=1):
         # Frame count is an estimate, so allow stepping slightly beyond
         # but the total progress is capped in _update_progress
-        self.frame_done += 1 
+        if count <= 0:
+            return
+        self.frame_done += count
         self._update_progress()
         
     def force_complete(self):
@@ -94,8 +118,16 @@ class SilentBlackFrameOrchestrator:
         self.preprocessor = VideoPreprocessor()
         self.silence_detector = SilenceDetector()
         self.blackframe_analyzer = BlackFrameAnalyzer()
+        self.stream_analyzer = FrameStreamAnalyzer()
         self.reducer = TimestampReducer()
         self.cleaner = ResourceCleaner()
+        self.cache = get_analysis_cache()
+        self.media_probe = MediaProbe()
+        self.journal = get_detection_journal()
+        self.timestamp_store = get_timestamp_store()
+        self.tracer = get_tracer()
+        self.journal_params = None
+        self.journal_entries = {}
 
     def run(
         self, input_path, output_path, total_frames, video_files_data,
@@ -114,211 +146,535 @@ class SilentBlackFrameOrchestrator:
                 status_callback("No files to process. Skipping silent black frame detection.")
             return 0
 
-        # --- Accurate Progress Pre-calculation ---
-        
-        # 1. Silence Steps (1 per video)
-        silence_steps_total = len(gathered)
-        
-        # 2. Pre-scan all videos for silence periods
+        # Temporary segments left behind by an interrupted run are never reused, only the
+        # segments engine writes them, next to the timestamps of the file they were cut from
+        if config.DETECTION_ENGINE != "pipe":
+            self.cleaner.clean_orphaned_segments(
+                dict.fromkeys(out_dir for _, _, out_dir in gathered), status_callback
+            )
+
+        # Resume from the stages an interrupted run already completed
+        originals = [original for _, original, _ in gathered]
+        self.journal_params = BlackFrameAnalyzer.cache_params()
+        self.journal_entries = self.journal.load(originals, self.journal_params)
+        if self.journal_entries and status_callback:
+            status_callback(f"Resuming {len(self.journal_entries)} videos from an interrupted detection run")
+        for original in self.journal_entries:
+            payload = self._journaled_payload(original, 'probed')
+            if 'probe' in payload:
+                self.media_probe.add_record(original, payload['probe'])
+
+        # Frame rates and sizes come from one concurrent ffprobe pass over every file
+        self.media_probe.probe_files(originals, status_callback)
+        for original in originals:
+            if original not in self.journal_entries:
+                try:
+                    self._record_stage(original, 'probed', probe=self.media_probe.get(original))
+                except Exception:
+                    pass # Probe failures were already reported
+
+        # Silence steps are known up front (1 per video); downscale and frame steps
+        # are added to the totals as each file's silence scan finishes
+        prog = ProgressManager(0, len(gathered), 0, progress_callback)
+
+        # --- Phase 2: Scan for silence and process each file as soon as its scan is done ---
+        scan_workers = min(limit_workers(config.SILENCE_SCAN_WORKERS), len(gathered))
         if status_callback:
-            status_callback(f"Pre-scanning {len(gathered)} videos to identify silence periods and optimize processing...")
-        all_silence_periods_data = []
-        downscale_steps_total = 0
-        frame_steps_total = 0
-        
-        for idx, (filename, original_file, out_dir) in enumerate(gathered):
-            silence_periods = []
-            try:
-                # Use a minimal status callback during pre-scan if desired
-                # silence_periods = self.silence_detector.detect(original_file, lambda msg: None) 
-                silence_periods = self.silence_detector.detect(original_file, status_callback) 
-                
-                # Count downscale steps (1 per segment)
-                downscale_steps_total += len(silence_periods)
-                
-                # Estimate frame steps (using original video frame rate)
-                if silence_periods:
-                    try:
-                        # Use VideoLoader's get_frame_count to estimate frames in periods
-                        temp_loader = VideoLoader(str(original_file))
-                        # Calculate how many frames per second after FRAME_RATE sampling
-                        fps = temp_loader.cap.get(cv2.CAP_PROP_FPS) / config.FRAME_RATE
-                        temp_loader.release()
-                        
-                        for period in silence_periods:
-                            duration = period['end'] - period['start']
-                            if duration > 0:
-                                # Calculate frames in this period using FPS after sampling
-                                estimated_frames = int(duration * fps)
-                                frame_steps_total += estimated_frames
-                    except Exception as e:
-                        if status_callback:
-                            status_callback(f"Error estimating frames for {filename}, progress might be less accurate: {str(e)}")
-                            
-            except Exception as e:
-                if status_callback:
-                    status_callback(f"Error pre-scanning silence in {filename}: {str(e)}")
+            status_callback(f"Scanning {len(gathered)} videos for silence with {scan_workers} parallel scans")
+        with ThreadPoolExecutor(max_workers=scan_workers) as scan_pool:
+            scan_futures = [
+                scan_pool.submit(self._prescan_file, idx, filename, original_file, out_dir)
+                for idx, (filename, original_file, out_dir) in enumerate(gathered)
+            ]
+            workers = min(limit_workers(config.DETECTION_WORKERS), len(gathered))
+            if workers > 1:
+                processed_frames_total_counter = self._run_parallel(
+                    scan_futures, len(gathered), workers, prog, status_callback
+                )
+            else:
+                processed_frames_total_counter = self._run_sequential(
+                    scan_futures, len(gathered), prog, status_callback
+                )
+
+        # Final progress update to ensure it reaches 100%
+        prog.force_complete() # Use the new method to guarantee 100%
+
+        if status_callback:
+            status_callback("Silent black frame detection complete!")
             
-            all_silence_periods_data.append({
+        return processed_frames_total_counter # Return actual frames processed
+
+    def _prescan_file(self, idx, filename, original_file, out_dir):
+        """
+        Detect the silence periods of one file and estimate its frame count.
+
+        Runs in a scan thread. Status messages are collected in the returned
+        file data instead of being sent, so every UI callback is made from the
+        thread that runs the orchestrator.
+        """
+        messages = []
+        silence_periods = []
+        estimated_frames = 0
+        source_info = None
+        payload = self._journaled_payload(original_file, 'silence_scanned')
+        if 'silence_periods' in payload:
+            return {
                 'file_idx': idx,
                 'filename': filename,
                 'original_file': original_file,
                 'out_dir': out_dir,
-                'silence_periods': silence_periods
-            })
+                'silence_periods': payload['silence_periods'],
+                'estimated_frames': payload['estimated_frames'],
+                'source_info': payload['source_info'],
+                'scanned': False,
+                'messages': [f"Using journaled silence scan for {filename}"]
+            }
 
-        if status_callback:
-            status_callback(f"Processing plan: {silence_steps_total} silence detections + " +
-                           f"{downscale_steps_total} segment downscales + " +
-                           f"{frame_steps_total} frame analyses = {silence_steps_total + downscale_steps_total + frame_steps_total} total steps")
-
-        # Initialize ProgressManager with accurate counts
-        prog = ProgressManager(downscale_steps_total, silence_steps_total, frame_steps_total, progress_callback)
-        processed_frames_total_counter = 0 # Keep track of actual frames processed across all files
-
-        # --- Phase 2: Process each file ---
-        for file_data in all_silence_periods_data:
-            idx = file_data['file_idx']
-            filename = file_data['filename']
-            original_file = file_data['original_file']
-            out_dir = file_data['out_dir']
-            silence_periods = file_data['silence_periods']
-            segment_files = []
-            # Estimate frames for *this file* to handle errors in analysis phase
-            estimated_frames_for_this_file = 0
+        scanned = False
+        try:
+            with self.tracer.span('silence', original_file):
+                silence_periods = list(self.silence_detector.stream(original_file, messages.append))
+            scanned = True
+
+            # Estimate frame steps (using original video frame rate)
             if silence_periods:
                 try:
-                    # Use the same FPS calculation as above for consistency
-                    temp_loader = VideoLoader(str(original_file))
-                    fps = temp_loader.cap.get(cv2.CAP_PROP_FPS) / config.FRAME_RATE
-                    temp_loader.release()
-                    
-                    for period in silence_periods:
-                        duration = period['end'] - period['start']
-                        if duration > 0: 
-                            estimated_frames_for_this_file += int(duration * fps)
+                    source_info = self._source_info(original_file)
+                    estimated_frames = self._estimate_frames(source_info[0], silence_periods)
                 except Exception as e:
-                    if status_callback:
-                        status_callback(f"Error estimating frames for {filename}, using approximation: {str(e)}")
-            
+                    messages.append(f"Error estimating frames for {filename}, progress might be less accurate: {str(e)}")
+        except Exception as e:
+            messages.append(f"Error pre-scanning silence in {filename}: {str(e)}")
+
+        return {
+            'file_idx': idx,
+            'filename': filename,
+            'original_file': original_file,
+            'out_dir': out_dir,
+            'silence_periods': silence_periods,
+            'estimated_frames': estimated_frames,
+            'source_info': source_info,
+            'scanned': scanned,
+            'messages': messages
+        }
+
+    def _take_scan(self, scan_future, prog, status_callback):
+        """
+        Account for a finished silence scan and return the file data to process.
+
+        Files analyzed before with the same settings are completed from the
+        cache right away, in which case None is returned.
+        """
+        file_data = scan_future.result()
+        messages = file_data.pop('messages')
+        if status_callback:
+            for message in messages:
+                status_callback(message)
+        # Count downscale steps (1 per segment) and the estimated frame steps
+        prog.add_work(len(file_data['silence_periods']), file_data['estimated_frames'])
+        prog.step_silence()
+        # Failed scans aren't journaled so a restarted run tries them again
+        if file_data.pop('scanned'):
+            self._record_stage(
+                file_data['original_file'], 'silence_scanned',
+                silence_periods=file_data['silence_periods'],
+                estimated_frames=file_data['estimated_frames'],
+                source_info=file_data['source_info']
+            )
+
+        cached_ts = self._journaled_payload(file_data['original_file'], 'analyzed').get('raw_ts')
+        if cached_ts is None:
+            cached_ts = self.cache.get(file_data['original_file'], 'black_frames', BlackFrameAnalyzer.cache_params())
+        if cached_ts is None:
+            return file_data
+        if status_callback:
+            status_callback(f"Using earlier black frame analysis for {file_data['filename']}")
+        for _ in file_data['silence_periods']:
+            prog.step_downscale()
+        prog.step_frame(file_data['estimated_frames'])
+        self._complete_file(file_data, cached_ts, status_callback)
+        return None
+
+    def _source_info(self, original_file):
+        """Return (fps, width, height) of a source video from its probed metadata."""
+        try:
+            record = self.media_probe.get(original_file)
+        except Exception:
+            record = None
+        if record and record['fps']:
+            return record['fps'], record['width'] or 0, record['height'] or 0
+        # Fall back to OpenCV if ffprobe couldn't report the frame rate
+        return FrameStreamAnalyzer._probe_source(original_file)
+
+    @staticmethod
+    def _estimate_frames(source_fps, silence_periods):
+        """Estimate how many sampled frames the silence periods of a file contain."""
+        # Calculate how many frames per second after FRAME_RATE sampling
+        fps = source_fps / config.FRAME_RATE
+
+        estimated_frames = 0
+        for period in silence_periods:
+            duration = period['end'] - period['start']
+            if duration > 0:
+                # Calculate frames in this period using FPS after sampling
+                estimated_frames += int(duration * fps)
+        return estimated_frames
+
+    def _run_sequential(self, scan_futures, total_files, prog, status_callback):
+        """Process files one after another in the current process, in the order their scans finish."""
+        processed_frames_total_counter = 0
+        for scan_future in as_completed(scan_futures):
+            file_data = self._take_scan(scan_future, prog, status_callback)
+            if file_data is None:
+                continue
             try:
+                with self.tracer.span('analysis', file_data['original_file']) as span:
+                    raw_ts, processed_frames_in_file, complete = self._process_file(
+                        file_data, total_files, status_callback,
+                        prog.step_downscale, prog.step_frame,
+                        lambda stage, original=file_data['original_file']: self._record_stage(original, stage)
+                    )
+                    span.add(frames=processed_frames_in_file)
+                processed_frames_total_counter += processed_frames_in_file
+                self._complete_file(file_data, raw_ts, status_callback, cache_result=complete)
+            except Exception as e:
+                # General error handling for the file
                 if status_callback:
-                    status_callback(f"Processing video {idx+1}/{len(gathered)}: {filename}")
+                    status_callback(f"An error occurred processing {file_data['filename']}, skipping remaining steps for this file: {str(e)}")
+        return processed_frames_total_counter
 
-                # 2.1 Silence detection step (already done, just update progress)
-                prog.step_silence() 
+    def _run_parallel(self, scan_futures, total_files, workers, prog, status_callback):
+        """
+        Process whole files concurrently in a bounded pool of worker processes.
 
-                # 2.2 Targeted downscaling
-                if silence_periods:
-                    try:
-                        segment_files = self.preprocessor.preprocess_segments(
-                            original_file, out_dir, silence_periods, idx, len(gathered),
-                            status_callback, 
-                            prog.step_downscale # Pass the specific downscale step function
-                        )
-                    except Exception as e:
+        Each file is submitted as soon as its silence scan finishes. Workers
+        cannot call the UI callbacks directly, so they post progress and status
+        events to a shared queue which is drained here and fed into the single
+        ProgressManager. Timestamp reduction and writing stay in this process.
+
+        A worker process that dies (out of memory, a crash in OpenCV) breaks the
+        whole pool and fails every file still in it. The pool is then replaced
+        and those files are retried one at a time, each alone in the pool, so
+        only a file that breaks the pool on its own is skipped.
+        """
+        if status_callback:
+            status_callback(f"Processing {total_files} videos with {workers} parallel workers")
+
+        processed_frames_total_counter = 0
+        # Spawned workers don't inherit locks held by the silence scan threads
+        mp_context = multiprocessing.get_context("spawn")
+        with mp_context.Manager() as manager:
+            event_queue = manager.Queue()
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context)
+            futures = {}
+            scans_pending = set(scan_futures)
+            pending = set()
+            # Scanned files waiting to be submitted, and files caught in a broken pool
+            waiting = deque()
+            suspects = deque()
+            isolated = None
+
+            def submit_ready():
+                nonlocal isolated
+                if isolated is not None:
+                    return
+                source = suspects if suspects else waiting
+                # A suspect only runs once every other file in the pool is done
+                while source and not (suspects and pending):
+                    file_data = source[0]
+                    worker_future = pool.submit(
+                        _process_file_worker, file_data, total_files, event_queue, self.tracer.active
+                    )
+                    source.popleft()
+                    futures[worker_future] = file_data
+                    pending.add(worker_future)
+                    if source is suspects:
+                        isolated = worker_future
+                        return
+
+            def replace_broken_pool():
+                nonlocal pool, isolated
+                # Once the broken pool is shut down every future it held is done
+                pool.shutdown(wait=True)
+                pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context)
+                caught = 0
+                for worker_future in list(pending):
+                    if not isinstance(worker_future.exception(), BrokenProcessPool):
+                        continue # Finished before the pool broke, handled as usual
+                    pending.discard(worker_future)
+                    file_data = futures.pop(worker_future)
+                    if worker_future is isolated:
                         if status_callback:
-                            status_callback(f"Error during segmented downscaling for {filename}: {str(e)}")
-                        # Ensure progress steps for downscaling are accounted for even on error
-                        # Calculate how many downscale steps were expected for this file
-                        expected_downscales_for_file = len(silence_periods)
-                        # Calculate how many were done *before* this file started
-                        downscales_before_this_file = sum(len(p_data['silence_periods']) for p_data in all_silence_periods_data[:idx])
-                        # Calculate how many were done *for* this file so far (might be 0 if error was immediate)
-                        downscales_done_for_this_file = prog.downscale_done - downscales_before_this_file
-                        # Step the remaining ones
-                        remaining_downscale_steps = max(0, expected_downscales_for_file - downscales_done_for_this_file)
-                        for _ in range(remaining_downscale_steps):
-                             prog.step_downscale()
-                        raise # Re-raise to skip analysis for this file
-                else:
-                    # No downscale steps expected or taken
-                    if status_callback:
-                        status_callback(f"No silence periods found for {filename}, skipping downscale/analysis.")
-                    
+                            status_callback(f"An error occurred processing {file_data['filename']}, skipping remaining steps for this file: worker process stopped unexpectedly")
+                    else:
+                        suspects.append(file_data)
+                        caught += 1
+                isolated = None
+                if caught and status_callback:
+                    status_callback(f"A detection worker process stopped unexpectedly, retrying {caught} videos one at a time")
 
-                # 2.3 Black frame analysis
-                raw_ts = []
-                processed_frames_in_file = 0
-                if segment_files: # Only analyze if segments were successfully created
+            try:
+                while scans_pending or pending or waiting or suspects:
                     try:
-                        # Pass 0 as offset, function returns count for this call
-                        raw_ts, processed_frames_in_file = self.blackframe_analyzer.analyze_segments(
-                            segment_files,
-                            status_callback, 
-                            prog.step_frame, # Pass the specific frame step function
-                            0, 
-                            estimated_frames_for_this_file # Pass estimate for context
-                        )
-                        processed_frames_total_counter += processed_frames_in_file
-                    except Exception as e:
-                        if status_callback:
-                            status_callback(f"Error during frame analysis for {filename}: {str(e)}")
-                        # Ensure progress steps for frames are accounted for
-                        remaining_frame_steps = max(0, estimated_frames_for_this_file - processed_frames_in_file)
-                        if status_callback:
-                            status_callback(f"Accounting for {remaining_frame_steps} estimated remaining frames in progress.")
-                        for _ in range(remaining_frame_steps):
-                            prog.step_frame()
-                        processed_frames_total_counter += remaining_frame_steps # Add to total count
-                        
-                else:
-                    # No frame analysis steps expected or taken if no segments
-                    pass 
+                        submit_ready()
+                    except BrokenProcessPool:
+                        replace_broken_pool()
+                        continue
+                    done, _ = wait(scans_pending | pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                    self._drain_worker_events(event_queue, prog, status_callback)
+                    for future in done:
+                        if future in scans_pending:
+                            scans_pending.discard(future)
+                            file_data = self._take_scan(future, prog, status_callback)
+                            if file_data is not None:
+                                waiting.append(file_data)
+                            continue
 
-                # 2.4 Reduction & write
-                final_ts = self.reducer.reduce(raw_ts)
-                self._write_timestamps(filename, out_dir, final_ts, status_callback)
+                        if future not in pending:
+                            continue # Handled when its pool broke
+                        if isinstance(future.exception(), BrokenProcessPool):
+                            replace_broken_pool()
+                            continue
+                        if future is isolated:
+                            isolated = None
+                        pending.discard(future)
+                        file_data = futures.pop(future)
+                        try:
+                            raw_ts, processed_frames_in_file, complete = future.result()
+                            processed_frames_total_counter += processed_frames_in_file
+                            self._complete_file(file_data, raw_ts, status_callback, cache_result=complete)
+                        except Exception as e:
+                            # A failure in one worker only affects its own file
+                            if status_callback:
+                                status_callback(f"An error occurred processing {file_data['filename']}, skipping remaining steps for this file: {str(e)}")
+            finally:
+                pool.shutdown(wait=True)
+            self._drain_worker_events(event_queue, prog, status_callback)
+        return processed_frames_total_counter
 
-            except Exception as e:
-                # General error handling for the file
+    def _drain_worker_events(self, event_queue, prog, status_callback):
+        """Forward every queued worker event to the progress manager, status callback, journal and trace."""
+        while True:
+            try:
+                kind, value = event_queue.get_nowait()
+            except queue.Empty:
+                return
+            if kind == 'downscale':
+                prog.step_downscale()
+            elif kind == 'frame':
+                prog.step_frame(value)
+            elif kind == 'status' and status_callback:
+                status_callback(value)
+            elif kind == 'stage':
+                self._record_stage(*value)
+            elif kind == 'span':
+                self.tracer.emit(value)
+
+    def _process_file(
+        self, file_data, total_files, status_callback,
+        progress_step_downscale, progress_step_frame, stage_callback=None
+    ):
+        """
+        Downscale the silent periods of one file and analyze them for black frames.
+
+        stage_callback, if given, is called with 'downscaled' once every silent
+        segment has been written by the "segments" engine.
+
+        Returns:
+            tuple: (raw black frame timestamps, count of processed frames,
+                    whether every silent period was analyzed without errors)
+
+        Raises:
+            Exception: If downscaling fails, so the caller skips writing this file.
+        """
+        idx = file_data['file_idx']
+        filename = file_data['filename']
+        original_file = file_data['original_file']
+        out_dir = file_data['out_dir']
+        silence_periods = file_data['silence_periods']
+        # Estimate frames for *this file* to handle errors in analysis phase
+        estimated_frames_for_this_file = file_data['estimated_frames']
+        segment_files = []
+
+        downscales_done_for_this_file = 0
+
+        def step_downscale():
+            nonlocal downscales_done_for_this_file
+            downscales_done_for_this_file += 1
+            progress_step_downscale()
+
+        try:
+            if status_callback:
+                status_callback(f"Processing video {idx+1}/{total_files}: {filename}")
+
+            # 2.2/2.3 Streamed downscale and analysis, no temporary segment files
+            if silence_periods and config.DETECTION_ENGINE == "pipe":
+                raw_ts, processed_frames_in_file = self.stream_analyzer.analyze_periods(
+                    original_file, silence_periods, status_callback,
+                    step_downscale, progress_step_frame, file_data['source_info']
+                )
+                return raw_ts, processed_frames_in_file, self.stream_analyzer.failed_segments == 0
+
+            # 2.2 Targeted downscaling
+            if silence_periods:
+                try:
+                    segment_files = self.preprocessor.preprocess_segments(
+                        original_file, out_dir, silence_periods, idx, total_files,
+                        status_callback, 
+                        step_downscale # Pass the specific downscale step function
+                    )
+                except Exception as e:
+                    if status_callback:
+                        status_callback(f"Error during segmented downscaling for {filename}: {str(e)}")
+                    # Ensure progress steps for downscaling are accounted for even on error
+                    remaining_downscale_steps = max(0, len(silence_periods) - downscales_done_for_this_file)
+                    for _ in range(remaining_downscale_steps):
+                        progress_step_downscale()
+                    raise # Re-raise to skip analysis for this file
+                if segment_files and stage_callback:
+                    stage_callback('downscaled')
+            else:
+                # No downscale steps expected or taken
                 if status_callback:
-                    status_callback(f"An error occurred processing {filename}, skipping remaining steps for this file: {str(e)}")
-                # Ensure progress steps are advanced if not already done
-                # Silence step was done at the start of the loop
-                # Downscale steps should have been handled in the downscale try/except
-                # Frame steps should have been handled in the analysis try/except
-                # If error happened before analysis, need to account for frame steps here? Let's assume analysis handles it.
-                pass
+                    status_callback(f"No silence periods found for {filename}, skipping downscale/analysis.")
 
-            finally:
-                # 2.5 Cleanup
-                if segment_files:
-                    self.cleaner.clean_segments(segment_files, status_callback)
+            # 2.3 Black frame analysis
+            raw_ts = []
+            processed_frames_in_file = 0
+            valid_periods = sum(1 for period in silence_periods if period['end'] - period['start'] > 0)
+            complete = len(segment_files) == valid_periods
+            if segment_files: # Only analyze if segments were successfully created
+                try:
+                    # Pass 0 as offset, function returns count for this call
+                    raw_ts, processed_frames_in_file = self.blackframe_analyzer.analyze_segments(
+                        segment_files,
+                        status_callback, 
+                        progress_step_frame, # Pass the specific frame step function
+                        0, 
+                        estimated_frames_for_this_file # Pass estimate for context
+                    )
+                    complete = complete and self.blackframe_analyzer.failed_segments == 0
+                except Exception as e:
+                    complete = False
+                    if status_callback:
+                        status_callback(f"Error during frame analysis for {filename}: {str(e)}")
+                    # Ensure progress steps for frames are accounted for
+                    remaining_frame_steps = max(0, estimated_frames_for_this_file - processed_frames_in_file)
+                    if status_callback:
+                        status_callback(f"Accounting for {remaining_frame_steps} estimated remaining frames in progress.")
+                    progress_step_frame(remaining_frame_steps)
+                    processed_frames_in_file += remaining_frame_steps # Add to total count
 
-        # Final progress update to ensure it reaches 100%
-        prog.force_complete() # Use the new method to guarantee 100%
+            return raw_ts, processed_frames_in_file, complete
 
-        if status_callback:
-            status_callback("Silent black frame detection complete!")
-            
-        return processed_frames_total_counter # Return actual frames processed
+        finally:
+            # 2.5 Cleanup
+            if segment_files:
+                self.cleaner.clean_segments(segment_files, status_callback)
+
+    def _complete_file(self, file_data, raw_ts, status_callback, cache_result=False):
+        # Only results of a fully successful analysis are reused by later runs
+        if cache_result:
+            self.cache.put(file_data['original_file'], 'black_frames', raw_ts, BlackFrameAnalyzer.cache_params())
+            self._record_stage(file_data['original_file'], 'analyzed', raw_ts=raw_ts)
+        # 2.4 Reduction & write
+        with self.tracer.span('store', file_data['original_file']):
+            final_ts = self.reducer.reduce(raw_ts)
+            self._write_timestamps(
+                file_data['original_file'], file_data['filename'], file_data['out_dir'], final_ts, status_callback
+            )
+        self._record_stage(file_data['original_file'], 'written')
+
+    def _journaled_payload(self, original_file, stage):
+        """Results an interrupted run journaled for a file, empty unless it got as far as the given stage."""
+        entry = self.journal_entries.get(original_file)
+        return entry['payload'] if entry and self.journal.reached(entry, stage) else {}
+
+    def _record_stage(self, original_file, stage, **payload):
+        """Journal that a file completed a stage of this run."""
+        self.journal.record(original_file, stage, self.journal_params, **payload)
         
-    def _write_timestamps(self, filename, output_dir, timestamps, status_callback):
-        Path(output_dir).mkdir(parents=True, exist_ok=True)
-        ts_file = Path(output_dir) / f"{filename}.txt"
+    def _write_timestamps(self, original_file, filename, output_dir, timestamps, status_callback):
+        prefix = Path(output_dir) / filename
         if status_callback:
-            status_callback(f"Will write {len(timestamps)} timestamps to file: {ts_file}")
+            status_callback(f"Will store {len(timestamps)} timestamps for: {prefix}")
         if timestamps:
             try:
-                with open(ts_file, "w") as f:
-                    f.writelines(f"{t}\n" for t in timestamps)
-                if ts_file.exists() and status_callback:
-                    status_callback(f"Successfully created timestamp file: {ts_file}")
-                else:
-                    if status_callback:
-                        status_callback(f"WARNING: Failed to create timestamp file: {ts_file}")
+                self.timestamp_store.put(prefix, timestamps, 'detected', original_file)
+                if status_callback:
+                    status_callback(f"Successfully stored timestamps for: {prefix}")
             except Exception as e:
                 if status_callback:
-                    status_callback(f"ERROR writing timestamp file: {e}")
+                    status_callback(f"ERROR storing timestamps: {e}")
         else:
             if status_callback:
                 status_callback(f"No black frames found for: {filename}")
 
 
+class _QueueReporter:
+    """Relays progress and status from a worker process to the parent through a queue."""
+
+    # Frame steps are batched so a worker doesn't post one message per frame
+    FLUSH_INTERVAL = 0.1
+
+    def __init__(self, event_queue):
+        self.event_queue = event_queue
+        self.pending_frames = 0
+        self.last_flush = time.monotonic()
+
+    def status(self, message):
+        self.event_queue.put(('status', message))
+
+    def step_downscale(self):
+        self.event_queue.put(('downscale', 1))
+
+    def stage(self, original_file, stage):
+        self.event_queue.put(('stage', (original_file, stage)))
+
+    def span(self, record):
+        self.event_queue.put(('span', record))
+
+    def step_frame(self, count=1):
+        self.pending_frames += count
+        if time.monotonic() - self.last_flush >= self.FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        if self.pending_frames > 0:
+            self.event_queue.put(('frame', self.pending_frames))
+            self.pending_frames = 0
+        self.last_flush = time.monotonic()
+
+
+def _process_file_worker(file_data, total_files, event_queue, trace=False):
+    """Entry point for a worker process: run one file through downscale and analysis."""
+    orchestrator = SilentBlackFrameOrchestrator(None)
+    reporter = _QueueReporter(event_queue)
+    # Measured here, where the work runs, and traced by the parent if it is tracing a run
+    span = Span('analysis', file_data['original_file']) if trace else None
+    error = None
+    try:
+        result = orchestrator._process_file(
+            file_data, total_files, reporter.status,
+            reporter.step_downscale, reporter.step_frame,
+            lambda stage: reporter.stage(file_data['original_file'], stage)
+        )
+        if span is not None:
+            span.add(frames=result[1])
+        return result
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        reporter.flush()
+        if span is not None:
+            reporter.span(span.finish(error))
+
+
 class VideoFileGatherer:
     def __init__(self, input_handler):
         self.input_handler = input_handler
+        self.timestamp_store = get_timestamp_store()
 
     def gather(
         self, input_path, output_path, total_frames, total_videos,
@@ -340,9 +696,9 @@ class VideoFileGatherer:
                 rel = Path(dirpath).relative_to(input_path)
                 out_dir = Path(output_path) / rel
             out_dir.mkdir(parents=True, exist_ok=True)
-            if (out_dir / f"{filename}.txt").exists():
+            if self.timestamp_store.has(out_dir / filename):
                 if status_callback:
-                    status_callback(f"Skipping {filename} - timestamp file already exists")
+                    status_callback(f"Skipping {filename} - timestamps already stored")
                 continue
             gathered.append((filename, original, str(out_dir)))
         if status_callback:
@@ -356,12 +712,13 @@ class VideoPreprocessor:
         status_callback, progress_step
     ):
         downscaled = Path(output_dir) / f"downscaled_{Path(original_file).name}"
+        profile = get_detection_profile()
         cmd = [
             get_executable_path("ffmpeg", config.ffmpeg_path),
-            "-threads", "0",
+            *video_decode_args(),
             "-i", original_file,
-            "-vf", f"scale=-2:{config.DOWNSCALE_HEIGHT}:flags=neighbor",
-            "-preset", "ultrafast",
+            "-vf", f"scale=-2:{config.DOWNSCALE_HEIGHT}:flags={profile['scale_flags']}",
+            "-preset", profile['encode_preset'],
             "-vcodec", "libx264", "-crf", "23", "-an",
             str(downscaled),
             "-y"
@@ -394,6 +751,7 @@ class VideoPreprocessor:
             
         if status_callback:
             status_callback(f"Downscaling {len(silence_periods)} silent segments using individual calls")
+        profile = get_detection_profile()
         
         for i, period in enumerate(silence_periods):
             # Define paths and times
@@ -413,10 +771,10 @@ class VideoPreprocessor:
             
             # Build command
             cmd = [
-                get_executable_path("ffmpeg", config.ffmpeg_path), "-threads", "0",
+                get_executable_path("ffmpeg", config.ffmpeg_path), *video_decode_args(),
                 "-ss", str(start_time), "-i", original_file, "-t", str(duration),
-                "-vf", f"scale=-2:{config.DOWNSCALE_HEIGHT}:flags=neighbor",
-                "-preset", "ultrafast", "-vcodec", "libx264", "-crf", "23", "-an",
+                "-vf", f"scale=-2:{config.DOWNSCALE_HEIGHT}:flags={profile['scale_flags']}",
+                "-preset", profile['encode_preset'], "-vcodec", "libx264", "-crf", "23", "-an",
                 str(segment_path), "-y", "-hide_banner", "-loglevel", "error"
             ]
             
@@ -462,86 +820,170 @@ class VideoPreprocessor:
 
 
 class SilenceDetector:
-    def detect(self, input_file, status_callback):
-        sections = FFMpegSilence.detect(input_file, status_callback)
-        return self._merge(sections)
+    def __init__(self):
+        self.cache = get_analysis_cache()
+
+    @staticmethod
+    def cache_params():
+        """Signature of the settings silence periods depend on."""
+        return (f"n={config.DECIBEL_THRESHOLD}:d={config.SILENCE_DURATION}"
+                f":ar={get_detection_profile()['silence_sample_rate']}")
 
-    def _merge(self, sections):
-        if not sections:
+    def detect(self, input_file, status_callback):
+        try:
+            return list(self.stream(input_file, status_callback))
+        except Exception:
+            # Already reported by FFMpegSilence, don't cache a failed scan
             return []
-        sections.sort(key=lambda s: s['start'])
-        merged = [sections[0].copy()]
-        for s in sections[1:]:
-            if s['start'] <= merged[-1]['end']:
-                merged[-1]['end'] = max(s['end'], merged[-1]['end'])
-            else:
-                merged.append(s.copy())
-        return merged
+
+    def stream(self, input_file, status_callback):
+        """
+        Yield merged silence periods of a file as soon as ffmpeg reports them.
+
+        Periods are only cached once the whole file was scanned successfully.
+
+        Raises:
+            Exception: If the silence scan fails part way through.
+        """
+        cached_periods = self.cache.get(input_file, 'silence', self.cache_params())
+        if cached_periods is not None:
+            yield from cached_periods
+            return
+        merged = []
+        for period in self._merge(FFMpegSilence.stream(input_file, status_callback)):
+            merged.append(period)
+            yield period.copy()
+        self.cache.put(input_file, 'silence', merged, self.cache_params())
+
+    @staticmethod
+    def _merge(sections):
+        """Merge overlapping sections of a stream ordered by start time, yielding each when it is final."""
+        current = None
+        for s in sections:
+            if current is not None and s['start'] <= current['end']:
+                current['end'] = max(s['end'], current['end'])
+                continue
+            if current is not None:
+                yield current
+            current = s.copy()
+        if current is not None:
+            yield current
 
 
 class FFMpegSilence:
+    # silencedetect logs "silence_start: 12.3" and "silence_end: 15.6 | silence_duration: 3.3"
+    EVENT_PATTERN = re.compile(r"silence_(start|end): (-?[\d.]+(?:e[-+]?\d+)?)")
+    # Error lines kept for the exception message
+    MAX_ERROR_LINES = 20
+
     @staticmethod
-    def detect(input_file, status_callback=None):
-        if not Path(input_file).is_file():
+    def detect(input_file, status_callback=None, raise_errors=False):
+        try:
+            return list(FFMpegSilence.stream(input_file, status_callback))
+        except Exception:
+            if raise_errors:
+                raise
             return []
+
+    @staticmethod
+    def stream(input_file, status_callback=None):
+        """
+        Yield silence periods while ffmpeg is still scanning the file.
+
+        stderr is read line by line and only silencedetect events and error lines
+        are kept, so memory use doesn't grow with the length of the file.
+
+        Raises:
+            Exception: If ffmpeg can't be run or reports an error. The error is
+                passed to status_callback first.
+        """
+        if not Path(input_file).is_file():
+            return
         try:
-            cmd = [
-                get_executable_path("ffmpeg", config.ffmpeg_path),
-                "-threads", "0",
-                "-i", input_file,
-                "-vn",
-                "-ar", "8000",
-                "-ac", "1",
-                "-af", f"silencedetect=n={config.DECIBEL_THRESHOLD}dB:d={config.SILENCE_DURATION}",
-                "-preset", "ultrafast",
-                "-f", "null",
-                "-"
-            ]
-            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            _, stderr = proc.communicate()
-            proc.terminate()
-            if b"Error" in stderr and status_callback:
-                raise Exception(f"FFmpeg encountered an error while detecting silence: {stderr.decode('utf-8')}")
-            lines = [line.decode('utf-8') for line in stderr.splitlines() if 'silence_' in line.decode('utf-8')]
-            silences = []
-            for i in range(0, len(lines), 2):
-                start = float(lines[i].split()[4])
-                end = None
-                if i+1 < len(lines):
-                    end = float(lines[i+1].split()[4])
-                if end is not None:
-                    silences.append({'start': start, 'end': end})
-                elif status_callback:
-                    status_callback(f"Warning: Missing silence end time for start time {start} in file {input_file}")
-            return silences
+            yield from FFMpegSilence._scan(input_file, status_callback)
         except Exception as e:
             if status_callback:
                 status_callback(f"An error occurred while detecting silence in {input_file}: {str(e)}")
-            return []
+            raise
+
+    @staticmethod
+    def _scan(input_file, status_callback):
+        cmd = [
+            get_executable_path("ffmpeg", config.ffmpeg_path),
+            "-hide_banner",
+            "-nostats",
+            *audio_decode_args(),
+            "-i", input_file,
+            "-vn",
+            "-ar", str(get_detection_profile()['silence_sample_rate']),
+            "-ac", "1",
+            "-af", f"silencedetect=n={config.DECIBEL_THRESHOLD}dB:d={config.SILENCE_DURATION}",
+            "-preset", "ultrafast",
+            "-f", "null",
+            "-"
+        ]
+        process = subprocess.Popen(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            text=True, encoding='utf-8', errors='replace'
+        )
+        errors = []
+        start = None
+        try:
+            for line in process.stderr:
+                match = FFMpegSilence.EVENT_PATTERN.search(line)
+                if match:
+                    kind, value = match.groups()
+                    if kind == 'start':
+                        start = float(value)
+                    elif start is not None:
+                        yield {'start': start, 'end': float(value)}
+                        start = None
+                elif "Error" in line and len(errors) < FFMpegSilence.MAX_ERROR_LINES:
+                    errors.append(line.strip())
+            process.wait()
+        finally:
+            process.stderr.close()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+        if errors:
+            raise Exception(f"FFmpeg encountered an error while detecting silence: {' '.join(errors)}")
+        if start is not None and status_callback:
+            status_callback(f"Warning: Missing silence end time for start time {start} in file {input_file}")
 
 
 class BlackFrameAnalyzer:
+    def __init__(self):
+        # Segments that failed during the last analyze_segments call
+        self.failed_segments = 0
+
+    @staticmethod
+    def cache_params():
+        """Signature of the settings raw black frame timestamps depend on."""
+        return (f"{SilenceDetector.cache_params()}|t={config.BLACK_FRAME_THRESHOLD}"
+                f":r={config.FRAME_RATE}:h={config.DOWNSCALE_HEIGHT}"
+                f":s={get_detection_profile()['scale_flags']}")
+
     def analyze(
         self, video_loader, silence_periods,
         status_callback, progress_step,
         processed_frames, total_frames
     ):
         timestamps = []
-        flat_ts = sorted([t for p in silence_periods for t in (p['start'], p['end'])])
-        if not flat_ts:
+        flat_ts = np.sort([t for p in silence_periods for t in (p['start'], p['end'])])
+        if not len(flat_ts):
             frame_count = video_loader.get_frame_count()
-            for _ in range(frame_count):
-                processed_frames += 1
-                progress_step()
+            processed_frames += frame_count
+            progress_step(frame_count)
             return [], processed_frames
-        for frame in video_loader:
-            frame_time = video_loader.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
-            processed_frames += 1
-            progress_step()
-            idx = bisect_left(flat_ts, frame_time)
-            if idx > 0 and idx % 2 != 0:
-                if np.mean(np.asarray(frame)) < config.BLACK_FRAME_THRESHOLD:
-                    timestamps.append(frame_time)
+        for frame_times, means in self.score_batches(self._timed_frames(video_loader)):
+            processed_frames += len(frame_times)
+            progress_step(len(frame_times))
+            # A frame is inside a silence period when it falls between a start and its end
+            idx = np.searchsorted(flat_ts, frame_times, side='left')
+            in_silence = (idx > 0) & (idx % 2 != 0)
+            timestamps.extend(frame_times[in_silence & (means < config.BLACK_FRAME_THRESHOLD)].tolist())
         return timestamps, processed_frames
     
     def analyze_segments(
@@ -555,7 +997,7 @@ class BlackFrameAnalyzer:
         Args:
             segment_files: List of dicts containing segment file information
             status_callback: Function to report status messages
-            progress_step: Function to increment progress bar
+            progress_step: Function to increment progress bar by a number of frames
             processed_frames: Counter of frames processed so far
             total_frames: Total frames to process (for progress calculation)
             
@@ -563,6 +1005,7 @@ class BlackFrameAnalyzer:
             tuple: (list of detected black frame timestamps, count of processed frames)
         """
         timestamps = []
+        self.failed_segments = 0
         
         if not segment_files:
             if status_callback:
@@ -592,6 +1035,7 @@ class BlackFrameAnalyzer:
                     if status_callback:
                         status_callback(f"Warning: Segment {segment['segment_index']} has no frames, skipping.")
             except Exception as e:
+                self.failed_segments += 1
                 if status_callback:
                     status_callback(f"Error counting frames in segment {segment['segment_index']}: {str(e)}")
         
@@ -616,44 +1060,43 @@ class BlackFrameAnalyzer:
                                f"{segment_frame_count} frames from {segment_start_time:.2f}s to {segment_end_time:.2f}s")
             
             loader = None
+            segment_processed = 0
             try:
                 loader = VideoLoader(segment_path)
                 
-                for frame in loader:
-                    # Get time within the segment
-                    frame_time_in_segment = loader.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
-                    
+                for frame_times, means in self.score_batches(self._timed_frames(loader)):
                     # Calculate actual time in original video
-                    actual_frame_time = segment_start_time + frame_time_in_segment
+                    actual_frame_times = segment_start_time + frame_times
                     
-                    # Verify the timestamp is within expected bounds
-                    if actual_frame_time < segment_start_time or actual_frame_time > segment_end_time:
+                    # Verify the timestamps are within expected bounds
+                    out_of_bounds = (actual_frame_times < segment_start_time) | (actual_frame_times > segment_end_time)
+                    if out_of_bounds.any():
                         if status_callback:
-                            status_callback(f"Warning: Frame timestamp {actual_frame_time:.3f}s outside segment " +
+                            status_callback(f"Warning: {int(out_of_bounds.sum())} frame timestamps outside segment " +
                                           f"bounds ({segment_start_time:.3f}s-{segment_end_time:.3f}s). Adjusting.")
                         # Clamp to ensure we're in range
-                        actual_frame_time = max(segment_start_time, min(actual_frame_time, segment_end_time))
+                        actual_frame_times = np.clip(actual_frame_times, segment_start_time, segment_end_time)
                     
-                    # Check if this is a black frame
-                    if np.mean(np.asarray(frame)) < config.BLACK_FRAME_THRESHOLD:
-                        timestamps.append(actual_frame_time)
+                    # Keep the black frames of this batch
+                    timestamps.extend(actual_frame_times[means < config.BLACK_FRAME_THRESHOLD].tolist())
                     
-                    # Update progress
-                    processed_frames += 1
-                    progress_step()
+                    # Update progress once per batch
+                    segment_processed += len(frame_times)
+                    processed_frames += len(frame_times)
+                    progress_step(len(frame_times))
                     
             except Exception as e:
+                self.failed_segments += 1
                 if status_callback:
                     status_callback(f"Error analyzing segment {i+1}: {str(e)}")
                 
                 # Account for frames we couldn't process for progress bar accuracy
-                remaining_frames = segment_frame_count - (processed_frames - (processed_frames % segment_frame_count))
+                remaining_frames = segment_frame_count - segment_processed
                 if remaining_frames > 0:
                     if status_callback:
                         status_callback(f"Accounting for {remaining_frames} unprocessed frames in progress bar")
-                    for _ in range(remaining_frames):
-                        processed_frames += 1
-                        progress_step()
+                    processed_frames += remaining_frames
+                    progress_step(remaining_frames)
             finally:
                 if loader:
                     loader.release()
@@ -663,6 +1106,212 @@ class BlackFrameAnalyzer:
         
         return timestamps, processed_frames
 
+    @staticmethod
+    def _timed_frames(video_loader):
+        """Yield (timestamp, frame) for every sampled frame of a loader."""
+        for frame in video_loader:
+            yield video_loader.get_timestamp(), frame
+
+    @staticmethod
+    def score_batches(timed_frames, batch_size=None):
+        """
+        Stack frames into contiguous batches and compute their mean brightness together.
+
+        Args:
+            timed_frames: Iterable of (timestamp, frame array) pairs
+            batch_size: Frames per batch, defaults to config.ANALYSIS_BATCH_FRAMES
+
+        Yields:
+            tuple: (frame timestamps, per-frame mean brightness) as NumPy arrays
+        """
+        batch_size = max(1, batch_size or config.ANALYSIS_BATCH_FRAMES)
+        times = np.empty(batch_size, dtype=np.float64)
+        batch = None
+        count = 0
+        for timestamp, frame in timed_frames:
+            if batch is not None and batch.shape[1:] != frame.shape:
+                # Frame size changed mid-stream, flush what we have before reallocating
+                if count:
+                    yield times[:count].copy(), BlackFrameAnalyzer.batch_means(batch, count)
+                    count = 0
+                batch = None
+            if batch is None:
+                batch = np.empty((batch_size,) + frame.shape, dtype=frame.dtype)
+            batch[count] = frame
+            times[count] = timestamp
+            count += 1
+            if count == batch_size:
+                yield times.copy(), BlackFrameAnalyzer.batch_means(batch, count)
+                count = 0
+        if count:
+            yield times[:count].copy(), BlackFrameAnalyzer.batch_means(batch, count)
+
+    @staticmethod
+    def batch_means(batch, count):
+        """Mean brightness of the first count frames of a batch in a single reduction."""
+        return batch[:count].reshape(count, -1).mean(axis=1)
+
+
+class FrameStreamAnalyzer:
+    """
+    Scores black frames in silent periods by streaming downscaled grayscale frames
+    straight from ffmpeg's stdout (-f rawvideo -pix_fmt gray) into NumPy buffers.
+    Nothing is encoded or written to disk and every frame is decoded only once.
+    """
+
+    def __init__(self):
+        # Silent periods that failed during the last analyze_periods call
+        self.failed_segments = 0
+
+    def analyze_periods(
+        self, original_file, silence_periods,
+        status_callback, progress_step_downscale, progress_step_frame,
+        source_info=None
+    ):
+        """
+        Analyze the silent periods of a source video for black frames.
+
+        Args:
+            original_file: Path to the source video
+            silence_periods: List of dicts with 'start' and 'end' times in seconds
+            status_callback: Function to report status messages
+            progress_step_downscale: Function called once per silent period
+            progress_step_frame: Function to increment the frame progress
+            source_info: Optional (fps, width, height) of the source, probed with OpenCV if missing
+
+        Returns:
+            tuple: (list of detected black frame timestamps, count of processed frames)
+        """
+        timestamps = []
+        processed_frames = 0
+        self.failed_segments = 0
+        fps, source_width, source_height = source_info or self._probe_source(original_file)
+        width, height = self._frame_size(source_width, source_height)
+
+        if status_callback:
+            status_callback(f"Streaming {len(silence_periods)} silent segments for black frame analysis")
+
+        for i, period in enumerate(silence_periods):
+            start_time = period['start']
+            end_time = period['end']
+            duration = end_time - start_time
+
+            if duration <= 0:
+                if status_callback:
+                    status_callback(f"Skipping invalid segment {i+1}/{len(silence_periods)} with duration {duration}s")
+                progress_step_downscale()
+                continue
+
+            if status_callback:
+                status_callback(f"Analyzing segment {i+1}/{len(silence_periods)} ({start_time:.2f}s-{end_time:.2f}s)")
+
+            period_frames = 0
+            try:
+                for indices, means in self._stream_batches(original_file, start_time, duration, width, height):
+                    frame_times = np.minimum(start_time + indices / fps, end_time)
+                    timestamps.extend(frame_times[means < config.BLACK_FRAME_THRESHOLD].tolist())
+                    period_frames += len(indices)
+                    progress_step_frame(len(indices))
+            except Exception as e:
+                self.failed_segments += 1
+                if status_callback:
+                    status_callback(f"Error analyzing segment {i+1}: {str(e)}")
+                # Account for frames we couldn't process for progress bar accuracy
+                expected_frames = int(duration * fps / config.FRAME_RATE)
+                progress_step_frame(max(0, expected_frames - period_frames))
+            finally:
+                processed_frames += period_frames
+                progress_step_downscale()
+
+        timestamps.sort()
+        return timestamps, processed_frames
+
+    @staticmethod
+    def _probe_source(original_file):
+        """Return (fps, width, height) of a source video read with OpenCV."""
+        cap = cv2.VideoCapture(str(original_file))
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            source_width = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
+            source_height = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        finally:
+            cap.release()
+        if fps <= 0:
+            raise ValueError(f"Could not read the frame rate of {original_file}")
+        return fps, source_width, source_height
+
+    @staticmethod
+    def _frame_size(source_width, source_height):
+        """Return (width, height) of the downscaled frames for a source frame size."""
+        height = config.DOWNSCALE_HEIGHT
+        if source_width > 0 and source_height > 0:
+            width = int(round(source_width * height / source_height / 2)) * 2
+        else:
+            # Only the mean brightness matters, so assume 16:9 if the size is unknown
+            width = int(round(height * 16 / 9 / 2)) * 2
+        return max(2, width), height
+
+    @staticmethod
+    def _stream_batches(original_file, start_time, duration, width, height):
+        """
+        Yield (source frame indices, mean brightness) for batches of sampled frames.
+
+        Only every config.FRAME_RATE-th frame is selected inside ffmpeg, so skipped
+        frames are never scaled or sent through the pipe. Each read fills a whole
+        batch buffer which is then scored in one reduction.
+        """
+        frame_size = width * height
+        batch_size = max(1, config.ANALYSIS_BATCH_FRAMES)
+        batch = np.empty((batch_size, frame_size), dtype=np.uint8)
+        cmd = [
+            get_executable_path("ffmpeg", config.ffmpeg_path), *video_decode_args(),
+            "-ss", str(start_time), "-i", str(original_file), "-t", str(duration),
+            "-an", "-sn", "-dn",
+            "-vf", f"select=eq(mod(n+1\\,{config.FRAME_RATE})\\,0),"
+                   f"scale={width}:{height}:flags={get_detection_profile()['scale_flags']},format=gray",
+            "-vsync", "passthrough",
+            "-f", "rawvideo", "-pix_fmt", "gray",
+            "-hide_banner", "-loglevel", "error", "-"
+        ]
+        # stderr goes to a file, a pipe nobody reads until the end could fill up and stall ffmpeg
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+            sampled = 0
+            try:
+                while True:
+                    bytes_read = FrameStreamAnalyzer._read_exact(process.stdout, memoryview(batch).cast('B'))
+                    count = bytes_read // frame_size
+                    if count:
+                        indices = (np.arange(sampled, sampled + count) * config.FRAME_RATE) + config.FRAME_RATE - 1
+                        yield indices, BlackFrameAnalyzer.batch_means(batch, count)
+                        sampled += count
+                    if count < batch_size:
+                        break
+                # Frames streamed before ffmpeg failed are no complete analysis of the segment
+                if process.wait() != 0:
+                    stderr.seek(0)
+                    errors = stderr.read().decode('utf-8', errors='replace').strip()
+                    raise RuntimeError(
+                        f"FFmpeg exited with code {process.returncode} after {sampled} sampled frames"
+                        + (f": {errors}" if errors else "")
+                    )
+            finally:
+                process.stdout.close()
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+
+    @staticmethod
+    def _read_exact(stream, view):
+        """Fill view from stream and return the number of bytes read before it ended."""
+        filled = 0
+        while filled < len(view):
+            count = stream.readinto(view[filled:])
+            if not count:
+                break
+            filled += count
+        return filled
+
 
 class TimestampReducer:
     @staticmethod
@@ -698,6 +1347,26 @@ class ResourceCleaner:
                     if status_callback:
                         status_callback(f"Error deleting downscaled file: {e}")
     
+    def clean_orphaned_segments(self, out_dirs, status_callback=None):
+        """
+        Delete temporary downscaled files an interrupted run left in the output directories.
+
+        Args:
+            out_dirs: Output directories of the files about to be processed, not searched recursively
+            status_callback: Function to report status messages
+        """
+        orphans = [orphan for out_dir in out_dirs for orphan in Path(out_dir).glob("downscaled_*.mp4")]
+        if not orphans:
+            return
+        if status_callback:
+            status_callback(f"Removing {len(orphans)} temporary files left by an interrupted run...")
+        for orphan in orphans:
+            try:
+                orphan.unlink()
+            except Exception as e:
+                if status_callback:
+                    status_callback(f"Error deleting leftover file {orphan}: {str(e)}")
+
     def clean_segments(self, segment_files, status_callback=None):
         """
         Delete all segment files after processing.
@@ -0,0 +1,116 @@
+import re
+import threading
+import time
+import config
+
+
+class ThrottledReporter:
+    """
+    Rate-limits the progress and status callbacks handed to ComBreak.
+
+    Progress updates are coalesced to at most config.REPORTING_RATE_HZ calls
+    per second, always keeping the latest value; a finished count (done equal
+    to total) is passed on immediately, and a withheld value is sent by a
+    timer at the end of the interval if no newer update came in by then. Status lines that only differ in their
+    numbers (e.g. "Analyzing segment 3/12") are limited to the same rate,
+    while lines mentioning an error or warning always pass through. flush()
+    sends the latest progress and, if nothing was sent after it, the latest
+    suppressed status line, so the UI ends exactly where the work did.
+    """
+
+    DIGITS = re.compile(r"\d+")
+    # Status line shapes remembered before the oldest are forgotten
+    MAX_STATUS_KEYS = 1024
+
+    def __init__(self, progress_callback=None, status_callback=None, rate=None):
+        self.progress_callback = progress_callback
+        self.status_callback = status_callback
+        self.interval = 1.0 / (rate or config.REPORTING_RATE_HZ)
+        self._lock = threading.Lock()
+        self._last_progress_time = None
+        self._pending_progress = None
+        self._progress_timer = None
+        self._status_times = {}
+        self._pending_status = None
+
+    def callbacks(self):
+        """Return the throttled (progress, status) callbacks, None where no callback was given."""
+        return (
+            self.progress if self.progress_callback else None,
+            self.status if self.status_callback else None
+        )
+
+    def progress(self, done, total):
+        now = time.monotonic()
+        with self._lock:
+            if done < total and self._last_progress_time is not None \
+                    and now - self._last_progress_time < self.interval:
+                self._pending_progress = (done, total)
+                if self._progress_timer is None:
+                    self._progress_timer = threading.Timer(
+                        self.interval - (now - self._last_progress_time), self._send_pending_progress
+                    )
+                    self._progress_timer.daemon = True
+                    self._progress_timer.start()
+                return
+            self._last_progress_time = now
+            self._pending_progress = None
+            self._cancel_progress_timer()
+        self.progress_callback(done, total)
+
+    def _send_pending_progress(self):
+        # Sent while holding the lock, so a newer update can't reach the callback before this one
+        with self._lock:
+            self._progress_timer = None
+            if self._pending_progress is None:
+                return
+            self._last_progress_time = time.monotonic()
+            pending_progress = self._pending_progress
+            self._pending_progress = None
+            self.progress_callback(*pending_progress)
+
+    def _cancel_progress_timer(self):
+        if self._progress_timer is not None:
+            self._progress_timer.cancel()
+            self._progress_timer = None
+
+    def status(self, message):
+        message = str(message)
+        lowered = message.lower()
+        if "error" in lowered or "warning" in lowered:
+            with self._lock:
+                self._pending_status = None
+            self.status_callback(message)
+            return
+        key = self.DIGITS.sub("#", message)
+        now = time.monotonic()
+        with self._lock:
+            last = self._status_times.get(key)
+            if last is not None and now - last < self.interval:
+                self._pending_status = message
+                return
+            if len(self._status_times) >= self.MAX_STATUS_KEYS:
+                self._status_times.clear()
+            self._status_times[key] = now
+            self._pending_status = None
+        self.status_callback(message)
+
+    def reset(self):
+        """Drop progress that is still pending, e.g. when the progress bar is reset."""
+        with self._lock:
+            self._pending_progress = None
+            self._last_progress_time = None
+            self._cancel_progress_timer()
+
+    def flush(self):
+        """Send the pending status line and progress value."""
+        with self._lock:
+            pending_status = self._pending_status
+            pending_progress = self._pending_progress
+            self._pending_status = None
+            self._pending_progress = None
+            self._cancel_progress_timer()
+        if self.status_callback and pending_status is not None:
+            self.status_callback(pending_status)
+        if self.progress_callback and pending_progress is not None:
+            self.progress_callback(*pending_progress)
@@ -1,64 +1,50 @@
-import os
 from pathlib import Path
 import config
+from ComBreak.TimestampStore import get_timestamp_store
 
 class TimestampManager:
     def __init__(self, input_handler):
         self.input_handler = input_handler
+        self.timestamp_store = get_timestamp_store()
 
     # ------------------- Timestamp Cleanup Method -------------------
     def cleanup_timestamps(self, output_path, progress_callback=None, status_callback=None):
         """
-        Clean up timestamp files by applying the reduction logic to remove points that are too close together.
-        This method reads each timestamp file, applies the reduction, and writes back the cleaned-up timestamps.
+        Clean up the stored timestamps by applying the reduction logic to remove points that are too close together.
+        Every entry under the output folders is read at once, and the changed ones are written back in one transaction.
         """
-        # Find all timestamp files
-        timestamp_files = []
+        # Find all stored timestamps
         if self.input_handler.has_input():
-            # Enhanced mode - look for timestamp files in the output folders
-            for input_file in self.input_handler.get_consolidated_paths():
-                output_dir = self.input_handler.get_output_path_for_file(input_file, output_path)
-                if output_dir.exists():
-                    for file in output_dir.glob("*.txt"):
-                        # Exclude specific files like plex_timestamps.txt and failedtocut.txt
-                        if file.name not in ["plex_timestamps.txt", "failedtocut.txt"]:
-                            timestamp_files.append(file)
+            # Enhanced mode - look for timestamps in the output folders
+            output_dirs = dict.fromkeys(
+                self.input_handler.get_output_path_for_file(input_file, output_path)
+                for input_file in self.input_handler.get_consolidated_paths()
+            )
+            entries = [entry for output_dir in output_dirs for entry in self.timestamp_store.entries(output_dir)]
         else:
-            # Legacy folder mode - walk through the output directory
-            for dirpath, _, filenames in os.walk(output_path):
-                for filename in filenames:
-                    # Exclude specific files like plex_timestamps.txt and failedtocut.txt
-                    if filename.endswith('.txt') and filename not in ["plex_timestamps.txt", "failedtocut.txt"]:
-                        timestamp_files.append(Path(dirpath) / filename)
-
-        total_files = len(timestamp_files)
-        if status_callback:
-            status_callback(f"Found {total_files} timestamp files to clean up")
-
-        # Process each timestamp file
-        for i, timestamp_file in enumerate(timestamp_files):
-            try:
-                if status_callback:
-                    status_callback(f"Cleaning timestamp file {i+1} of {total_files}: {timestamp_file.name}")
-
-                # Read the timestamps
-                with open(timestamp_file, "r") as f:
-                    timestamps = [float(line.strip()) for line in f if line.strip()] # Ensure empty lines are skipped
-
-                # Apply the reduction logic
-                reduced_timestamps = self.reduce_timestamps(timestamps)
+            # Legacy folder mode - everything under the output directory
+            entries = self.timestamp_store.entries(output_path)
 
-                # Write back the reduced timestamps
-                with open(timestamp_file, "w") as f:
-                    for timestamp in reduced_timestamps:
-                        f.write(f"{timestamp}\n")
-
-                if progress_callback:
-                    progress_callback(i + 1, total_files)
-
-            except Exception as e:
-                if status_callback:
-                    status_callback(f"Error cleaning timestamp file {timestamp_file.name}: {e}")
+        total_files = len(entries)
+        if status_callback:
+            status_callback(f"Found {total_files} timestamp entries to clean up")
+
+        # Reduce each entry, keeping only the ones that change
+        cleaned = []
+        for i, entry in enumerate(entries):
+            reduced_timestamps = self.reduce_timestamps(entry['break_times'])
+            if reduced_timestamps != entry['break_times']:
+                cleaned.append((entry['prefix'], reduced_timestamps, entry['source'], entry['video']))
+            if progress_callback:
+                progress_callback(i + 1, total_files)
+
+        try:
+            self.timestamp_store.put_many(cleaned)
+            if status_callback and cleaned:
+                status_callback(f"Cleaned timestamps of {len(cleaned)} videos")
+        except Exception as e:
+            if status_callback:
+                status_callback(f"Error saving cleaned timestamps: {e}")
 
     @staticmethod
     def reduce_timestamps(timestamps):
@@ -126,9 +112,9 @@ class TimestampManager:
                         status_callback(f"Error reading {plex_file_path}: {e}")
                     continue # Skip this plex file if error reading
 
-                # Check each file currently in the unprocessed manager against the plex data
-                # Iterate over a copy of the list as we might modify it
-                for video_file in list(unprocessed_files_manager.get_files()):
+                # Check the unprocessed files of this directory against the plex data
+                # Matches are taken up front, so removing files while iterating is safe
+                for video_file in unprocessed_files_manager.iter_files(dirpath=base_path_str):
                     original_file, dirpath, filename = video_file.values()
 
                     # Only process files that belong to the current directory being checked
@@ -140,12 +126,12 @@ class TimestampManager:
                             output_dir = self.input_handler.get_output_path_for_file(original_file, output_path)
                             output_dir.mkdir(parents=True, exist_ok=True)
 
-                            timestamp_file_path = output_dir / f"{filename}.txt"
-                            with open(timestamp_file_path, "w") as output_file:
-                                output_file.write(plex_data[filename] + "\n")
+                            self.timestamp_store.put(
+                                output_dir / filename, [float(plex_data[filename])], 'plex', original_file
+                            )
 
                             if status_callback:
-                                status_callback(f"Found Plex timestamp for {filename}, wrote to {timestamp_file_path}")
+                                status_callback(f"Found Plex timestamp for {filename}, stored for {output_dir / filename}")
 
                             # Remove from unprocessed manager
                             unprocessed_files_manager.remove_file(str(original_file), str(dirpath), filename)
@@ -177,8 +163,8 @@ class TimestampManager:
                     status_callback(f"Error reading {plex_file_path}: {e}")
                 return # Stop if error reading the main plex file
 
-            # Iterate over a copy of the list as we might modify it
-            for video_file in list(unprocessed_files_manager.get_files()):
+            # Matches are taken up front, so removing files while iterating is safe
+            for video_file in unprocessed_files_manager.iter_files():
                 original_file, dirpath, filename = video_file.values()
 
                 if filename in plex_data:
@@ -186,12 +172,12 @@ class TimestampManager:
                         output_dir = Path(output_path) / Path(dirpath).relative_to(input_path)
                         output_dir.mkdir(parents=True, exist_ok=True)
 
-                        timestamp_file_path = output_dir / f"{filename}.txt"
-                        with open(timestamp_file_path, "w") as output_file:
-                            output_file.write(plex_data[filename] + "\n")
+                        self.timestamp_store.put(
+                            output_dir / filename, [float(plex_data[filename])], 'plex', original_file
+                        )
 
                         if status_callback:
-                            status_callback(f"Found Plex timestamp for {filename}, wrote to {timestamp_file_path}")
+                            status_callback(f"Found Plex timestamp for {filename}, stored for {output_dir / filename}")
 
                         # Remove from unprocessed manager
                         unprocessed_files_manager.remove_file(str(original_file), str(dirpath), filename)
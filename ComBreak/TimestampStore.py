@@ -0,0 +1,230 @@
+import os
+import threading
+import time
+from pathlib import Path
+import numpy as np
+import config
+from API.utils import get_db_manager
+
+
+class TimestampStore:
+    """
+    Commercial break times of every video, kept in one table of the application database.
+
+    Entries are keyed by the video's output file prefix (the output directory
+    joined with the video's file name), the same path the per-episode .txt
+    files used to be named after. Break times are stored as a float64 blob
+    together with where they came from: 'chapter', 'plex', 'detected' or
+    'manual' for times imported from a hand edited .txt file.
+
+    With TIMESTAMP_EXPORT_TXT enabled every entry is also written to
+    `<prefix>.txt`, and import_txt() picks up .txt files edited after their
+    entry was stored, so tools working on the text files keep working.
+    """
+
+    TABLE_NAME = 'combreak_timestamps'
+    SOURCES = ('chapter', 'plex', 'detected', 'manual')
+    # Text files in the output directory that aren't per-episode timestamps
+    IGNORED_TXT_FILES = ('plex_timestamps.txt', 'failedtocut.txt')
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """Singleton pattern so every ComBreak component shares one store."""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(TimestampStore, cls).__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self.db_manager = get_db_manager()
+        self._table_ready = False
+        self._initialized = True
+
+    def get(self, prefix):
+        """Return the break times of a video as a list of seconds, or None if it has no entry."""
+        entry = self.get_entry(prefix)
+        return entry['break_times'] if entry else None
+
+    def get_entry(self, prefix):
+        """
+        Return the entry of a video, or None if it has none.
+
+        Returns:
+            dict: {'prefix', 'video', 'break_times', 'source', 'updated_at'}
+        """
+        self._ensure_table()
+        row = self.db_manager.fetchone(
+            f"SELECT * FROM {self.TABLE_NAME} WHERE prefix = ?", (self._key(prefix),)
+        )
+        return self._entry(row) if row else None
+
+    def has(self, prefix):
+        self._ensure_table()
+        row = self.db_manager.fetchone(
+            f"SELECT 1 FROM {self.TABLE_NAME} WHERE prefix = ?", (self._key(prefix),)
+        )
+        return row is not None
+
+    def entries(self, directory):
+        """Return the entries of every video whose output prefix lies under a directory, ordered by prefix."""
+        self._ensure_table()
+        low, high = self._range(directory)
+        rows = self.db_manager.fetchall(
+            f"SELECT * FROM {self.TABLE_NAME} WHERE prefix > ? AND prefix < ? ORDER BY prefix",
+            (low, high)
+        )
+        return [self._entry(row) for row in rows]
+
+    def put(self, prefix, break_times, source, video=None):
+        """
+        Store the break times of a video, replacing any earlier entry.
+
+        Args:
+            prefix: Output file prefix of the video
+            break_times: Break times in seconds
+            source: One of SOURCES
+            video: Path of the original video, if known
+        """
+        self.put_many([(prefix, break_times, source, video)])
+
+    def put_many(self, entries):
+        """Store several (prefix, break_times, source, video) entries in one transaction."""
+        rows = []
+        for prefix, break_times, source, video in entries:
+            if source not in self.SOURCES:
+                raise ValueError(f"Unknown timestamp source '{source}'")
+            if config.TIMESTAMP_EXPORT_TXT:
+                self._write_txt(prefix, break_times)
+            rows.append(self._row(prefix, break_times, source, video))
+        self._insert(rows)
+
+    def delete_under(self, directory):
+        """Remove the entries of every video under a directory."""
+        self._ensure_table()
+        low, high = self._range(directory)
+        self.db_manager.execute(
+            f"DELETE FROM {self.TABLE_NAME} WHERE prefix > ? AND prefix < ?", (low, high)
+        )
+
+    def clear(self):
+        """Remove every stored entry."""
+        self._ensure_table()
+        self.db_manager.execute(f"DELETE FROM {self.TABLE_NAME}")
+
+    def export_txt(self, directory):
+        """
+        Write `<prefix>.txt` for every entry under a directory, in the one-time-per-line format.
+
+        Returns:
+            int: Number of files written
+        """
+        entries = self.entries(directory)
+        for entry in entries:
+            self._write_txt(entry['prefix'], entry['break_times'])
+        # Date the entries after their files, so import_txt() doesn't take the files back as edits
+        low, high = self._range(directory)
+        self.db_manager.execute(
+            f"UPDATE {self.TABLE_NAME} SET updated_at = ? WHERE prefix > ? AND prefix < ?",
+            (time.time(), low, high)
+        )
+        return len(entries)
+
+    def import_txt(self, directory, status_callback=None):
+        """
+        Store the times of .txt files under a directory that are newer than their entry.
+
+        This picks up timestamp files from older versions and files edited by
+        hand, such as with the ManualTimestampEditor.
+
+        Returns:
+            int: Number of files imported
+        """
+        updated = {entry['prefix']: entry['updated_at'] for entry in self.entries(directory)}
+        imported = []
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if not filename.endswith('.txt') or filename in self.IGNORED_TXT_FILES:
+                    continue
+                txt_file = Path(dirpath) / filename
+                prefix = self._key(txt_file.with_suffix(''))
+                try:
+                    if prefix in updated and txt_file.stat().st_mtime <= updated[prefix]:
+                        continue
+                    with open(txt_file, "r") as f:
+                        break_times = [float(line.strip()) for line in f if line.strip()]
+                except (OSError, ValueError) as e:
+                    if status_callback:
+                        status_callback(f"Error importing timestamp file {txt_file}: {e}")
+                    continue
+                imported.append(self._row(prefix, break_times, 'manual'))
+        # The text files are the newer copy, so they aren't written back
+        self._insert(imported)
+        if imported and status_callback:
+            status_callback(f"Imported {len(imported)} timestamp files")
+        return len(imported)
+
+    def _row(self, prefix, break_times, source, video=None):
+        return (
+            self._key(prefix), str(video) if video is not None else None,
+            np.asarray(break_times, dtype=np.float64).tobytes(), source, time.time()
+        )
+
+    def _insert(self, rows):
+        if not rows:
+            return
+        self._ensure_table()
+        with self.db_manager.transaction() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.TABLE_NAME} "
+                "(prefix, video, break_times, source, updated_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def _ensure_table(self):
+        if self._table_ready:
+            return
+        self.db_manager.create_table(self.TABLE_NAME, """
+            prefix TEXT PRIMARY KEY,
+            video TEXT,
+            break_times BLOB NOT NULL,
+            source TEXT NOT NULL,
+            updated_at REAL
+        """)
+        self._table_ready = True
+
+    @staticmethod
+    def _key(prefix):
+        return os.path.abspath(str(prefix))
+
+    @classmethod
+    def _range(cls, directory):
+        """Return the exclusive key bounds of every prefix below a directory."""
+        base = cls._key(directory).rstrip(os.sep) + os.sep
+        return base, base[:-1] + chr(ord(os.sep) + 1)
+
+    @staticmethod
+    def _entry(row):
+        return {
+            'prefix': row['prefix'],
+            'video': row['video'],
+            'break_times': np.frombuffer(row['break_times'], dtype=np.float64).tolist(),
+            'source': row['source'],
+            'updated_at': row['updated_at'],
+        }
+
+    @staticmethod
+    def _write_txt(prefix, break_times):
+        Path(prefix).parent.mkdir(parents=True, exist_ok=True)
+        with open(f"{prefix}.txt", "w") as f:
+            f.writelines(f"{t}\n" for t in break_times)
+
+
+def get_timestamp_store():
+    """Get the singleton TimestampStore instance."""
+    return TimestampStore()
@@ -0,0 +1,321 @@
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+import psutil
+import config
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Audit events can't be removed again, so one hook counts the spawns of the whole process.
+# It is only installed once the first span is measured, importing this module hooks nothing.
+_spawn_lock = threading.Lock()
+_spawns = [0]
+_spawn_hook_installed = False
+
+
+def _count_spawn(event, args):
+    if event == "subprocess.Popen":
+        with _spawn_lock:
+            _spawns[0] += 1
+
+
+def _install_spawn_hook():
+    global _spawn_hook_installed
+    with _spawn_lock:
+        if not _spawn_hook_installed:
+            sys.addaudithook(_count_spawn)
+            _spawn_hook_installed = True
+
+
+_process = psutil.Process()
+
+
+def _usage():
+    """Snapshot of this process's cumulative resource counters."""
+    times = os.times()
+    usage = {
+        'cpu': times.user + times.system,
+        # Only children that were waited for are counted, which subprocess.run and communicate do
+        'child_cpu': times.children_user + times.children_system,
+        'spawns': _spawns[0],
+        'read_bytes': 0,
+        'write_bytes': 0,
+        'child_read_bytes': 0,
+        'child_write_bytes': 0,
+    }
+    try:
+        io = _process.io_counters()
+        # The *_chars counters include reads from network shares, which the block counters miss
+        usage['read_bytes'] = getattr(io, 'read_chars', io.read_bytes)
+        usage['write_bytes'] = getattr(io, 'write_chars', io.write_bytes)
+    except (AttributeError, psutil.Error):
+        pass # Not available on this platform
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        usage['child_read_bytes'] = children.ru_inblock * 512
+        usage['child_write_bytes'] = children.ru_oublock * 512
+    return usage
+
+
+class Span:
+    """
+    Resource usage of one stage or file, measured from creation until finish().
+
+    Counters are process wide, so spans running at the same time in other
+    threads of the process overlap. Spans can be measured in any process;
+    worker processes send the finished record to the parent to be traced.
+    """
+
+    def __init__(self, name, file=None):
+        _install_spawn_hook()
+        self.name = name
+        self.file = str(file) if file is not None else None
+        self.counters = {}
+        self.start = time.time()
+        self._wall_start = time.perf_counter()
+        self._usage_start = _usage()
+
+    def add(self, **counters):
+        """Add to counters reported with the span, such as frames=120."""
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def finish(self, error=None):
+        """Return the span's record with the usage since it was created."""
+        usage_end = _usage()
+        record = {
+            'name': self.name,
+            'file': self.file,
+            'pid': os.getpid(),
+            'thread': threading.current_thread().name,
+            'start': self.start,
+            'wall': time.perf_counter() - self._wall_start,
+        }
+        for key, value in usage_end.items():
+            record[key] = value - self._usage_start[key]
+        record.update(self.counters)
+        if error is not None:
+            record['error'] = type(error).__name__
+        return record
+
+
+class _NullSpan:
+    """Stands in for a span when no run is traced."""
+
+    def add(self, **counters):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Records per-stage and per-file spans of ComBreak runs in a JSON-lines trace.
+
+    A run (detect_commercials or cut_videos) opens `config.TRACE_FILE` and
+    every span finished until the run ends is appended as one line, tagged
+    with the run's id. Each span holds wall time, CPU time of this process
+    and of the subprocesses it waited for (ffmpeg, ffprobe), the number of
+    spawned subprocesses, bytes read and written by this process and, where
+    the platform reports it, by its subprocesses, and counters such as
+    frames. When the run ends the spans are summed up per name, written as a
+    summary line and reported through the status callback. Outside a run,
+    span() costs nothing.
+    """
+
+    # The trace is moved aside to <TRACE_FILE>.1 when a run starts with it larger than this
+    MAX_TRACE_BYTES = 10 * 1024 * 1024
+    # Descriptive fields of a span record, every other number in it is summed per span name
+    FIELDS = ('run', 'span', 'parent', 'name', 'file', 'pid', 'thread', 'start', 'error')
+    COUNTERS = (
+        'wall', 'cpu', 'child_cpu', 'spawns',
+        'read_bytes', 'write_bytes', 'child_read_bytes', 'child_write_bytes'
+    )
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """Singleton pattern so every ComBreak component traces into the same run."""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(Tracer, cls).__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._run_id = None
+        self._root_id = None
+        self._file = None
+        self._totals = {}
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._initialized = True
+
+    @property
+    def enabled(self):
+        return config.TRACE_ENABLED
+
+    @property
+    def active(self):
+        return self._run_id is not None
+
+    @contextmanager
+    def run(self, name, status_callback=None):
+        """
+        Trace a run, reporting its summary through status_callback when it ends.
+
+        Inside an already traced run this is an ordinary span.
+        """
+        owner = self.enabled and not self.active and self._open(status_callback)
+        try:
+            with self.span(name) as span:
+                yield span
+        finally:
+            if owner:
+                self._close(status_callback)
+
+    @contextmanager
+    def span(self, name, file=None):
+        """Measure the enclosed block as a span, nested under the span open in this thread."""
+        if not self.active:
+            yield _NULL_SPAN
+            return
+        stack = self._stack()
+        span_id = next(self._ids)
+        parent_id = stack[-1] if stack else self._root_id
+        if self._root_id is None:
+            self._root_id = span_id
+        span = Span(name, file)
+        stack.append(span_id)
+        try:
+            yield span
+        except BaseException as e:
+            self.emit(span.finish(e), span_id, parent_id)
+            raise
+        else:
+            self.emit(span.finish(), span_id, parent_id)
+        finally:
+            stack.pop()
+
+    def emit(self, record, span_id=None, parent_id=None):
+        """
+        Add a finished span record to the trace of the current run.
+
+        Records measured in worker processes come in through here without ids,
+        and are placed under the run's root span. Ignored outside a run.
+        """
+        if not self.active:
+            return
+        record = {
+            'run': self._run_id,
+            'span': span_id if span_id is not None else next(self._ids),
+            'parent': parent_id if span_id is not None else self._root_id,
+            **record
+        }
+        line = json.dumps(record)
+        with self._write_lock:
+            if self._file is None:
+                return
+            self._file.write(line + "\n")
+            totals = self._totals.setdefault(record['name'], {'count': 0, 'first': record['start']})
+            totals['count'] += 1
+            totals['first'] = min(totals['first'], record['start'])
+            for key, value in record.items():
+                if key not in self.FIELDS and isinstance(value, (int, float)):
+                    totals[key] = totals.get(key, 0) + value
+
+    def summary(self):
+        """Return one line per span name with the summed usage of the current run."""
+        with self._write_lock:
+            totals = sorted(self._totals.items(), key=lambda item: item[1]['first'])
+        return [self._summary_line(name, stage) for name, stage in totals]
+
+    def _open(self, status_callback):
+        path = config.TRACE_FILE
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if os.path.exists(path) and os.path.getsize(path) > self.MAX_TRACE_BYTES:
+                os.replace(path, f"{path}.1")
+            trace_file = open(path, "a", buffering=1, encoding="utf-8")
+        except OSError as e:
+            if status_callback:
+                status_callback(f"Warning: Could not open trace file {path}: {e}")
+            return False
+        with self._write_lock:
+            self._file = trace_file
+            self._totals = {}
+        self._root_id = None
+        self._run_id = uuid.uuid4().hex
+        return True
+
+    def _close(self, status_callback):
+        lines = self.summary()
+        with self._write_lock:
+            summary = {
+                name: {key: value for key, value in stage.items() if key != 'first'}
+                for name, stage in self._totals.items()
+            }
+            self._file.write(json.dumps({'run': self._run_id, 'summary': summary}) + "\n")
+            self._file.close()
+            self._file = None
+        self._run_id = None
+        self._root_id = None
+        if status_callback:
+            for line in lines:
+                status_callback(line)
+            status_callback(f"Trace written to {config.TRACE_FILE}")
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @staticmethod
+    def _summary_line(name, stage):
+        parts = [
+            f"{stage['count']} spans",
+            f"{stage.get('wall', 0):.1f}s wall",
+            f"{stage.get('cpu', 0):.1f}s Python CPU",
+            f"{stage.get('child_cpu', 0):.1f}s subprocess CPU",
+            f"{stage.get('spawns', 0)} subprocesses",
+            f"{Tracer._format_bytes(stage.get('read_bytes', 0))} read",
+            f"{Tracer._format_bytes(stage.get('write_bytes', 0))} written",
+        ]
+        if stage.get('child_read_bytes') or stage.get('child_write_bytes'):
+            parts.append(
+                f"{Tracer._format_bytes(stage['child_read_bytes'])} read and "
+                f"{Tracer._format_bytes(stage['child_write_bytes'])} written by subprocesses"
+            )
+        for key, value in stage.items():
+            if key not in Tracer.COUNTERS and key not in ('count', 'first'):
+                parts.append(f"{value} {key}")
+        return f"Trace {name}: " + ", ".join(parts)
+
+    @staticmethod
+    def _format_bytes(count):
+        for unit in ('B', 'KB', 'MB', 'GB'):
+            if abs(count) < 1024:
+                return f"{count:.0f} {unit}" if unit == 'B' else f"{count:.1f} {unit}"
+            count /= 1024
+        return f"{count:.1f} TB"
+
+
+def get_tracer():
+    """Get the singleton Tracer instance."""
+    return Tracer()
@@ -1,19 +1,30 @@
 import os
 from pathlib import Path
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import config
-from ComBreak.utils import get_executable_path
+from ComBreak.utils import get_executable_path, get_thread_count, limit_workers
+from ComBreak.MediaProbe import MediaProbe
+from ComBreak.KeyframeIndex import KeyframeIndex
+from ComBreak.TimestampStore import get_timestamp_store
+from ComBreak.DetectionJournal import get_detection_journal
+from ComBreak.Tracer import get_tracer
 
 class VideoCutter:
     def __init__(self, input_handler, virtual_cut):
         self.input_handler = input_handler
         self.virtual_cut = virtual_cut
         self.video_durations = {}
+        self.timestamp_store = get_timestamp_store()
 
     # ------------------ Cutting Videos Methods ------------------
     @staticmethod
     def delete_files(output_path):
-        """Delete .txt files in the specified directory and its subdirectories."""
+        """Delete the stored timestamps and .txt files in the specified directory and its subdirectories."""
+        get_timestamp_store().delete_under(output_path)
+        # Journaled results of unfinished runs would otherwise bring back deleted timestamps
+        get_detection_journal().clear()
         for dirpath, dirnames, filenames in os.walk(output_path):
             for filename in filenames:
                 if filename.endswith('.txt'):
@@ -53,6 +64,11 @@ class VideoCutter:
             f.rename(output_path / new_name)
 
     def cut_videos(self, input_path, output_path, progress_callback=None, status_callback=None, destructive_mode=False, cutless_mode=False):
+        # Pick up timestamp files from older versions or edited by hand
+        tracer = get_tracer()
+        with tracer.span('import_txt'):
+            self.timestamp_store.import_txt(output_path, status_callback)
+
         # Handle both legacy folder mode and enhanced input mode
         if self.input_handler.has_input():
             # Enhanced mode with files and/or folders
@@ -62,48 +78,147 @@ class VideoCutter:
             video_files_data, output_dirs, total_videos = self.gather_video_files_to_cut(input_path, output_path)
 
         if cutless_mode:
+            if config.CUT_MODE == "copy":
+                # Virtual parts start and end where stream-copied parts would
+                self.snap_timestamp_files(video_files_data, status_callback)
             if status_callback:
                 status_callback("Cutless Mode Enabled: Generating virtual cut data...")
-            self.virtual_cut.generate_virtual_prep_data(video_files_data, total_videos, progress_callback, status_callback)
+            with tracer.span('virtual_cut'):
+                self.virtual_cut.generate_virtual_prep_data(video_files_data, total_videos, progress_callback, status_callback)
             if status_callback:
                 status_callback("Virtual cut data generation complete.")
             # No renaming needed in cutless mode as files aren't created
             return # Exit early as no physical cutting or renaming is done
 
         failed_videos = []
+        # Read every duration up front with concurrent ffprobe calls
+        MediaProbe().probe_files(
+            [input_file for input_file, _ in video_files_data if Path(input_file).exists()],
+            status_callback
+        )
 
-        for i, (input_file, output_file_prefix) in enumerate(video_files_data):
-            try:
-                if status_callback:
-                    status_callback(f"Cutting video {i+1} of {total_videos}")
-
+        workers = min(limit_workers(config.CUT_WORKERS), max(1, total_videos))
+        if status_callback:
+            status_callback(f"Cutting {total_videos} videos with {workers} parallel workers")
+        device_slots = {}
+        completed = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for i, (input_file, output_file_prefix) in enumerate(video_files_data):
                 if not Path(input_file).exists():
-                    failed_videos.append(input_file)
+                    failed_videos.append((i, input_file))
+                    completed += 1
                     continue
+                slots = self._device_slots(device_slots, input_file, output_file_prefix)
+                future = pool.submit(self._cut_file, input_file, output_file_prefix, destructive_mode, slots)
+                futures[future] = (i, input_file)
 
-                with open(f"{output_file_prefix}.txt", "r") as f:
-                    timestamps = [float(line.strip()) for line in f]
-                # Timestamps are already reduced during detection, no need to reduce again
-
-                end_time = self.get_video_duration(input_file)
-                self.cut_single_video(input_file, output_file_prefix, end_time, timestamps, destructive_mode)
-
+            # Results are collected here so callbacks are only made from this thread
+            for future in as_completed(futures):
+                completed += 1
+                try:
+                    problems = future.result()
+                    if status_callback:
+                        for problem in problems:
+                            status_callback(f"Warning: {Path(futures[future][1]).name}: {problem}")
+                        status_callback(f"Cut video {completed} of {total_videos}: {Path(futures[future][1]).name}")
+                except Exception as e:
+                    if status_callback:
+                        status_callback(f"Error cutting video: {e}")
+                    failed_videos.append(futures[future])
                 if progress_callback:
-                    progress_callback(i + 1, total_videos)
-            except Exception as e:
-                if status_callback:
-                    status_callback(f"Error cutting video: {e}")
-                failed_videos.append(input_file)
+                    progress_callback(completed, total_videos)
 
         if failed_videos:
             # Write failed videos to a file in the output directory instead of input directory
             with open(Path(output_path, "failedtocut.txt"), "w") as f:
-                for video in failed_videos:
+                for _, video in sorted(failed_videos):
                     f.write(str(video) + "\n")
 
         for output_dir in output_dirs:
             self.rename_files(output_dir)
 
+    def _cut_file(self, input_file, output_file_prefix, destructive_mode, device_slots):
+        """
+        Cut one video while holding a slot on every storage device it reads from or writes to.
+
+        Returns:
+            list: Problems found when validating the cut points against the keyframe index
+        """
+        for slot in device_slots:
+            slot.acquire()
+        # The span starts once the slots are held, so time spent queueing for a device isn't counted
+        try:
+            with get_tracer().span('cut', input_file) as span:
+                if config.CUT_MODE == "copy":
+                    timestamps = self.snap_timestamp_file(input_file, output_file_prefix)
+                else:
+                    timestamps = self.timestamp_store.get(output_file_prefix)
+                # Timestamps are already reduced during detection, no need to reduce again
+
+                end_time = self.get_video_duration(input_file)
+                problems = []
+                # Re-encoded cuts are exact, only stream copies depend on where the keyframes are
+                if config.VALIDATE_CUT_POINTS and config.CUT_MODE == "copy":
+                    problems = KeyframeIndex.for_file(input_file).cut_problems(timestamps, end_time)
+                self.cut_single_video(input_file, output_file_prefix, end_time, timestamps, destructive_mode)
+                # cut_single_video appended the end time, so there is one part per timestamp
+                span.add(parts=len(timestamps))
+                return problems
+        finally:
+            for slot in reversed(device_slots):
+                slot.release()
+
+    @staticmethod
+    def _device_slots(slots_by_device, *paths):
+        """
+        Return the semaphores limiting concurrent cuts on the devices holding the given paths.
+
+        Semaphores are always returned in device order, so cuts spanning two
+        devices acquire them in the same order and can't deadlock.
+        """
+        if config.CUT_WORKERS_PER_DEVICE <= 0:
+            return []
+        devices = set()
+        for path in paths:
+            try:
+                devices.add(os.stat(Path(path).parent).st_dev)
+            except OSError:
+                continue
+        return [
+            slots_by_device.setdefault(device, threading.Semaphore(config.CUT_WORKERS_PER_DEVICE))
+            for device in sorted(devices)
+        ]
+
+    def snap_timestamp_files(self, video_files_data, status_callback=None):
+        """Snap the stored timestamps of every (input_file, output_file_prefix) pair to keyframes."""
+        if status_callback:
+            status_callback(f"Moving breaks of {len(video_files_data)} videos to the nearest keyframes")
+        for input_file, output_file_prefix in video_files_data:
+            if not Path(input_file).exists():
+                continue
+            try:
+                self.snap_timestamp_file(input_file, output_file_prefix)
+            except Exception as e:
+                if status_callback:
+                    status_callback(f"Error moving breaks of {input_file} to keyframes: {e}")
+
+    def snap_timestamp_file(self, input_file, output_file_prefix):
+        """
+        Move the stored breaks of a video to the nearest video keyframes and store them back.
+
+        Returns:
+            list: The snapped break timestamps
+        """
+        entry = self.timestamp_store.get_entry(output_file_prefix)
+        if entry is None:
+            raise FileNotFoundError(f"No timestamps stored for {output_file_prefix}")
+        timestamps = entry['break_times']
+        snapped = KeyframeIndex.for_file(input_file).snap(timestamps)
+        if snapped != timestamps:
+            self.timestamp_store.put(output_file_prefix, snapped, entry['source'], input_file)
+        return snapped
+
     def gather_video_files_to_cut_enhanced(self, output_path):
         """
         Gather video files to cut using the enhanced input handler.
@@ -124,11 +239,10 @@ class VideoCutter:
             output_dir = self.input_handler.get_output_path_for_file(input_file, output_path)
             output_dir.mkdir(parents=True, exist_ok=True)
 
-            # Check if a timestamp file exists for this video
-            timestamp_file = output_dir / f"{filename}.txt"
-            if timestamp_file.exists():
-                output_file_prefix = str(output_dir / filename.replace('.txt', ''))
-                video_files_data.append((str(input_file_path), output_file_prefix))
+            # Check if timestamps are stored for this video
+            output_file_prefix = output_dir / filename
+            if self.timestamp_store.has(output_file_prefix):
+                video_files_data.append((str(input_file_path), str(output_file_prefix)))
                 output_dirs.add(str(output_dir))
 
         total_videos = len(video_files_data)
@@ -137,21 +251,15 @@ class VideoCutter:
     def gather_video_files_to_cut(self, input_path, output_path):
         video_files_data = []
         output_dirs = set()
-        total_videos = 0
 
-        for dirpath, dirnames, filenames in os.walk(output_path):
-            for filename in filenames:
-                if filename.endswith('.txt'):
-                    total_videos += 1
-                    output_file_prefix = Path(dirpath) / Path(filename).stem
-                    relative_path = Path(dirpath).relative_to(output_path)
-                    input_dir = Path(input_path) / relative_path
-                    video_filename = filename.replace('.txt', '')
-                    input_file = input_dir / video_filename
-                    video_files_data.append((str(input_file), str(output_file_prefix)))
-                    output_dirs.add(str(dirpath))
+        for entry in self.timestamp_store.entries(output_path):
+            output_file_prefix = Path(entry['prefix'])
+            relative_path = output_file_prefix.parent.relative_to(os.path.abspath(output_path))
+            input_file = Path(input_path) / relative_path / output_file_prefix.name
+            video_files_data.append((str(input_file), str(output_file_prefix)))
+            output_dirs.add(str(output_file_prefix.parent))
 
-        return video_files_data, output_dirs, total_videos
+        return video_files_data, output_dirs, len(video_files_data)
 
     def cut_single_video(self, input_file, output_file_prefix, end_time, timestamps, destructive_mode):
         timestamps.append(end_time)
@@ -161,6 +269,16 @@ class VideoCutter:
         output_file_name_without_ext = output_file_prefix_path.stem
         output_dir = output_file_prefix_path.parent
 
+        if config.CUT_MODE == "copy":
+            # Breaks sit exactly on keyframes, so split there even if the printed time rounds up
+            fps = MediaProbe().get_fps(input_file)
+            codec_options = ["-segment_time_delta", str(0.5 / fps if fps else 0.01), "-c", "copy"]
+        else:
+            codec_options = [
+                "-c:v", "copy",  # Copy the video codec
+                "-c:a", "aac",   # Explicitly set the audio codec to AAC
+            ]
+
         command = [
             get_executable_path("ffmpeg", config.ffmpeg_path),
             "-i", str(input_file),
@@ -169,18 +287,17 @@ class VideoCutter:
             "-loglevel", "quiet",  # Suppress FFmpeg output
             "-segment_times", times_str,
             "-reset_timestamps", "1",
-            "-c:v", "copy",  # Copy the video codec
-            "-c:a", "aac",   # Explicitly set the audio codec to AAC
-            "-threads", "0",
+            *codec_options,
+            "-threads", str(get_thread_count()),
             f"{str(output_dir / output_file_name_without_ext)} - Part %03d.mp4"
         ]
 
-        # Start the FFmpeg process
-        process = subprocess.Popen(command)
+        # Start the FFmpeg process, without stdin so concurrent cuts don't share the console
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL)
         # Wait for process to complete
-        process.communicate()
-        # Explicitly terminate the FFmpeg process
-        process.terminate()
+        if process.wait() != 0:
+            # Keep the original, even in destructive mode, and report the file as failed
+            raise RuntimeError(f"FFmpeg exited with code {process.returncode} while cutting {input_file}")
 
         if destructive_mode:
             Path(input_file).unlink()
@@ -188,14 +305,9 @@ class VideoCutter:
     def get_video_duration(self, input_file):
         end_time = self.video_durations.get(input_file, None)
         if end_time is None:
-            command = [
-                get_executable_path("ffprobe", config.ffprobe_path),
-                '-v', 'error',
-                '-show_entries', 'format=duration',
-                '-of', 'default=noprint_wrappers=1:nokey=1',
-                input_file
-            ]
-            result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-            end_time = float(result.stdout)
+            # Durations come from the shared metadata record, probed once per file
+            end_time = MediaProbe().get_duration(input_file)
+            if end_time is None:
+                raise ValueError(f"Could not read the duration of {input_file}")
             self.video_durations[input_file] = end_time
         return end_time
@@ -4,35 +4,85 @@ VideoFile = namedtuple('VideoFile', ['original_file', 'dirpath', 'filename'])
 
 
 class VideoFilesManager:
+    """
+    Singleton set of the video files that still need processing.
+
+    Files are kept in insertion order and indexed by original_file, by
+    (dirpath, filename) and by dirpath, so adding, removing and looking up a
+    file take constant time however many files are tracked.
+    """
+
     _instance = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(VideoFilesManager, cls).__new__(cls)
-            cls._instance.video_files = []
+            # Dicts with None values serve as insertion-ordered sets
+            cls._instance.video_files = {}
+            cls._instance._by_original = {}
+            cls._instance._by_location = {}
+            cls._instance._by_dirpath = {}
         return cls._instance
 
     def add_file(self, original_file, dirpath, filename):
         """Add a file to the manager, but only if it isn't already present."""
-        if any(f.original_file == original_file and f.dirpath == dirpath and f.filename == filename 
-               for f in self.video_files):
-            return
         video_file = VideoFile(original_file, dirpath, filename)
-        self.video_files.append(video_file)
+        if video_file in self.video_files:
+            return
+        self.video_files[video_file] = None
+        self._by_original.setdefault(original_file, {})[video_file] = None
+        self._by_location.setdefault((dirpath, filename), {})[video_file] = None
+        self._by_dirpath.setdefault(dirpath, {})[video_file] = None
 
     def remove_file(self, original_file, dirpath, filename):
-        file_to_remove = next((file for file in self.video_files if
-                               file.original_file == original_file and
-                               file.dirpath == dirpath and
-                               file.filename == filename), None)
-        if file_to_remove:
-            self.video_files.remove(file_to_remove)
+        video_file = VideoFile(original_file, dirpath, filename)
+        if video_file not in self.video_files:
+            return
+        del self.video_files[video_file]
+        self._discard(self._by_original, original_file, video_file)
+        self._discard(self._by_location, (dirpath, filename), video_file)
+        self._discard(self._by_dirpath, dirpath, video_file)
 
     def get_files(self, original_file=None, dirpath=None, filename=None):
-        return [file._asdict() for file in self.video_files if
-                (original_file is None or file.original_file == original_file) and
-                (dirpath is None or file.dirpath == dirpath) and
-                (filename is None or file.filename == filename)]
+        return list(self.iter_files(original_file, dirpath, filename))
+
+    def iter_files(self, original_file=None, dirpath=None, filename=None):
+        """
+        Lazily yield the matching files as dicts, in the order they were added.
+
+        The matches are fixed when iteration starts, so files may be removed
+        while iterating.
+        """
+        if original_file is not None:
+            candidates = self._by_original.get(original_file, {})
+        elif dirpath is not None and filename is not None:
+            candidates = self._by_location.get((dirpath, filename), {})
+        elif dirpath is not None:
+            candidates = self._by_dirpath.get(dirpath, {})
+        else:
+            candidates = self.video_files
+        for file in tuple(candidates):
+            if ((dirpath is None or file.dirpath == dirpath) and
+                    (filename is None or file.filename == filename)):
+                yield file._asdict()
+
+    def __len__(self):
+        return len(self.video_files)
+
+    def __iter__(self):
+        return self.iter_files()
 
     def clear_files(self):
         self.video_files.clear()
+        self._by_original.clear()
+        self._by_location.clear()
+        self._by_dirpath.clear()
+
+    @staticmethod
+    def _discard(index, key, video_file):
+        files = index.get(key)
+        if files is None:
+            return
+        files.pop(video_file, None)
+        if not files:
+            del index[key]
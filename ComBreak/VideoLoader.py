@@ -5,14 +5,19 @@ import config
 class VideoLoader:
     """A class that represents a video loader."""
 
-    def __init__(self, video_file):
+    def __init__(self, video_file, sampling_mode=None):
         self.cap = cv2.VideoCapture(video_file)
         self.frame_count = 0
+        # "grab" skips frames without converting them, "read" decodes and converts every frame
+        self.sampling_mode = sampling_mode or config.FRAME_SAMPLING_MODE
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
 
     def __iter__(self):
         return self
 
     def __next__(self):
+        if self.sampling_mode == "grab":
+            return self._next_grabbed()
         while True:
             ret, frame = self.cap.read()
             if not ret:
@@ -21,6 +26,24 @@ class VideoLoader:
             if self.frame_count % config.FRAME_RATE == 0:
                 return frame
 
+    def _next_grabbed(self):
+        # Skipped frames are only grabbed, so they are never converted to BGR arrays
+        while True:
+            if not self.cap.grab():
+                raise StopIteration
+            self.frame_count += 1
+            if self.frame_count % config.FRAME_RATE == 0:
+                ret, frame = self.cap.retrieve()
+                if not ret:
+                    raise StopIteration
+                return frame
+
+    def get_timestamp(self):
+        """Return the timestamp in seconds of the last frame returned by the loader."""
+        if self.fps > 0:
+            return (self.frame_count - 1) / self.fps
+        return self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+
     def get_frame_count(self):
         return int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT) / config.FRAME_RATE)
 
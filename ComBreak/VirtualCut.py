@@ -1,8 +1,8 @@
-import pandas as pd
 import re 
 from pathlib import Path
 import config
-from API.utils import get_db_manager
+from API.utils import get_db_manager, PREP_COLUMNS
+from ComBreak.TimestampStore import get_timestamp_store
 
 
 
@@ -16,6 +16,7 @@ class VirtualCut:
             """Generates data for commercial_injector_prep table without physical cutting."""
             prep_data = []
             db_manager = get_db_manager()
+            timestamp_store = get_timestamp_store()
             
             # Create required tables if they don't exist
             try:
@@ -29,21 +30,14 @@ class VirtualCut:
                     )
                     ''')
                 
-                # Check if commercial_injector_prep table exists
-                result = db_manager.fetchone("SELECT name FROM sqlite_master WHERE type='table' AND name='commercial_injector_prep'")
-                if not result:
-                    db_manager.execute('''
-                    CREATE TABLE IF NOT EXISTS commercial_injector_prep (
-                        SHOW_NAME_1 TEXT,
-                        "Season and Episode" TEXT,
-                        "Part Number" INTEGER,
-                        FULL_FILE_PATH TEXT,
-                        ORIGINAL_FILE_PATH TEXT,
-                        startTime INTEGER,
-                        endTime INTEGER
-                    )
-                    ''')
-                
+                # Create commercial_injector_prep, or add the cutless columns to a table made from cut files
+                db_manager.create_table('commercial_injector_prep', ', '.join(
+                    f'"{column}" {column_type}' for column, column_type in PREP_COLUMNS.items()
+                ))
+                db_manager.add_missing_columns('commercial_injector_prep', PREP_COLUMNS)
+                # Parts are upserted by path, which needs the paths to be unique
+                db_manager.ensure_unique_index('commercial_injector_prep', 'FULL_FILE_PATH')
+
             except Exception as e:
                 if status_callback:
                     status_callback(f"Error setting up database tables: {e}")
@@ -54,13 +48,10 @@ class VirtualCut:
                     if status_callback:
                         status_callback(f"Generating virtual data for video {i+1} of {total_videos}")
 
-                    timestamp_file_path = f"{output_file_prefix}.txt"
-                    if not Path(timestamp_file_path).exists():
+                    # Read the stored timestamps of this video
+                    timestamps = timestamp_store.get(output_file_prefix)
+                    if timestamps is None:
                         continue
-                        
-                    # Read the timestamps from the file
-                    with open(timestamp_file_path, "r") as f:
-                        timestamps = [float(line.strip()) for line in f]
                     
                     # All we need to know is how many segments we'll have:
                     # It's the number of timestamps plus 1
@@ -115,41 +106,14 @@ class VirtualCut:
                     status_callback("No virtual data generated.")
                 return
 
-            # Create DataFrame
-            df = pd.DataFrame(prep_data, columns=[
-                'SHOW_NAME_1', 'Season and Episode', 'Part Number', 
-                'FULL_FILE_PATH', 'ORIGINAL_FILE_PATH', 'startTime', 'endTime'
-            ])
-
-            # Save to commercial_injector_prep table
+            # Save to commercial_injector_prep table, writing only new or changed parts
             try:
                 table_name = 'commercial_injector_prep'
-                result = db_manager.fetchone(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table_name}'")
-                table_exists = bool(result)
+                rows = [dict(zip(PREP_COLUMNS, row)) for row in prep_data]
+                changed = db_manager.upsert_many(table_name, rows, 'FULL_FILE_PATH')
+                if status_callback:
+                    status_callback(f"Updated {table_name} table: {changed} of {len(rows)} entries new or changed.")
 
-                with db_manager.transaction() as conn:
-                    if table_exists:
-                        existing_df = pd.read_sql(f'SELECT * FROM {table_name}', conn)
-                        # Ensure columns match before concatenating
-                        for col in df.columns:
-                            if col not in existing_df.columns:
-                                existing_df[col] = None
-                        for col in existing_df.columns:
-                            if col not in df.columns:
-                                df[col] = None
-                        
-                        combined_df = pd.concat([existing_df, df], ignore_index=True)
-                        # Use FULL_FILE_PATH for deduplication
-                        duplicates = combined_df.duplicated(subset=['FULL_FILE_PATH'], keep='last')
-                        combined_df = combined_df[~duplicates]
-                        combined_df.to_sql(table_name, conn, index=False, if_exists='replace')
-                        if status_callback:
-                            status_callback(f"Updated {table_name} table with {len(combined_df)} entries.")
-                    else:
-                        df.to_sql(table_name, conn, index=False, if_exists='replace')
-                        if status_callback:
-                            status_callback(f"Created {table_name} table with {len(df)} entries.")
-                
                 # Set the cutless mode flag in app_data
                 db_manager.execute("INSERT OR REPLACE INTO app_data (key, value) VALUES (?, ?)", ('cutless_mode_used', 'True'))
                 if status_callback:
@@ -1,9 +1,33 @@
+import os
 import subprocess
+import threading
 import config
 from pathlib import Path
 
+# Resolved executables are shared by every ComBreak component in this process
+_resolved_paths = {}
+_capabilities = {}
+_cache_lock = threading.Lock()
+
+
 def get_executable_path(executable_name, config_path):
-    """Check if an executable is on PATH, otherwise return the path from config."""
+    """
+    Check if an executable is on PATH, otherwise return the path from config.
+
+    The executable is only probed the first time it is requested; later calls in
+    the same process return the cached result without spawning anything.
+    """
+    key = (executable_name, config_path)
+    with _cache_lock:
+        if key in _resolved_paths:
+            return _resolved_paths[key]
+    path = _resolve_executable_path(executable_name, config_path)
+    with _cache_lock:
+        _resolved_paths[key] = path
+    return path
+
+
+def _resolve_executable_path(executable_name, config_path):
     try:
         # Use subprocess.run for better control and error handling
         # Check=True will raise CalledProcessError if the command fails
@@ -18,3 +42,126 @@ def get_executable_path(executable_name, config_path):
         else:
             # Raise an error if neither PATH nor config path works
             raise FileNotFoundError(f"Executable '{executable_name}' not found on PATH or in configured path: {config_path}")
+
+
+def get_executable_capabilities(executable_name, config_path):
+    """
+    Report what an ffmpeg-family executable supports, probing it once per process.
+
+    Returns:
+        dict: {'path': resolved path, 'version': first line of -version output,
+               'hwaccels': set of hardware acceleration methods,
+               'filters': set of available filter names}
+    """
+    path = get_executable_path(executable_name, config_path)
+    with _cache_lock:
+        if path in _capabilities:
+            return _capabilities[path]
+
+    capabilities = {
+        'path': path,
+        'version': _first_line(_run_info(path, "-version")),
+        'hwaccels': _parse_hwaccels(_run_info(path, "-hwaccels")),
+        'filters': _parse_filters(_run_info(path, "-filters")),
+    }
+    with _cache_lock:
+        _capabilities[path] = capabilities
+    return capabilities
+
+
+def has_filter(filter_name, executable_name="ffmpeg", config_path=None):
+    """Return True if the resolved ffmpeg build provides the given filter."""
+    config_path = config_path or config.ffmpeg_path
+    return filter_name in get_executable_capabilities(executable_name, config_path)['filters']
+
+
+def get_detection_profile():
+    """
+    Return the settings of the detection profile selected in config.DETECTION_PROFILE.
+
+    Raises:
+        ValueError: If the profile isn't defined in config.DETECTION_PROFILES
+    """
+    try:
+        return config.DETECTION_PROFILES[config.DETECTION_PROFILE]
+    except KeyError:
+        raise ValueError(
+            f"Unknown DETECTION_PROFILE '{config.DETECTION_PROFILE}', "
+            f"expected one of: {', '.join(config.DETECTION_PROFILES)}"
+        ) from None
+
+
+def get_thread_count():
+    """
+    Return the number of threads each ffmpeg process may use under the profile's CPU budget.
+
+    A full budget returns 0, which lets ffmpeg pick the thread count itself.
+    """
+    budget = get_detection_profile()['cpu_budget']
+    if budget >= 1:
+        return 0
+    return max(1, int((os.cpu_count() or 1) * budget))
+
+
+def limit_workers(workers):
+    """
+    Cap a configured worker count to the number of cores the profile's CPU budget allows.
+
+    A full budget leaves the configured count alone, since some pools (such as
+    cutting) are mostly waiting on storage rather than the CPU.
+    """
+    workers = max(1, int(workers))
+    budget = get_detection_profile()['cpu_budget']
+    if budget >= 1:
+        return workers
+    return min(workers, max(1, int((os.cpu_count() or 1) * budget)))
+
+
+def video_decode_args():
+    """Return the ffmpeg input options for decoding video under the detection profile."""
+    args = ["-threads", str(get_thread_count())]
+    if get_detection_profile()['skip_loop_filter']:
+        # Deblocking barely changes a frame's mean brightness, so it can be skipped
+        args += ["-skip_loop_filter", "all"]
+    return args
+
+
+def audio_decode_args():
+    """Return the ffmpeg input options for reading only the audio of a file under the detection profile."""
+    args = ["-threads", str(get_thread_count())]
+    if get_detection_profile()['audio_only_demux']:
+        # Video packets are dropped by the demuxer instead of being read and thrown away
+        args += ["-discard:v", "all"]
+    return args
+
+
+def _run_info(path, option):
+    """Run an informational option and return its output, or an empty string if it fails."""
+    try:
+        result = subprocess.run([path, "-hide_banner", option], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError:
+        return ""
+    if result.returncode != 0:
+        return ""
+    return result.stdout.decode('utf-8', errors='ignore')
+
+
+def _first_line(output):
+    lines = output.strip().splitlines()
+    return lines[0] if lines else ""
+
+
+def _parse_hwaccels(output):
+    # Output is a header line followed by one method per line
+    lines = [line.strip() for line in output.splitlines() if line.strip()]
+    return {line for line in lines if not line.endswith(':')}
+
+
+def _parse_filters(output):
+    # Filter lines look like " TSC scale             V->V       Scale the input video size..."
+    filters = set()
+    for line in output.splitlines():
+        tokens = line.split()
+        if len(tokens) >= 3 and '->' in tokens[2]:
+            filters.add(tokens[1])
+    return filters
@@ -2,7 +2,7 @@ import os
 import re
 import pandas as pd
 import config
-from API.utils import get_db_manager
+from API.utils import get_db_manager, PREP_COLUMNS
 from API.utils.ErrorManager import get_error_manager
 
 
@@ -94,22 +94,18 @@ class AnimeFileOrganizer:
             )
 
         try:
-            # Check if table exists
-            result = self.db_manager.fetchone(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='commercial_injector_prep'"
-            )
-            table_exists = bool(result)
+            table_name = 'commercial_injector_prep'
+            self.db_manager.create_table(table_name, ', '.join(
+                f'"{column}" {column_type}' for column, column_type in PREP_COLUMNS.items()
+            ))
+            self.db_manager.add_missing_columns(table_name, PREP_COLUMNS)
+            # Parts are upserted by path, which needs the paths to be unique
+            self.db_manager.ensure_unique_index(table_name, 'FULL_FILE_PATH')
+            # Cut files have no virtual timings, so any left from a cutless run are cleared
+            rows = [dict(dict.fromkeys(PREP_COLUMNS), **dict(zip(df.columns, row))) for row in data]
+            changed = self.db_manager.upsert_many(table_name, rows, 'FULL_FILE_PATH')
+            print(f"{changed} of {len(rows)} cut episode parts were new or changed.")
 
-            with self.db_manager.transaction() as conn:
-                if table_exists:
-                    existing_df = pd.read_sql('SELECT * FROM commercial_injector_prep', conn)
-                    combined_df = pd.concat([existing_df, df], ignore_index=True)
-                    duplicates = combined_df.duplicated(subset=['FULL_FILE_PATH'], keep='last')
-                    combined_df = combined_df[~duplicates]
-                    combined_df.to_sql('commercial_injector_prep', conn, index=False, if_exists='replace')
-                else:
-                    df.to_sql('commercial_injector_prep', conn, index=False, if_exists='replace')
-                    
         except Exception as e:
             self.error_manager.send_error_level(
                 source="CommercialInjectorPrep",
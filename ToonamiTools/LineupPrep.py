@@ -9,6 +9,224 @@ import config
 from .utils import show_name_mapper
 
 
+class BumpNameParser:
+    """
+    Parses bump file names against the Toonami naming grammar.
+
+    Built once per run. The structure-only pattern of each keyword count is
+    compiled once, and show names are matched by walking a trie of the
+    library's shows instead of a regex alternation of every show, so each
+    name is parsed in one pass whatever the size of the library. Where a name
+    could be read more than one way, alternatives are tried in the order the
+    regex alternations used: keywords and colors longest first, shows in
+    library order.
+    """
+
+    # Show names when only the structure is checked
+    ANY_SHOW_NAME = r"[\w\s!':&\-]+"
+
+    def __init__(self, keywords, colors, generic_bumps, shows=()):
+        # Sorted longest first so the longest keyword or color wins, as in the regex alternations
+        self.keywords = sorted(keywords, key=len, reverse=True)
+        self.colors = sorted(colors, key=len, reverse=True)
+        self.generic = generic_bumps
+        self.network = config.network
+        self._keywords_lower = [keyword.lower() for keyword in self.keywords]
+        self._colors_lower = [color.lower() for color in self.colors]
+        self._show_trie = self._build_trie(shows)
+        self._structure_patterns = {}
+
+    def parse(self, bump):
+        """
+        Parse a bump name that already had the show name mapping applied.
+
+        Returns:
+            dict: 'count' (keyword count), 'matches_structure', 'is_multi',
+                  'structure' (fields read with any show names, or None) and
+                  'fields' (fields read with shows of the library, or None)
+        """
+        count = self.count_keywords(bump)
+        match = self.structure_pattern(count).match(bump)
+        result = {
+            'count': count,
+            'matches_structure': match is not None,
+            # count 2 = "from" bumps, count 3 = "later" bumps
+            'is_multi': match is not None and count >= 2,
+            'structure': match.groupdict() if match else None,
+            'fields': None
+        }
+        if match is None:
+            return result
+        if count == 0:
+            # Generic bumps don't name shows
+            result['fields'] = result['structure']
+        else:
+            result['fields'] = self.match_shows(bump, count)
+        return result
+
+    @staticmethod
+    def count_keywords(bump):
+        # Convert bump to lowercase for easier matching
+        lower_bump = bump.lower()
+
+        # Define the sets of keywords
+        singles = ["back", "to ads", "generic", "intro", "next"]
+        from_keyword = "from"
+        later_keyword = "later"
+
+        # Define a list of keywords to exclude for 'singles'
+        exclude_for_singles = ["from", "later"]
+
+        # Check for 'singles' without 'triples', 'doubles', 'from', or 'later'
+        if any(keyword in lower_bump for keyword in singles) and all(keyword not in lower_bump for keyword in exclude_for_singles):
+            return 1
+
+        # Check for 'from' without 'later'
+        elif from_keyword in lower_bump and later_keyword not in lower_bump:
+            return 2
+
+        # Check for 'Later'
+        elif later_keyword in lower_bump:
+            return 3
+
+        # If none of the above conditions are met, return 0
+        else:
+            return 0
+
+    def structure_pattern(self, count):
+        """Return the compiled pattern of a keyword count, matching any show names."""
+        if count not in self._structure_patterns:
+            self._structure_patterns[count] = re.compile(self._structure_regex(count))
+        return self._structure_patterns[count]
+
+    def _structure_regex(self, count):
+        show = self.ANY_SHOW_NAME
+        keywords = "|".join(self.keywords)
+        colors = "|".join(self.colors)
+        prefix = rf"(?i)^{self.network}\s?(?P<TOONAMI_VERSION>\d\s\d)?\s?"
+        suffix = rf"(?:\s(?P<AD_VERSION>\d{{1,2}}))?(?:\s(?P<COLOR>{colors}))?$"
+        if count == 1:
+            return rf"{prefix}(?P<SHOW_NAME_1>{show})\s(?P<PLACEMENT_2>{keywords}){suffix}"
+        elif count == 2:
+            return rf"{prefix}(?P<SHOW_NAME_1>{show})\s(?P<PLACEMENT_2>{keywords})\s(?P<SHOW_NAME_2>{show}){suffix}"
+        elif count >= 3:
+            return (
+                rf"{prefix}(?P<PLACEMENT_1>{keywords})?\s?(?P<SHOW_NAME_1>{show})\s(?P<PLACEMENT_2>{keywords})"
+                rf"\s(?P<SHOW_NAME_2>{show})\s(?P<PLACEMENT_3>{keywords})\s(?P<SHOW_NAME_3>{show}){suffix}"
+            )
+        generic_bump_names = "|".join(re.escape(name) for name in self.generic)
+        return rf"(?i)^{self.network}\s?(?P<TOONAMI_VERSION>\d\s\d)?\s?(?P<SPECIAL_SHOW_NAME>{generic_bump_names})(?:\s(?P<AD_VERSION>\d{{1,2}}))?$"
+
+    # ------------------- Show-constrained matching -------------------
+    def match_shows(self, bump, count):
+        """
+        Read a bump whose show names must all be shows of the library.
+
+        Returns:
+            dict: The same fields as the structure pattern, or None if no reading fits
+        """
+        # The grammar of the structure patterns as elements: ' ' is one whitespace
+        # character, ' ?' an optional one and a trailing '?' an optional keyword
+        if count == 1:
+            body = ['SHOW_NAME_1', ' ', 'PLACEMENT_2']
+            fields = ('TOONAMI_VERSION', 'SHOW_NAME_1', 'PLACEMENT_2', 'AD_VERSION', 'COLOR')
+        elif count == 2:
+            body = ['SHOW_NAME_1', ' ', 'PLACEMENT_2', ' ', 'SHOW_NAME_2']
+            fields = ('TOONAMI_VERSION', 'SHOW_NAME_1', 'PLACEMENT_2', 'SHOW_NAME_2', 'AD_VERSION', 'COLOR')
+        else:
+            body = ['PLACEMENT_1?', ' ?', 'SHOW_NAME_1', ' ', 'PLACEMENT_2', ' ', 'SHOW_NAME_2',
+                    ' ', 'PLACEMENT_3', ' ', 'SHOW_NAME_3']
+            fields = ('TOONAMI_VERSION', 'PLACEMENT_1', 'SHOW_NAME_1', 'PLACEMENT_2', 'SHOW_NAME_2',
+                      'PLACEMENT_3', 'SHOW_NAME_3', 'AD_VERSION', 'COLOR')
+        elements = ['NETWORK', ' ?', 'TOONAMI_VERSION', ' ?', *body, 'AD_VERSION', 'COLOR']
+
+        spans = next(self._match(bump, 0, elements, 0, {}), None)
+        if spans is None:
+            return None
+        return {field: bump[spans[field][0]:spans[field][1]] if field in spans else None for field in fields}
+
+    def _match(self, text, pos, elements, index, spans):
+        """Yield the field spans of every way the remaining elements match, in regex order."""
+        if index == len(elements):
+            if pos == len(text):
+                yield spans
+            return
+        for field, start, end in self._element_matches(text, pos, elements[index]):
+            matched = {**spans, field: (start, end)} if field is not None else spans
+            yield from self._match(text, end, elements, index + 1, matched)
+
+    def _element_matches(self, text, pos, element):
+        """
+        Yield (field, start, end) for each way one element matches at pos.
+
+        field is None for separators and skipped optional elements.
+        """
+        if element == ' ':
+            if text[pos:pos + 1].isspace():
+                yield None, pos, pos + 1
+        elif element == ' ?':
+            if text[pos:pos + 1].isspace():
+                yield None, pos, pos + 1
+            yield None, pos, pos
+        elif element == 'NETWORK':
+            if text[pos:pos + len(self.network)].lower() == self.network.lower():
+                yield None, pos, pos + len(self.network)
+        elif element == 'TOONAMI_VERSION':
+            if text[pos:pos + 1].isdecimal() and text[pos + 1:pos + 2].isspace() and text[pos + 2:pos + 3].isdecimal():
+                yield element, pos, pos + 3
+            yield None, pos, pos
+        elif element.startswith('PLACEMENT'):
+            for end in self._literal_ends(text, pos, self._keywords_lower):
+                yield element.rstrip('?'), pos, end
+            if element.endswith('?'):
+                yield None, pos, pos
+        elif element.startswith('SHOW_NAME'):
+            for end in self._show_ends(text, pos):
+                yield element, pos, end
+        elif element == 'AD_VERSION':
+            # A space and one or two digits, the space not being part of the field
+            if text[pos:pos + 1].isspace() and text[pos + 1:pos + 2].isdecimal():
+                if text[pos + 2:pos + 3].isdecimal():
+                    yield element, pos + 1, pos + 3
+                yield element, pos + 1, pos + 2
+            yield None, pos, pos
+        elif element == 'COLOR':
+            if text[pos:pos + 1].isspace():
+                for end in self._literal_ends(text, pos + 1, self._colors_lower):
+                    yield element, pos + 1, end
+            yield None, pos, pos
+
+    @staticmethod
+    def _literal_ends(text, pos, literals):
+        for literal in literals:
+            if text[pos:pos + len(literal)].lower() == literal:
+                yield pos + len(literal)
+
+    def _show_ends(self, text, pos):
+        """Yield where each show starting at pos ends, in library order."""
+        node = self._show_trie
+        found = []
+        for end in range(pos, len(text)):
+            node = node.get(text[end].lower())
+            if node is None:
+                break
+            if None in node:
+                found.append((node[None], end + 1))
+        for _, end in sorted(found):
+            yield end
+
+    @staticmethod
+    def _build_trie(shows):
+        """Build a character trie of show names; the None key holds the show's position in the library."""
+        trie = {}
+        for order, show in enumerate(shows):
+            node = trie
+            for char in show:
+                node = node.setdefault(char.lower(), {})
+            node.setdefault(None, order)
+        return trie
+
+
 class MediaProcessor:
     def __init__(self, bump_folder):
         self.keywords = config.keywords
@@ -19,30 +237,6 @@ class MediaProcessor:
         self.db_manager = get_db_manager()
         self.error_manager = get_error_manager()
 
-    def generate_dynamic_regex(self, count, shows=None):
-        # Create a dynamic part of the regex pattern that matches the show names
-        if shows is None:
-            # Match ANY word characters for show names (structure check only)
-            dynamic_show_names = r"[\w\s!':&\-]+"
-        else:
-            # Match specific shows (full validation)
-            dynamic_show_names = "|".join(shows)
-
-        # Use the sorted but unescaped keywords and colors directly
-        sorted_unescaped_keywords = "|".join(sorted(self.keywords, key=len, reverse=True))
-        sorted_unescaped_colors = "|".join(sorted(self.colors, key=len, reverse=True))
-
-        if count == 1:
-            self.regex = rf"(?i)^{config.network}\s?(?P<TOONAMI_VERSION>\d\s\d)?\s?(?P<SHOW_NAME_1>{dynamic_show_names})\s(?P<PLACEMENT_2>{sorted_unescaped_keywords})(?:\s(?P<AD_VERSION>\d{{1,2}}))?(?:\s(?P<COLOR>{sorted_unescaped_colors}))?$"
-        elif count == 2:
-            self.regex = rf"(?i)^{config.network}\s?(?P<TOONAMI_VERSION>\d\s\d)?\s?(?P<SHOW_NAME_1>{dynamic_show_names})\s(?P<PLACEMENT_2>{sorted_unescaped_keywords})\s(?P<SHOW_NAME_2>{dynamic_show_names})(?:\s(?P<AD_VERSION>\d{{1,2}}))?(?:\s(?P<COLOR>{sorted_unescaped_colors}))?$"
-        elif count >= 3:
-            self.regex = rf"(?i)^{config.network}\s?(?P<TOONAMI_VERSION>\d\s\d)?\s?(?P<PLACEMENT_1>{sorted_unescaped_keywords})?\s?(?P<SHOW_NAME_1>{dynamic_show_names})\s(?P<PLACEMENT_2>{sorted_unescaped_keywords})\s(?P<SHOW_NAME_2>{dynamic_show_names})\s(?P<PLACEMENT_3>{sorted_unescaped_keywords})\s(?P<SHOW_NAME_3>{dynamic_show_names})(?:\s(?P<AD_VERSION>\d{{1,2}}))?(?:\s(?P<COLOR>{sorted_unescaped_colors}))?$"
-        elif count == 0:
-            generic_bump_names = "|".join(re.escape(name) for name in self.generic)
-            self.regex = rf"(?i)^{config.network}\s?(?P<TOONAMI_VERSION>\d\s\d)?\s?(?P<SPECIAL_SHOW_NAME>{generic_bump_names})(?:\s(?P<AD_VERSION>\d{{1,2}}))?$"
-        return self.regex
-
     def _retrieve_media_files(self, directory):
         media_files = []
         try:
@@ -94,70 +288,26 @@ class MediaProcessor:
             )
             raise
 
-    def count_keywords(self, bump):
-        # Convert bump to lowercase for easier matching
-        lower_bump = bump.lower()
-
-        # Define the sets of keywords
-        singles = ["back", "to ads", "generic", "intro", "next"]
-        from_keyword = "from"
-        later_keyword = "later"
-
-        # Define a list of keywords to exclude for 'singles'
-        exclude_for_singles = ["from", "later"]
-
-        # Check for 'singles' without 'triples', 'doubles', 'from', or 'later'
-        if any(keyword in lower_bump for keyword in singles) and all(keyword not in lower_bump for keyword in exclude_for_singles):
-            return 1
-
-        # Check for 'from' without 'later'
-        elif from_keyword in lower_bump and later_keyword not in lower_bump:
-            return 2
-
-        # Check for 'Later'
-        elif later_keyword in lower_bump:
-            return 3
-
-        # If none of the above conditions are met, return 0
-        else:
-            return 0
-
     def _apply_show_name_mapping(self, bump):
         # Use the show_name_mapper utility
         mapped_bump = show_name_mapper.apply_via_replacement(bump)
         return mapped_bump
 
-    def _validate_bump_structure(self, bump):
+    def _parse_bumps(self, media_files, shows):
         """
-        Check if bump matches the Toonami naming structure, regardless of show names.
-        
+        Parse every bump name once for this run.
+
         Returns:
-            tuple: (matches_structure: bool, is_multi_bump: bool, keyword_count: int)
+            list: (base_name, full_path, cleaned_bump, parsed) tuples, parsed as
+                  returned by BumpNameParser.parse
         """
-        transformed_bump = self._apply_show_name_mapping(bump)
-        count = self.count_keywords(transformed_bump)
-        
-        # Generate regex without show constraints (structure only)
-        self.generate_dynamic_regex(count, shows=None)
-        
-        if re.match(self.regex, transformed_bump):
-            # Check if it's a multi-bump based on the count
-            is_multi = count >= 2  # count 2 = "from" bumps, count 3 = "later" bumps
-            return True, is_multi, count
-        return False, False, count
-
-    def _extract_data_from_pattern(self, bump, shows):
-        # Step 1: Apply the show_name_mapping to the bump
-        transformed_bump = self._apply_show_name_mapping(bump)
-
-        # Step 2: Count the keywords and generate the appropriate regex
-        count = self.count_keywords(transformed_bump)
-        self.regex = self.generate_dynamic_regex(count, shows)
-
-        if match := re.match(self.regex, transformed_bump):
-            return match.groupdict()
-        else:
-            return None
+        parser = BumpNameParser(self.keywords, self.colors, self.generic, shows)
+        parsed_bumps = []
+        for base_name, full_path in media_files:
+            cleaned_bump = os.path.splitext(base_name)[0].replace('_', ' ')
+            transformed_bump = self._apply_show_name_mapping(cleaned_bump)
+            parsed_bumps.append((base_name, full_path, cleaned_bump, parser.parse(transformed_bump)))
+        return parsed_bumps
 
     def _clean_show_name(self, show_name):
         cleaned_show = show_name_mapper.clean(show_name, mode='matching')
@@ -254,7 +404,7 @@ class MediaProcessor:
         return deduplicated_result
 
     
-    def _analyze_all_multibumps(self, media_files, shows):
+    def _analyze_all_multibumps(self, parsed_bumps, shows):
         """Analyze ALL multi-bumps to determine show coverage."""
         analysis = {
             'shows_with_complete_multibumps': set(),
@@ -265,21 +415,11 @@ class MediaProcessor:
         }
         
         # First pass: identify all multi-bumps and what shows they reference
-        for base_name, full_path in media_files:
-            cleaned_bump = os.path.splitext(base_name)[0].replace('_', ' ')
-            
+        for base_name, full_path, cleaned_bump, parsed in parsed_bumps:
             # Check if it's a multi-bump
-            matches_structure, is_multi_bump, keyword_count = self._validate_bump_structure(cleaned_bump)
-            
-            if is_multi_bump and matches_structure:
-                # Apply show name mapping to the entire bump name
-                transformed_bump = self._apply_show_name_mapping(cleaned_bump)
-                
-                # Generate regex to extract show names
-                self.generate_dynamic_regex(keyword_count, shows=None)
-                
-                if match := re.match(self.regex, transformed_bump):
-                    matched_dict = match.groupdict()
+            if parsed['is_multi'] and parsed['matches_structure']:
+                # Show names as read by the structure check, whether or not they're in the library
+                if matched_dict := parsed['structure']:
                     shows_in_bump = []
                     shows_missing = []
                     
@@ -341,7 +481,7 @@ class MediaProcessor:
 
         return analysis
 
-    def _process_data_patterns(self, media_files, shows):
+    def _process_data_patterns(self, parsed_bumps, shows):
         """Process bump files and extract structured data."""
         new_df = []
         no_match_df = []
@@ -353,16 +493,14 @@ class MediaProcessor:
         multi_bumps_matched_shows = 0
         multi_bumps_with_keywords = 0
         
-        for base_name, full_path in media_files:
-            cleaned_bump = os.path.splitext(base_name)[0].replace('_', ' ')
-            
+        for base_name, full_path, cleaned_bump, parsed in parsed_bumps:
             # Quick keyword check to identify potential multi-bumps
             has_multi_keywords = any(keyword in cleaned_bump.lower() for keyword in ['from', 'later', 'up next'])
             if has_multi_keywords:
                 multi_bumps_with_keywords += 1
             
             # Phase 1: Check if it matches Toonami structure
-            matches_structure, is_multi_bump, keyword_count = self._validate_bump_structure(cleaned_bump)
+            matches_structure, is_multi_bump = parsed['matches_structure'], parsed['is_multi']
             
             if is_multi_bump:
                 total_multi_bump_files += 1
@@ -375,7 +513,7 @@ class MediaProcessor:
                 continue
             
             # Phase 2: Check if it matches with actual shows
-            if matched_data := self._extract_data_from_pattern(cleaned_bump, shows):
+            if matched_data := parsed['fields']:
                 matched_data['ORIGINAL_FILE_PATH'] = base_name
                 matched_data['FULL_FILE_PATH'] = full_path
                 
@@ -618,11 +756,13 @@ class MediaProcessor:
                 )
                 raise Exception("No bump files found to process")
             
-            processed_df, no_match_data = self._process_data_patterns(media_files, shows)
+            # Each bump name is parsed once and shared by the passes below
+            parsed_bumps = self._parse_bumps(media_files, shows)
+            processed_df, no_match_data = self._process_data_patterns(parsed_bumps, shows)
             print(f"Processed into {len(processed_df)} entries.")
             
             # NEW: Analyze all multi-bumps for coverage report
-            multibump_analysis = self._analyze_all_multibumps(media_files, shows)
+            multibump_analysis = self._analyze_all_multibumps(parsed_bumps, shows)
             
             # Print the analysis
             print("\n" + "="*60)
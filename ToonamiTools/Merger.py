@@ -1,3 +1,4 @@
+import bisect
 import pandas as pd
 import random
 from API.utils.DatabaseManager import get_db_manager
@@ -11,8 +12,15 @@ class ShowScheduler:
     ShowScheduler organizes shows into a schedule, reusing episode blocks if needed,
     continuing from the last used episode block, and applying optional NS3 logic
     (for multi-show transitions). It can handle both cut and uncut channels.
+
+    The schedule is built as a list of row dicts and only turned into a
+    DataFrame when it is saved, so building it takes time linear in the
+    length of the lineup.
     """
 
+    # Columns of every schedule row, rows of added unused shows carry the other commercial table columns too
+    SCHEDULE_COLUMNS = ["FULL_FILE_PATH", "Code", "BLOCK_ID"]
+
     def __init__(
         self,
         reuse_episode_blocks=True,
@@ -44,6 +52,10 @@ class ShowScheduler:
         self.decoder = {}
         self.show_episode_blocks = None
 
+        # Episode block lookups, built from commercial_injector_df by _index_episode_blocks
+        self._block_rows = {}
+        self._show_blocks = {}
+
         # Configuration toggles
         self.reuse_episode_blocks = reuse_episode_blocks
         self.shows_with_no_more_blocks = set()
@@ -169,6 +181,8 @@ class ShowScheduler:
             self._normalize_show_names()
             self.show_episode_blocks = self._group_shows()
 
+        self._index_episode_blocks()
+
     def _load_codes(self):
         """
         Load the 'codes' table from the DB to decode show codes in
@@ -223,12 +237,47 @@ class ShowScheduler:
         Group the commercial_injector_df by show_name and BLOCK_ID,
         returning a dict of episode blocks for each show.
         """
-        grouped = self.commercial_injector_df.groupby("show_name").apply(
-            lambda x: x.groupby("BLOCK_ID").apply(
-                lambda y: y[["FULL_FILE_PATH", "BLOCK_ID"]].values.tolist()
-            ).values.tolist()
-        )
-        return grouped.to_dict()
+        grouped = {}
+        for show, path, block_id in zip(
+            self.commercial_injector_df["show_name"],
+            self.commercial_injector_df["FULL_FILE_PATH"],
+            self.commercial_injector_df["BLOCK_ID"]
+        ):
+            if pd.isna(show) or pd.isna(block_id):
+                continue
+            grouped.setdefault(show, {}).setdefault(block_id, []).append([path, block_id])
+        return {show: [blocks[block_id] for block_id in sorted(blocks)] for show, blocks in grouped.items()}
+
+    def _index_episode_blocks(self):
+        """
+        Index commercial_injector_df once so episode blocks are looked up
+        without scanning the table for every scheduled block.
+
+        _block_rows maps each BLOCK_ID to its rows in table order.
+        _show_blocks maps each show to its BLOCK_IDs sorted, together with
+        the first block in table order among every suffix of them, so the
+        next block after a used one is found by bisection.
+        """
+        self._block_rows = {}
+        blocks_by_show = {}
+        for record in self.commercial_injector_df.to_dict("records"):
+            block_id = record["BLOCK_ID"]
+            if not isinstance(block_id, str):
+                continue
+            self._block_rows.setdefault(block_id, []).append(record)
+            blocks_by_show.setdefault(record["show_name"], {}).setdefault(block_id, record)
+
+        self._show_blocks = {}
+        for show, first_rows in blocks_by_show.items():
+            order = {block_id: position for position, block_id in enumerate(first_rows)}
+            block_ids = sorted(first_rows)
+            earliest = [None] * len(block_ids)
+            best = None
+            for i in range(len(block_ids) - 1, -1, -1):
+                if best is None or order[block_ids[i]] < order[best]:
+                    best = block_ids[i]
+                earliest[i] = best
+            self._show_blocks[show] = (first_rows, block_ids, earliest)
 
     #####################################################
     #             CORE SCHEDULER METHODS                #
@@ -261,19 +310,19 @@ class ShowScheduler:
             self.apply_ns3_logic = True
             print("NS2 bumps found. Applying NS3 logic.")
 
-        final_df = self.generate_schedule()
-        final_df = self.adjust_final_df_based_on_ns3_indices(final_df)
+        schedule = self.generate_schedule()
+        schedule = self.adjust_schedule_based_on_ns3_indices(schedule)
 
         # Optionally add unused shows if continuing from last used block
         if self.continue_from_last_used_episode_block:
             unused_shows_df = self.get_unused_shows()
             if not unused_shows_df.empty:
-                anchor_rows = self.locate_lines_of_fourth_unique_block_id(final_df)
-                final_df = self.add_unused_shows_to_schedule(final_df, unused_shows_df, anchor_rows)
+                anchor_rows = self.locate_lines_of_fourth_unique_block_id(schedule)
+                schedule = self.add_unused_shows_to_schedule(schedule, unused_shows_df, anchor_rows)
             else:
                 print("No unused shows available. Skipping related operations.")
 
-        self.save_schedule(final_df, save_table)
+        self.save_schedule(self.schedule_to_dataframe(schedule), save_table)
 
         # If continuing from last used block, save our updated usage
         if self.continue_from_last_used_episode_block:
@@ -286,9 +335,16 @@ class ShowScheduler:
         """
         Main method to generate the schedule using the decoded_df, reordering
         blocks, applying optional NS2/NS3 logic, and reusing blocks as necessary.
+
+        Returns the schedule as a list of row dicts with SCHEDULE_COLUMNS keys.
         """
         print("Generating schedule...")
-        final_df = pd.DataFrame(columns=["FULL_FILE_PATH", "Code", "BLOCK_ID"])
+        schedule = []
+
+        # Plain lists of the bump rows, so neighbouring rows are looked up by position
+        self._bump_paths = self.decoded_df["FULL_FILE_PATH"].tolist()
+        self._bump_codes = [code or "" for code in self.decoded_df["Code"]]
+        self._bump_shows = self.decoded_df["shows"].tolist()
 
         # For tracking certain row states
         last_show_name = None
@@ -296,37 +352,33 @@ class ShowScheduler:
         last_bump_for_show = {}
         skip_first_show = False
 
-        for idx, row in self.decoded_df.iterrows():
-            shows = row["shows"]
-            code_value = row["Code"] or ""
+        for idx, shows in enumerate(self._bump_shows):
+            code_value = self._bump_codes[idx]
 
             # Detect if we have an NS2->NS3 chain from the previous row
             skip_first_show = self._detect_ns2_ns3_chain(idx, shows)
 
             # Check if any show is exhausted, skip if so
-            if self._skip_exhausted_shows(shows, final_df, last_bump_for_show):
+            if self._skip_exhausted_shows(shows, schedule, last_bump_for_show):
                 continue
 
             if "-NS3" in code_value:
                 # Handle an NS3 row
-                final_df, last_show_name = self._handle_ns3_row(
-                    final_df, row, idx, shows, skip_first_show, last_bump_for_show, delete_intro
+                last_show_name = self._handle_ns3_row(
+                    schedule, idx, shows, skip_first_show, last_bump_for_show, delete_intro
                 )
                 skip_first_show = False  # Reset after usage
             elif "-NS2" in code_value:
                 # Handle an NS2 row
-                final_df, last_show_name, delete_intro = self._handle_ns2_row(
-                    final_df, row, shows, last_show_name
+                last_show_name, delete_intro = self._handle_ns2_row(
+                    schedule, idx, shows, last_show_name
                 )
             else:
                 # Potentially handle other code or do default append
                 pass
 
-            # Attempt to handle "interweaving" if next row is different
-            final_df = self._attempt_interweave(idx, final_df, last_show_name, shows)
-
         print("Schedule generation complete.")
-        return final_df
+        return schedule
 
     def _detect_ns2_ns3_chain(self, idx, current_shows):
         """
@@ -335,41 +387,48 @@ class ShowScheduler:
         NS3 row's show list.
         """
         if self.apply_ns3_logic and idx > 0:
-            current_code = self.decoded_df.iloc[idx]["Code"] or ""
-            prev_code = self.decoded_df.iloc[idx - 1]["Code"] or ""
+            current_code = self._bump_codes[idx]
+            prev_code = self._bump_codes[idx - 1]
             if ("-NS3" in current_code) and ("-NS2" in prev_code):
-                prev_ns2_show = self.decoded_df.iloc[idx - 1]["shows"][0]
+                prev_ns2_show = self._bump_shows[idx - 1][0]
                 current_ns3_show = current_shows[0]
                 return prev_ns2_show == current_ns3_show
         return False
 
-    def _skip_exhausted_shows(self, shows, final_df, last_bump_for_show):
+    def _skip_exhausted_shows(self, shows, schedule, last_bump_for_show):
         """
         If any show in 'shows' is exhausted, skip them.
-        Also remove the last bump for that show from final_df if found.
+        Also remove the last bump for that show from the schedule if found.
         """
         if any(s in self.shows_with_no_more_blocks for s in shows):
             print(f"Skipping bump for show(s) {shows} as episode blocks have run out.")
             for s in shows:
                 if s in self.shows_with_no_more_blocks:
                     last_bump_idx = last_bump_for_show.get(s)
-                    if last_bump_idx is not None:
+                    if last_bump_idx is not None and 0 <= last_bump_idx < len(schedule):
                         print(f"Removing bump for show {s} that just ran out.")
-                        final_df.drop(index=last_bump_idx, inplace=True, errors="ignore")
-                        final_df.reset_index(drop=True, inplace=True)
+                        del schedule[last_bump_idx]
             return True
         return False
 
-    def _handle_ns3_row(self, final_df, row, idx, shows, skip_first_show, last_bump_for_show, delete_intro):
+    def _bump_row(self, idx):
+        """Return the schedule row of the bump at position idx of decoded_df."""
+        return {"FULL_FILE_PATH": self._bump_paths[idx], "Code": self._bump_codes[idx], "BLOCK_ID": None}
+
+    def _episode_rows(self, block_id):
+        """Return the schedule rows of every file of an episode block."""
+        return [
+            {"FULL_FILE_PATH": record["FULL_FILE_PATH"], "Code": "", "BLOCK_ID": block_id}
+            for record in self._block_rows.get(block_id, [])
+        ]
+
+    def _handle_ns3_row(self, schedule, idx, shows, skip_first_show, last_bump_for_show, delete_intro):
         """
         Handle an NS3 row, potentially skipping the first show if skip_first_show is True.
         If the next row is also an NS3 with the same tail show, drop the last show
         in the current list. Then insert episodes for the remaining shows in order.
         """
-        final_df = pd.concat(
-            [final_df, pd.DataFrame([row[["FULL_FILE_PATH", "Code"]].to_dict()])],
-            ignore_index=True
-        )
+        schedule.append(self._bump_row(idx))
 
         # Possibly delete intro for the first inserted show
         if not skip_first_show:
@@ -377,9 +436,9 @@ class ShowScheduler:
 
         # If the next row also has -NS3 and shares a show, skip the last show in this row
         if (
-            idx < len(self.decoded_df) - 1
-            and "-NS3" in (self.decoded_df.iloc[idx + 1]["Code"] or "")
-            and (self.decoded_df.iloc[idx + 1]["shows"][0] == shows[-1])
+            idx < len(self._bump_codes) - 1
+            and "-NS3" in self._bump_codes[idx + 1]
+            and (self._bump_shows[idx + 1][0] == shows[-1])
         ):
             shows_to_place = shows[:-1]
         else:
@@ -391,14 +450,12 @@ class ShowScheduler:
 
         # Insert episode blocks
         for show in shows_to_place:
-            final_df, delete_intro = self._insert_episode_block(
-                final_df, show, delete_intro, last_bump_for_show
-            )
+            delete_intro = self._insert_episode_block(schedule, show, delete_intro, last_bump_for_show)
 
         last_show_name = shows_to_place[-1] if shows_to_place else None
-        return final_df, last_show_name
+        return last_show_name
 
-    def _handle_ns2_row(self, final_df, row, shows, last_show_name):
+    def _handle_ns2_row(self, schedule, idx, shows, last_show_name):
         """
         Handle an NS2 row. If the final schedule's last show differs from
         show_name_2, we first insert show_name_2's block. Then we append the NS2 row
@@ -411,79 +468,39 @@ class ShowScheduler:
         if last_show_name != show_name_2:
             next_block = self.get_next_episode_block(show_name_2)
             if next_block is not None:
-                block_df = self.commercial_injector_df[
-                    self.commercial_injector_df["BLOCK_ID"] == next_block["BLOCK_ID"]
-                ]
-                final_df = pd.concat(
-                    [final_df, block_df[["FULL_FILE_PATH", "BLOCK_ID"]].assign(Code="")],
-                    ignore_index=True
-                )
+                schedule.extend(self._episode_rows(next_block["BLOCK_ID"]))
                 last_show_name = show_name_2
 
         # Append the NS2 row
-        final_df = pd.concat(
-            [final_df, pd.DataFrame([row[["FULL_FILE_PATH", "Code"]].to_dict()])],
-            ignore_index=True
-        )
+        schedule.append(self._bump_row(idx))
 
         # Next block for show_name_1, with possible intro deletion
         delete_intro = True
         next_block = self.get_next_episode_block(show_name_1)
         if next_block is not None:
-            block_df = self.commercial_injector_df[
-                self.commercial_injector_df["BLOCK_ID"] == next_block["BLOCK_ID"]
-            ]
+            block_rows = self._episode_rows(next_block["BLOCK_ID"])
             if delete_intro:
-                block_df = block_df.iloc[1:]
+                block_rows = block_rows[1:]
                 delete_intro = False
-            final_df = pd.concat(
-                [final_df, block_df[["FULL_FILE_PATH", "BLOCK_ID"]].assign(Code="")],
-                ignore_index=True
-            )
+            schedule.extend(block_rows)
             last_show_name = show_name_1
 
-        return final_df, last_show_name, delete_intro
-
-    def _attempt_interweave(self, idx, final_df, last_show_name, shows):
-        """
-        Attempt to handle "interweaving" if the next row's first show differs
-        from the last_show_name. This logic appends a blank row to final_df in some cases,
-        preserving the original intent of spacing or boundary between transitions.
-        """
-        if idx < len(self.decoded_df) - 1:
-            next_row = self.decoded_df.iloc[idx + 1]
-            next_code = next_row["Code"] or ""
-            next_shows = next_row["shows"]
-            # Insert a break if the upcoming show is different and there's no direct handoff
-            if (
-                next_shows[0] != last_show_name
-                and not (
-                    ("-NS3" in next_code and next_shows[0] == shows[-1])
-                    or ("-NS2" in next_code and last_show_name == next_shows[-1])
-                )
-            ):
-                final_df = pd.concat([final_df], ignore_index=True)
-        return final_df
+        return last_show_name, delete_intro
 
-    def _insert_episode_block(self, final_df, show, delete_intro, last_bump_for_show):
+    def _insert_episode_block(self, schedule, show, delete_intro, last_bump_for_show):
         """
-        Insert the next episode block for 'show' into final_df.
+        Append the next episode block for 'show' to the schedule.
         If delete_intro is True, remove the first row of the block (the intro).
         """
         next_block = self.get_next_episode_block(show)
         if next_block is not None:
-            block_df = self.commercial_injector_df[
-                self.commercial_injector_df["BLOCK_ID"] == next_block["BLOCK_ID"]
-            ]
-            if delete_intro and not block_df.empty:
-                block_df = block_df.iloc[1:]
+            block_rows = self._episode_rows(next_block["BLOCK_ID"])
+            if delete_intro and block_rows:
+                block_rows = block_rows[1:]
                 delete_intro = False
-            final_df = pd.concat(
-                [final_df, block_df[["FULL_FILE_PATH", "BLOCK_ID"]].assign(Code="")],
-                ignore_index=True
-            )
-            last_bump_for_show[show] = final_df.index[-1]
-        return final_df, delete_intro
+            schedule.extend(block_rows)
+            last_bump_for_show[show] = len(schedule) - 1
+        return delete_intro
 
     #####################################################
     #         GETTING & INSERTING EPISODE BLOCKS        #
@@ -491,31 +508,32 @@ class ShowScheduler:
 
     def get_next_episode_block(self, show):
         """
-        Return the next episode block for the specified show, taking
-        into account the last used episode block if continuing. If
-        reuse_episode_blocks is True and we've exhausted new blocks,
+        Return the first row of the next episode block for the specified show,
+        taking into account the last used episode block if continuing. The next
+        block is the first one in table order whose BLOCK_ID sorts after the last
+        used one. If reuse_episode_blocks is True and we've exhausted new blocks,
         start over from the beginning.
         """
-        show_df = self.commercial_injector_df[self.commercial_injector_df["show_name"] == show]
-        if show_df.empty:
+        if show not in self._show_blocks:
             print(f"Warning: No episode blocks found for show {show}.")
             return None
+        first_rows, block_ids, earliest = self._show_blocks[show]
 
         if show in self.last_used_episode_block:
             last_block_id = self.last_used_episode_block[show]
-            next_blocks = show_df[show_df["BLOCK_ID"] > last_block_id]
-            if next_blocks.empty:
+            position = bisect.bisect_right(block_ids, last_block_id)
+            if position == len(block_ids):
                 if self.reuse_episode_blocks:
                     print(f"No more new episode blocks for show {show}. Reusing from the beginning.")
-                    next_block = show_df.iloc[0]
+                    next_block = next(iter(first_rows.values()))
                 else:
                     print(f"No more new episode blocks for show {show}. Skipping further scheduling.")
                     self.shows_with_no_more_blocks.add(show)
                     return None
             else:
-                next_block = next_blocks.iloc[0]
+                next_block = first_rows[earliest[position]]
         else:
-            next_block = show_df.iloc[0]
+            next_block = next(iter(first_rows.values()))
 
         self.last_used_episode_block[show] = next_block["BLOCK_ID"]
         return next_block
@@ -530,15 +548,15 @@ class ShowScheduler:
     #           NS3 SPECIAL INDEX HANDLING             #
     #####################################################
 
-    def get_ns3_special_indices(self, final_df):
+    def get_ns3_special_indices(self, schedule):
         """
-        Find indices of rows in final_df that end with -NS3 after a row that
+        Find indices of rows in the schedule that end with -NS3 after a row that
         ends with -NS2, and they share the same show code. This is used for
         specialized logic to rearrange certain bumps.
         """
         ns3_special_indices = []
         rows_with_codes = [
-            (idx, row["Code"]) for idx, row in final_df.iterrows() if row["Code"] and row["Code"].strip() != ""
+            (idx, row["Code"]) for idx, row in enumerate(schedule) if row["Code"] and row["Code"].strip() != ""
         ]
 
         for i in range(len(rows_with_codes) - 1):
@@ -552,36 +570,32 @@ class ShowScheduler:
                     ns3_special_indices.append(next_idx)
         return ns3_special_indices
 
-    def adjust_final_df_based_on_ns3_indices(self, final_df):
+    def adjust_schedule_based_on_ns3_indices(self, schedule):
         """
-        Adjust final_df based on the special indices found by get_ns3_special_indices
+        Adjust the schedule based on the special indices found by get_ns3_special_indices
         by swapping rows or removing rows as needed.
         """
         if not self.apply_ns3_logic:
-            return final_df
+            return schedule
 
-        self.ns3_special_indices = self.get_ns3_special_indices(final_df)
+        self.ns3_special_indices = self.get_ns3_special_indices(schedule)
 
         # Attempt a simplistic approach to reordering or removing
         for index in self.ns3_special_indices:
-            if (index >= 2) and (index < len(final_df)):
+            if (index >= 2) and (index < len(schedule)):
                 # Swap the row at index with the row at index-2
-                final_df.iloc[index - 2], final_df.iloc[index] = (
-                    final_df.iloc[index].copy(),
-                    final_df.iloc[index - 2].copy()
-                )
+                schedule[index - 2], schedule[index] = schedule[index], schedule[index - 2]
             else:
                 print(f"Skipping index {index} as it leads to out-of-bounds index {index - 2}")
 
         # Remove the swapped rows to handle partial transitions
         for index in sorted(self.ns3_special_indices, reverse=True):
-            if index < len(final_df):
-                final_df.drop(index, inplace=True)
+            if index < len(schedule):
+                del schedule[index]
             else:
                 print(f"Skipping index {index} as it is out-of-bounds")
 
-        final_df.reset_index(drop=True, inplace=True)
-        return final_df
+        return schedule
 
     #####################################################
     #        UNUSED SHOWS & ANCHOR ROWS                 #
@@ -590,99 +604,105 @@ class ShowScheduler:
     def get_unused_shows(self):
         """
         Identify and return DataFrame rows from commercial_injector_df
-        that correspond to shows not used in final_df (based on decoded_df).
+        that correspond to shows not used in the schedule (based on decoded_df).
         """
         used_shows = set()
-        for _, row in self.decoded_df.iterrows():
-            used_shows.update(row["shows"])
+        for shows in self.decoded_df["shows"]:
+            used_shows.update(shows)
 
         all_shows = set(self.commercial_injector_df["show_name"].unique())
         unused_shows = all_shows - used_shows
         return self.commercial_injector_df[self.commercial_injector_df["show_name"].isin(unused_shows)]
 
-    def locate_lines_of_fourth_unique_block_id(self, final_df):
+    def locate_lines_of_fourth_unique_block_id(self, schedule):
         """
-        Locate the row(s) in final_df just before the fourth unique BLOCK_ID
+        Locate the row(s) in the schedule just before the fourth unique BLOCK_ID
         within any sequence. This is used to anchor insertion of additional shows.
         """
         anchor_rows = []
-        for idx, row in final_df.iterrows():
-            if re.search(r"NS3", str(row["Code"])):
-                # Find the start and end indices for the section containing the NS3 code
-                start_idx = idx
-                start_ns_code = None
-                while start_idx >= 0:
-                    if re.search(r"NS\d", str(final_df.iloc[start_idx]["Code"])):
-                        start_ns_code = final_df.iloc[start_idx]["Code"]
-                        break
-                    start_idx -= 1
-
+        codes = [str(row["Code"]) for row in schedule]
+        for idx, code in enumerate(codes):
+            if "NS3" in code:
+                # The section runs from the NS3 row up to the next row with a different NS code
+                start_ns_code = schedule[idx]["Code"]
                 end_idx = idx
-                end_ns_code = None
-                while end_idx < len(final_df):
-                    if (
-                        re.search(r"NS\d", str(final_df.iloc[end_idx]["Code"]))
-                        and final_df.iloc[end_idx]["Code"] != start_ns_code
-                    ):
-                        end_ns_code = final_df.iloc[end_idx]["Code"]
+                while end_idx < len(schedule):
+                    if re.search(r"NS\d", codes[end_idx]) and schedule[end_idx]["Code"] != start_ns_code:
                         break
                     end_idx += 1
 
-                section_df = final_df.iloc[start_idx:end_idx]
                 unique_blocks = []
-                for block_id in section_df["BLOCK_ID"].dropna():
-                    if block_id not in unique_blocks:
+                first_lines = {}
+                for line in range(idx, end_idx):
+                    block_id = schedule[line]["BLOCK_ID"]
+                    if block_id is not None and block_id not in first_lines:
+                        first_lines[block_id] = line
                         unique_blocks.append(block_id)
+                        if len(unique_blocks) == 4:
+                            break
 
                 # If there's a fourth unique block, anchor above it
                 if len(unique_blocks) >= 4:
-                    fourth_unique_block_id = unique_blocks[3]
-                    lines_of_fourth_block = section_df.index[
-                        section_df["BLOCK_ID"] == fourth_unique_block_id
-                    ].tolist()
-
-                    if lines_of_fourth_block:
-                        anchor_row_index = lines_of_fourth_block[0] - 1
-                        if anchor_row_index >= 0:
-                            anchor_row = final_df.iloc[anchor_row_index]
-                            anchor_rows.append(anchor_row)
+                    anchor_row_index = first_lines[unique_blocks[3]] - 1
+                    if anchor_row_index >= 0:
+                        anchor_rows.append(schedule[anchor_row_index])
         return anchor_rows
 
-    def add_unused_shows_to_schedule(self, final_df, unused_shows_df, anchor_rows):
+    def add_unused_shows_to_schedule(self, schedule, unused_shows_df, anchor_rows):
         """
         For each anchor row, pick a random unused show, insert its next block
-        after the anchor.
+        after the first row of the schedule equal to the anchor.
+
+        The insertions are collected first and applied in one pass over the schedule.
         """
-        for anchor_row in anchor_rows:
-            anchor_idx_list = final_df.index[
-                (final_df["FULL_FILE_PATH"] == anchor_row["FULL_FILE_PATH"])
-                & (final_df["Code"] == anchor_row["Code"])
-                & (final_df["BLOCK_ID"] == anchor_row["BLOCK_ID"])
-            ].tolist()
+        first_positions = {}
+        for position, row in enumerate(schedule):
+            first_positions.setdefault(self._row_key(row), position)
 
-            if not anchor_idx_list:
+        unused_show_names = unused_shows_df["show_name"].unique()
+        insertions = {}
+        for anchor_row in anchor_rows:
+            if anchor_row["BLOCK_ID"] is None:
+                # Bump rows have no BLOCK_ID to match on
+                continue
+            anchor_idx = first_positions.get(self._row_key(anchor_row))
+            if anchor_idx is None:
                 continue
 
-            anchor_idx = anchor_idx_list[0]
-            space = anchor_idx + 1
-            selected_show = random.choice(unused_shows_df["show_name"].unique())
+            selected_show = random.choice(unused_show_names)
             next_block = self.get_next_episode_block(selected_show)
             if next_block is not None:
-                selected_block_df = self.commercial_injector_df[
-                    self.commercial_injector_df["BLOCK_ID"] == next_block["BLOCK_ID"]
+                # Drop priority, show_name columns if present
+                block_rows = [
+                    {column: value for column, value in record.items() if column not in ("Priority", "show_name")}
+                    for record in self._block_rows[next_block["BLOCK_ID"]]
                 ]
-                final_df = pd.concat(
-                    [final_df.iloc[:space], selected_block_df, final_df.iloc[space:]],
-                    ignore_index=True
-                )
+                # Each block goes right after its anchor, ahead of blocks added there before
+                insertions.setdefault(anchor_idx, []).insert(0, block_rows)
 
-                # Drop priority, show_name columns if present
-                if "Priority" in final_df.columns:
-                    final_df.drop(columns=["Priority", "show_name"], inplace=True, errors="ignore")
-                else:
-                    final_df.drop(columns=["show_name"], inplace=True, errors="ignore")
+        if not insertions:
+            return schedule
+
+        new_schedule = []
+        for position, row in enumerate(schedule):
+            new_schedule.append(row)
+            for block_rows in insertions.get(position, ()):
+                new_schedule.extend(block_rows)
+        return new_schedule
+
+    @staticmethod
+    def _row_key(row):
+        return (row["FULL_FILE_PATH"], row["Code"], row["BLOCK_ID"])
 
-        return final_df
+    def schedule_to_dataframe(self, schedule):
+        """
+        Materialize the schedule rows as a DataFrame with SCHEDULE_COLUMNS first,
+        followed by any other columns the added unused show rows carry.
+        """
+        columns = dict.fromkeys(self.SCHEDULE_COLUMNS)
+        for row in schedule:
+            columns.update(dict.fromkeys(row))
+        return pd.DataFrame(schedule, columns=list(columns))
 
     #####################################################
     #            SAVE & LOAD BLOCK ID USAGE             #
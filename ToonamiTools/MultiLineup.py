@@ -1,163 +1,400 @@
 import pandas as pd
-import random
+import numpy as np
+from collections import Counter
 import config
 from API.utils import get_db_manager
 from API.utils.ErrorManager import get_error_manager
 
 
+class BumpChainPlanner:
+    """
+    Orders bumps into as few chains as possible by walking Eulerian trails.
+
+    Every bump is an edge of a directed multigraph over show names, from the
+    show it continues from (its entry) to the show it announces next (its
+    exit). A bump follows on from the one before it when its entry is that
+    bump's exit, so a chain of bumps is a trail through the graph. Joining a
+    virtual show to every show with more bumps leaving than entering it, from
+    every show with more entering than leaving it, and to one show of every
+    balanced component makes the graph Eulerian. Its Eulerian circuit, split
+    wherever it passes the virtual show, is the smallest number of chains
+    covering every bump. Hierholzer's algorithm finds the circuit in time
+    linear in the number of bumps.
+
+    Any order of taking a show's edges gives a circuit with the fewest
+    chains, so the walk is free to prefer some bumps: those featuring one of
+    the last recent_limit shows announced before them are recent_weight
+    (between 0 and 1) times as likely to be taken next. The recent shows are
+    kept in a window updated as the walk goes, and an edge is picked by
+    rejection sampling, so preferring bumps keeps the walk linear.
+    """
+
+    def __init__(self, rng, recent_limit=0, recent_weight=1.0):
+        self.rng = rng
+        self.recent_limit = recent_limit
+        self.recent_weight = recent_weight
+
+    def plan(self, entries, exits, featured=None):
+        """
+        Split bumps into chains, each bump following on from the one before it.
+
+        Args:
+            entries: Show each bump continues from, None if it can't follow any bump
+            exits: Show each bump announces next, None if no bump can follow it
+            featured: Shows featured in each bump, weighted against when announced recently
+
+        Returns:
+            list: Chains of bump positions, together holding every bump once
+        """
+        # Bumps that can't follow or be followed get an end of the graph to themselves
+        edges = [
+            (
+                entry if entry is not None else ('entry', position),
+                exit if exit is not None else ('exit', position)
+            )
+            for position, (entry, exit) in enumerate(zip(entries, exits))
+        ]
+        adjacency = {}
+        balance = {}
+        parent = {}
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for position, (source, target) in enumerate(edges):
+            for node in (source, target):
+                if node not in parent:
+                    parent[node] = node
+                    adjacency[node] = []
+                    balance[node] = 0
+            adjacency[source].append((position, target))
+            balance[source] += 1
+            balance[target] -= 1
+            parent[find(source)] = find(target)
+
+        components = {}
+        for node in adjacency:
+            components.setdefault(find(node), []).append(node)
+
+        # The virtual show's edges are the jumps between chains, they carry no bump
+        virtual = ('virtual',)
+        adjacency[virtual] = []
+        for nodes in components.values():
+            if all(balance[node] == 0 for node in nodes):
+                adjacency[virtual].append((None, nodes[0]))
+                adjacency[nodes[0]].append((None, virtual))
+                continue
+            for node in nodes:
+                if balance[node] > 0:
+                    adjacency[virtual].extend([(None, node)] * balance[node])
+                elif balance[node] < 0:
+                    adjacency[node].extend([(None, virtual)] * -balance[node])
+
+        # Walk the edges in random order, so chains differ between seeds
+        for node, node_edges in adjacency.items():
+            adjacency[node] = [node_edges[i] for i in self.rng.permutation(len(node_edges))]
+
+        # Edges taken from the top of the stack end up right after the stack's path in the circuit,
+        # so the shows last announced before them are the last bump targets on the stack
+        weighted = featured is not None and self.recent_limit > 0
+        announced = []
+        recent = Counter()
+
+        def announce(show):
+            announced.append(show)
+            recent[show] += 1
+            if len(announced) > self.recent_limit:
+                self._forget(recent, announced[-self.recent_limit - 1])
+
+        def unannounce():
+            self._forget(recent, announced.pop())
+            if len(announced) >= self.recent_limit:
+                recent[announced[-self.recent_limit]] += 1
+
+        circuit = []
+        stack = [(virtual, None)]
+        while stack:
+            node, position = stack[-1]
+            node_edges = adjacency[node]
+            if node_edges:
+                if weighted and recent:
+                    self._prefer_fresh_edge(node_edges, recent, featured)
+                position, target = node_edges.pop()
+                stack.append((target, position))
+                if weighted and position is not None and not isinstance(target, tuple):
+                    announce(target)
+            else:
+                stack.pop()
+                circuit.append(position)
+                if weighted and position is not None and not isinstance(node, tuple):
+                    unannounce()
+        circuit.reverse()
+
+        chains = []
+        chain = []
+        for position in circuit:
+            if position is not None:
+                chain.append(position)
+            elif chain:
+                chains.append(chain)
+                chain = []
+        return chains
+
+    @staticmethod
+    def _forget(recent, show):
+        recent[show] -= 1
+        if not recent[show]:
+            del recent[show]
+
+    def _prefer_fresh_edge(self, node_edges, recent, featured):
+        """Move the edge to take next to the end of a show's edges, picked by weight."""
+        # A random edge featuring a recent show is only kept with probability recent_weight,
+        # which picks every edge in proportion to its weight in a constant number of tries on average
+        while True:
+            chosen = self.rng.integers(len(node_edges))
+            position = node_edges[chosen][0]
+            if position is None or not any(show in recent for show in featured[position]) \
+                    or self.rng.random() < self.recent_weight:
+                break
+        node_edges[chosen], node_edges[-1] = node_edges[-1], node_edges[chosen]
+
+
 class Multilineup:
-    def __init__(self):
+    """
+    Reorders the multibump tables so each bump announces the show the next one starts with.
+
+    A table is read once and reordered in memory, then written in one insert.
+    With MULTILINEUP_PLANNER set to "graph" the whole order is planned up front
+    by BumpChainPlanner, with "greedy" every bump is picked after the one
+    before it, the unused bumps being kept in indexes keyed by the show names
+    and PLACEMENT_2 a pick is looked up by. Both weight against bumps featuring
+    a recently announced show. Random picks come from a NumPy
+    generator seeded with MULTILINEUP_SEED for every table, so a fixed seed
+    always gives the same order. The number of dead ends of each table, bumps
+    that don't follow on from the show the bump before them announced, is kept
+    in dead_ends.
+    """
+
+    # Bumps featuring one of the last few announced shows are half as likely to be picked
+    RECENT_SHOWS_LIMIT = 5
+    RECENT_SHOW_WEIGHT = 0.5
+
+    def __init__(self, seed=None):
         self.db_manager = get_db_manager()
         self.error_manager = get_error_manager()
+        self.seed = config.MULTILINEUP_SEED if seed is None else seed
+        self.rng = np.random.default_rng(self.seed)
         self.next_show_name = None
         self.used_rows = set()
         self.recent_shows = []
-        
-    def weighted_selection(self, df):
-        weights = []
-        for _, row in df.iterrows():
-            if row["SHOW_NAME_1"] in self.recent_shows or row["SHOW_NAME_2"] in self.recent_shows:
-                weights.append(0.5)  # Lower weight if show is in recent_shows
-            else:
-                weights.append(1)
-
-        # Normalize weights
-        total_weight = sum(weights)
-        normalized_weights = [w / total_weight for w in weights]
+        self.dead_ends = {}
 
-        return df.sample(n=1, weights=normalized_weights)
+        # The table being reordered, and its unused bumps indexed by row position
+        self.df = None
+        self._show_name_1 = []
+        self._show_name_2 = []
+        self._show_name_3 = []
+        self._placement = []
+        self._entry = []
+        self._exit = []
+        self._unused = None
+        self._unused_by_show_1 = Counter()
+        self._next_by_show_1 = {}
+        self._by_placement_show_2 = {}
+        self._order = []
 
-    def unused_bumps(self, table_name):
+    def load_table(self, table_name):
+        """Read a bump table and index all of its bumps as unused."""
         with self.db_manager.transaction() as conn:
             df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
+        self.df = df
+        self._show_name_1 = df['SHOW_NAME_1'].tolist()
+        self._show_name_2 = df['SHOW_NAME_2'].tolist()
+        self._show_name_3 = df['SHOW_NAME_3'].tolist()
+        self._placement = df['PLACEMENT_2'].tolist()
+        # A bump follows on from the one before it when its entry show is that bump's exit show
+        self._entry = [
+            self._known(show_name_1 if placement == 'next' else show_name_2 if placement in ('next from', 'from') else None)
+            for placement, show_name_1, show_name_2 in zip(self._placement, self._show_name_1, self._show_name_2)
+        ]
+        self._exit = [
+            self._known(show_name_3 if placement == 'next' else show_name_1)
+            for placement, show_name_1, show_name_3 in zip(self._placement, self._show_name_1, self._show_name_3)
+        ]
+        self._unused = np.ones(len(df), dtype=bool)
+        self._unused_by_show_1 = Counter(self._show_name_1)
+        self._next_by_show_1 = {}
+        self._by_placement_show_2 = {}
+        self._order = []
+        # Dicts keep the bumps of each key in table order and drop used ones in constant time
+        for position, placement in enumerate(self._placement):
+            if placement == 'next':
+                self._next_by_show_1.setdefault(self._show_name_1[position], {})[position] = None
+            elif placement in ('next from', 'from'):
+                key = (placement, self._show_name_2[position])
+                self._by_placement_show_2.setdefault(key, {})[position] = None
+
+    @staticmethod
+    def _known(show_name):
+        return None if pd.isna(show_name) else show_name
+
+    def plan_chains(self):
+        """Return the loaded table's bumps as the fewest chains of bumps following on from each other."""
+        featured = [
+            {show for show in shows if not pd.isna(show)}
+            for shows in zip(self._show_name_1, self._show_name_2)
+        ]
+        planner = BumpChainPlanner(self.rng, self.RECENT_SHOWS_LIMIT, self.RECENT_SHOW_WEIGHT)
+        return planner.plan(self._entry, self._exit, featured)
+
+    def count_dead_ends(self, order):
+        """Count the bumps of an order that don't follow on from the show the bump before them announced."""
+        return sum(
+            1 for previous, position in zip(order, order[1:])
+            if self._entry[position] is None or self._entry[position] != self._exit[previous]
+        )
+
+    def weighted_selection(self, positions):
+        """Pick one of the given bump positions, bumps featuring a recent show having a lower weight."""
+        recent = set(self.recent_shows)
+        weights = np.array([
+            self.RECENT_SHOW_WEIGHT
+            if self._show_name_1[p] in recent or self._show_name_2[p] in recent else 1.0
+            for p in positions
+        ])
+        return positions[self.rng.choice(len(positions), p=weights / weights.sum())]
+
+    def unused_bumps(self):
+        """Return the bumps of the loaded table that haven't been placed yet."""
+        return self.df[self._unused]
 
-        unused_df = df.drop(list(self.used_rows), errors='ignore')
-        return unused_df
-    
-    def get_next_row(self, table_name):
-        df = self.unused_bumps(table_name)
+    def get_next_row(self):
+        """Return the position of the bump to place next, without marking it used."""
         next_row = None
         last_resort_row = None
         if self.next_show_name:
             # Get all possible next rows
-            possible_next_rows = df[(df['PLACEMENT_2'] == 'next') & (df['SHOW_NAME_1'] == self.next_show_name)]
-            if not possible_next_rows.empty:
-                # Get the count of SHOW_NAME_3 for each possible next row
-                show_name_3_counts = possible_next_rows['SHOW_NAME_3'].value_counts()
-                if not show_name_3_counts.empty:
-                    # Sort SHOW_NAME_3 by count
-                    sorted_show_name_3 = show_name_3_counts.sort_values().index.tolist()
-                    for show_name_3 in sorted_show_name_3:
-                        # Check if there is at least one bump with SHOW_NAME_1 in the remaining bumps
-                        if df[df['SHOW_NAME_1'] == show_name_3].shape[0] > 0:
-                            next_row = possible_next_rows[possible_next_rows['SHOW_NAME_3'] == show_name_3]
-                            if not next_row.empty:
-                                next_row = self.weighted_selection(next_row)
-                                break
-                        elif last_resort_row is None:
-                            # Store the first available bump as a last resort
-                            last_resort_row = pd.DataFrame(possible_next_rows[possible_next_rows['SHOW_NAME_3'] == show_name_3].iloc[0]).transpose()
-            if next_row is None:
-                possible_next_rows = df[(df['PLACEMENT_2'] == 'next from') & (df['SHOW_NAME_2'] == self.next_show_name)]
-                if not possible_next_rows.empty:
-                    next_row = self.weighted_selection(possible_next_rows)
-            if next_row is None:
-                possible_next_rows = df[(df['PLACEMENT_2'] == 'from') & (df['SHOW_NAME_2'] == self.next_show_name)]
-                if not possible_next_rows.empty:
-                    next_row = self.weighted_selection(possible_next_rows)
-        if next_row is None or next_row.empty:
+            possible_next_rows = self._next_by_show_1.get(self.next_show_name)
+            if possible_next_rows:
+                rows_by_show_name_3 = {}
+                for position in possible_next_rows:
+                    show_name_3 = self._show_name_3[position]
+                    if not pd.isna(show_name_3):
+                        rows_by_show_name_3.setdefault(show_name_3, []).append(position)
+                # Try the SHOW_NAME_3 with the fewest next rows first, ties in table order
+                for show_name_3 in sorted(rows_by_show_name_3, key=lambda show: len(rows_by_show_name_3[show])):
+                    # Check if there is at least one bump with SHOW_NAME_1 in the remaining bumps
+                    if self._unused_by_show_1[show_name_3] > 0:
+                        next_row = self.weighted_selection(rows_by_show_name_3[show_name_3])
+                        break
+                    elif last_resort_row is None:
+                        # Store the first available bump as a last resort
+                        last_resort_row = rows_by_show_name_3[show_name_3][0]
+            for placement in ('next from', 'from'):
+                if next_row is not None:
+                    break
+                possible_next_rows = self._by_placement_show_2.get((placement, self.next_show_name))
+                if possible_next_rows:
+                    next_row = self.weighted_selection(list(possible_next_rows))
+        if next_row is None:
             if last_resort_row is not None:
                 # Use the last resort row if no better bump was found
                 next_row = last_resort_row
-
             else:
-                next_row = self.weighted_selection(df.sample(n=1))
-        index = next_row.index[0]
-        if next_row['PLACEMENT_2'].values[0] == 'next':
-            self.next_show_name = next_row['SHOW_NAME_3'].values[0]
+                unused_positions = np.flatnonzero(self._unused)
+                next_row = int(unused_positions[self.rng.integers(len(unused_positions))])
+        return next_row
+
+    def use_row(self, position):
+        """Place a bump next in the reordered table and follow on from the show it announces."""
+        self._unused[position] = False
+        self._unused_by_show_1[self._show_name_1[position]] -= 1
+        if self._placement[position] == 'next':
+            self._next_by_show_1[self._show_name_1[position]].pop(position)
+            self.next_show_name = self._show_name_3[position]
         else:
-            self.next_show_name = next_row['SHOW_NAME_1'].values[0]
-        self.used_rows.add(index)
-        return next_row, index
+            if self._placement[position] in ('next from', 'from'):
+                self._by_placement_show_2[(self._placement[position], self._show_name_2[position])].pop(position)
+            self.next_show_name = self._show_name_1[position]
+        self.used_rows.add(position)
+        self._order.append(position)
 
-    def write_to_table(self, next_row, table_name):
+        self.recent_shows.append(self.next_show_name)
+        if len(self.recent_shows) > self.RECENT_SHOWS_LIMIT:
+            self.recent_shows.pop(0)
+
+    def write_to_table(self, df, table_name):
         try:
             with self.db_manager.transaction() as conn:
-                next_row.to_sql(table_name, conn, if_exists='append')
+                df.to_sql(table_name, conn, if_exists='replace')
         except Exception as e:
             self.error_manager.send_error_level(
                 source="Multilineup",
                 operation="write_to_table",
-                message=f"Failed to save reordered bump to {table_name}",
+                message=f"Failed to save reordered bumps to {table_name}",
                 details=str(e),
-                suggestion="There was an error while trying to save the bump to the database. Please check that the database still exists and is accessible."
+                suggestion="There was an error while trying to save the bumps to the database. Please check that the database still exists and is accessible."
             )
             raise
 
-        if next_row['PLACEMENT_2'].values[0] == 'next':
-            self.next_show_name = next_row['SHOW_NAME_3'].values[0]
-        else:
-            self.next_show_name = next_row['SHOW_NAME_1'].values[0]
-
-        self.recent_shows.append(self.next_show_name)
-        if len(self.recent_shows) > 5:  # Limit the recent shows to last 5
-            self.recent_shows.pop(0)
-
-    def find_optimal_first_bump(self, df):
-        show_name_1_counts = df['SHOW_NAME_1'].value_counts()
-        show_name_3_counts = df['SHOW_NAME_3'].value_counts()
-        optimal_first_bump = None
+    def find_optimal_first_bump(self):
+        """Return the position of the bump the loaded table is best started with, None if it is empty."""
+        if not len(self.df):
+            print("Warning: Empty table passed to find_optimal_first_bump")
+            return None
+        show_name_1_counts = Counter(show for show in self._show_name_1 if not pd.isna(show))
+        show_name_3_counts = Counter(show for show in self._show_name_3 if not pd.isna(show))
+        # Rows where SHOW_NAME_3 is None are skipped
+        candidates = [
+            (position, show_name_1, show_name_3)
+            for position, (show_name_1, show_name_3) in enumerate(zip(self._show_name_1, self._show_name_3))
+            if not pd.isna(show_name_3)
+        ]
 
         # Situation 1: SHOW_NAME_1 is no other bump's SHOW_NAME_3 and SHOW_NAME_3 is another bump's SHOW_NAME_1
-        for _, row in df.iterrows():
-            if pd.isna(row['SHOW_NAME_3']):  # Skip rows where SHOW_NAME_3 is None
-                continue
-            if show_name_3_counts.get(row['SHOW_NAME_1'], 0) == 0 and show_name_1_counts.get(row['SHOW_NAME_3'], 0) > 0:
-                optimal_first_bump = df.loc[[row.name]]  # Get a DataFrame containing only this row
-                break
+        for position, show_name_1, show_name_3 in candidates:
+            if show_name_3_counts[show_name_1] == 0 and show_name_1_counts[show_name_3] > 0:
+                return position
 
         # Situation 2: SHOW_NAME_1 is one more than bumps with that SHOW_NAME_3 and SHOW_NAME_3 is another bump's SHOW_NAME_1
-        if optimal_first_bump is None:
-            for _, row in df.iterrows():
-                if pd.isna(row['SHOW_NAME_3']):  # Skip rows where SHOW_NAME_3 is None
-                    continue
-                if show_name_3_counts.get(row['SHOW_NAME_1'], 0) + 1 == show_name_1_counts.get(row['SHOW_NAME_1'], 0) and show_name_1_counts.get(row['SHOW_NAME_3'], 0) > 0:
-                    optimal_first_bump = df.loc[[row.name]]  # Get a DataFrame containing only this row
-                    break
+        for position, show_name_1, show_name_3 in candidates:
+            if show_name_3_counts[show_name_1] + 1 == show_name_1_counts[show_name_1] and show_name_1_counts[show_name_3] > 0:
+                return position
 
         # Situation 3: No such bump as in situation 1 or new situation exists, but a bump where SHOW_NAME_1 is multiple other bump's SHOW_NAME_3
-        if optimal_first_bump is None:
-            for _, row in df.iterrows():
-                if pd.isna(row['SHOW_NAME_3']):  # Skip rows where SHOW_NAME_3 is None
-                    continue
-                if show_name_3_counts.get(row['SHOW_NAME_1'], 0) > 1:
-                    optimal_first_bump = df.loc[[row.name]]  # Get a DataFrame containing only this row
-                    break
+        for position, show_name_1, show_name_3 in candidates:
+            if show_name_3_counts[show_name_1] > 1:
+                return position
 
         # If neither situation 1, situation 2 nor situation 3 is met, return the first bump
-        if optimal_first_bump is None:
-            if df.empty:
-                print("Warning: Empty dataframe passed to find_optimal_first_bump")
-                return pd.DataFrame()
-            optimal_first_bump = df.iloc[[0]]
-
-        return optimal_first_bump
+        return 0
 
     def reorder_table(self, table_name):
-        self.used_rows = set()  # Resetting used rows for the new table
+        # Resetting the state for the new table, so each table's order only depends on the seed
+        self.used_rows = set()
+        self.next_show_name = None
+        self.recent_shows = []
+        self.rng = np.random.default_rng(self.seed)
         reordered_table_name = table_name + '_reordered'
         print(f"Starting reordering for {table_name}")
-        unused_df = self.unused_bumps(table_name)
-        first_bump = self.find_optimal_first_bump(unused_df)
-        if first_bump is not None and not first_bump.empty:
-            self.write_to_table(first_bump, reordered_table_name)
-            self.used_rows.add(first_bump.index[0]) 
-            unused_df = self.unused_bumps(table_name)  # Refresh unused rows
-        while not unused_df.empty:
-            next_row, index = self.get_next_row(table_name)
-            self.write_to_table(next_row, reordered_table_name)
-            unused_df = self.unused_bumps(table_name)  # Refresh unused rows
-        print(f"Finished reordering for {table_name}")
+        self.load_table(table_name)
+        if config.MULTILINEUP_PLANNER == 'graph':
+            for chain in self.plan_chains():
+                for position in chain:
+                    self.use_row(position)
+        else:
+            first_bump = self.find_optimal_first_bump()
+            if first_bump is not None:
+                self.use_row(first_bump)
+            while len(self._order) < len(self.df):
+                self.use_row(self.get_next_row())
+        self.dead_ends[table_name] = self.count_dead_ends(self._order)
+        if self._order:
+            self.write_to_table(self.df.iloc[self._order], reordered_table_name)
+        print(f"Finished reordering for {table_name}: {len(self._order)} bumps, {self.dead_ends[table_name]} dead ends")
 
     def reorder_all_tables(self):
         for i in range(10):
@@ -166,4 +403,4 @@ class Multilineup:
                 self.reorder_table(table_name)
                 print(f"Table {table_name} is getting reordered.")
             except pd.errors.DatabaseError:
-                print(f"Table {table_name} does not exist. Moving to the next table.")
\ No newline at end of file
+                print(f"Table {table_name} does not exist. Moving to the next table.")
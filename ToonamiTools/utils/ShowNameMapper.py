@@ -5,14 +5,27 @@ This module consolidates all show name mapping logic that was previously
 duplicated across multiple ToonamiTools modules.
 """
 import re
+from functools import lru_cache
 from typing import Dict, List, Set
 from unidecode import unidecode
 from config import show_name_mapping, show_name_mapping_2, show_name_mapping_3
 
 
 class ShowNameMapper:
-    """Handles all show name normalization and mapping operations."""
-    
+    """
+    Handles all show name normalization and mapping operations.
+
+    The mappings are indexed once at construction: lowercase lookup dicts for
+    map(), precompiled replacements for apply_via_replacement() and
+    apply_to_filename(), and reverse indexes from mapped names back to their
+    keys. map(), clean() and normalize_and_map() are memoized in bounded LRU
+    caches, since the same names are normalized over and over across the
+    pipeline. The config mappings are not expected to change at runtime.
+    """
+
+    # Number of results kept by each memoized method
+    CACHE_SIZE = 16384
+
     def __init__(self):
         """Initialize with show name mappings from config."""
         self.mapping_1 = show_name_mapping
@@ -29,6 +42,58 @@ class ShowNameMapper:
         for mapping in [self.mapping_1, self.mapping_2, self.mapping_3]:
             for k, v in mapping.items():
                 self._combined_lower[k.lower()] = v  # Keep original case of mapped value
+
+        mappings = [self.mapping_1, self.mapping_2, self.mapping_3]
+        # Lowercase lookup of each mapping; as with a scan in key order, the first key wins
+        self._lookups = [self._lowercase_lookup(mapping) for mapping in mappings]
+        # Keys are replaced one after another, longest first, and later keys see what earlier
+        # replacements produced (mapping_2 relies on that to fix doubled words), so the order
+        # is kept and only the per-call sorting and compiling are done up front
+        self._replacements = [self._compile_replacements(mapping) for mapping in mappings]
+        self._filename_patterns = [
+            (re.compile(r'\b' + re.escape(old_name) + r'\b', re.IGNORECASE), new_name)
+            for old_name, new_name in sorted(
+                (item for mapping in mappings for item in mapping.items()),
+                key=lambda item: len(item[0]), reverse=True
+            )
+        ]
+        # Mapped names back to the keys that map to them
+        self._first_keys_by_value = {}
+        for key, value in self.mapping_1.items():
+            self._first_keys_by_value.setdefault(value, []).append(key)
+        self._items_by_lower_value = {}
+        for mapping in mappings:
+            for key, value in mapping.items():
+                self._items_by_lower_value.setdefault(value.lower(), []).append((key, value))
+
+        self._clean_cached = lru_cache(maxsize=self.CACHE_SIZE)(self._clean)
+        self._map_cached = lru_cache(maxsize=self.CACHE_SIZE)(self._map)
+        self._normalize_and_map_cached = lru_cache(maxsize=self.CACHE_SIZE)(self._normalize_and_map)
+
+    @staticmethod
+    def _lowercase_lookup(mapping: Dict[str, str]) -> Dict[str, str]:
+        lookup = {}
+        for key, value in mapping.items():
+            lookup.setdefault(key.lower(), value.lower())
+        return lookup
+
+    @staticmethod
+    def _compile_replacements(mapping: Dict[str, str]) -> List[tuple]:
+        """
+        Return (key, value, pattern) replacements in the order they are applied, lowercased.
+
+        Text is lowercase when it is replaced, so plain ASCII keys are replaced
+        with str.replace; pattern is only set where a case-insensitive regex
+        could match differently.
+        """
+        replacements = []
+        for key in sorted(mapping.keys(), key=len, reverse=True):
+            value = mapping[key].lower()
+            pattern = None
+            if not key.isascii() or '\\' in value:
+                pattern = re.compile(re.escape(key), re.IGNORECASE)
+            replacements.append((key.lower(), value, pattern))
+        return replacements
     
     # ========== CORE METHODS ==========
     
@@ -46,6 +111,9 @@ class ShowNameMapper:
         Returns:
             Cleaned text
         """
+        return self._clean_cached(text, mode)
+
+    def _clean(self, text: str, mode: str) -> str:
         if mode == 'standard':
             # Basic normalization (for toonamichecker)
             normalized = unidecode(text.lower())
@@ -95,33 +163,29 @@ class ShowNameMapper:
         Returns:
             Mapped show name in lowercase
         """
+        return self._map_cached(show_name, strategy)
+
+    def _map(self, show_name: str, strategy: str) -> str:
         # Always work with lowercase for consistency
         result = show_name.lower()
-        
+
         if strategy == 'all':
             # Apply mappings sequentially
-            for mapping in [self.mapping_1, self.mapping_2, self.mapping_3]:
-                for key, value in mapping.items():
-                    if key.lower() == result:
-                        result = value.lower()
-                        break
+            for lookup in self._lookups:
+                result = lookup.get(result, result)
             return result
-                
+
         elif strategy == 'first':
             # Only use first mapping
-            for key, value in self.mapping_1.items():
-                if key.lower() == result:
-                    return value.lower()
-            return result
-                
+            return self._lookups[0].get(result, result)
+
         elif strategy == 'first_match':
             # Check each mapping until match found
-            for mapping in [self.mapping_1, self.mapping_2, self.mapping_3]:
-                for key, value in mapping.items():
-                    if key.lower() == result:
-                        return value.lower()
+            for lookup in self._lookups:
+                if result in lookup:
+                    return lookup[result]
             return result
-                
+
         else:
             raise ValueError(f"Unknown mapping strategy: {strategy}")
     
@@ -159,17 +223,9 @@ class ShowNameMapper:
         """
         result = filename
         
-        # Sort by length (longest first) to handle overlapping names
-        all_mappings = []
-        for mapping in [self.mapping_1, self.mapping_2, self.mapping_3]:
-            all_mappings.extend(mapping.items())
-        
-        sorted_mappings = sorted(all_mappings, key=lambda x: len(x[0]), reverse=True)
-        
-        for old_name, new_name in sorted_mappings:
-            # Use word boundaries to ensure we only match complete words
-            pattern = r'\b' + re.escape(old_name) + r'\b'
-            result = re.sub(pattern, new_name, result, flags=re.IGNORECASE)
+        # Longest names first to handle overlapping names, matching whole words only
+        for pattern, new_name in self._filename_patterns:
+            result = pattern.sub(new_name, result)
         
         return result
     
@@ -187,13 +243,13 @@ class ShowNameMapper:
         result = text.lower()
         
         # Apply all mappings via replacement
-        for mapping in [self.mapping_1, self.mapping_2, self.mapping_3]:
-            sorted_keys = sorted(mapping.keys(), key=len, reverse=True)
-            for key in sorted_keys:
-                value = mapping[key]
-                # Replace case-insensitively
-                pattern = re.compile(re.escape(key), re.IGNORECASE)
-                result = pattern.sub(value.lower(), result)
+        for replacements in self._replacements:
+            for key, value, pattern in replacements:
+                if pattern is not None:
+                    # Replace case-insensitively
+                    result = pattern.sub(value, result)
+                elif key in result:
+                    result = result.replace(key, value)
         
         # Clean for matching after replacement - remove ALL special characters
         return self.clean(result, mode='matching')
@@ -221,8 +277,8 @@ class ShowNameMapper:
             prefixes.add(original_format)
         
         # Find all keys in mapping_1 that normalize to this show
-        for mapping_key, mapping_value in self.mapping_1.items():
-            if mapping_value == normalized_show and mapping_key != normalized_show:
+        for mapping_key in self._first_keys_by_value.get(normalized_show, ()):
+            if mapping_key != normalized_show:
                 # This key maps to our normalized show
                 key_format = self._non_alnum_pattern.sub('_', mapping_key).upper()
                 prefixes.add(key_format)
@@ -241,6 +297,9 @@ class ShowNameMapper:
         Returns:
             Normalized and mapped show name
         """
+        return self._normalize_and_map_cached(show_name)
+
+    def _normalize_and_map(self, show_name: str) -> str:
         # First normalize
         normalized = self.clean(show_name, mode='standard')
         
@@ -272,11 +331,9 @@ class ShowNameMapper:
             variants.add(mapped.lower())
         
         # Find reverse mappings (all keys that map to this show)
-        for mapping in [self.mapping_1, self.mapping_2, self.mapping_3]:
-            for key, value in mapping.items():
-                if value.lower() == show_lower:
-                    variants.add(key)
-                    variants.add(value)
+        for key, value in self._items_by_lower_value.get(show_lower, ()):
+            variants.add(key)
+            variants.add(value)
         
         return variants
 
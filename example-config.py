@@ -37,6 +37,55 @@ TIMESTAMP_THRESHOLD = 120
 BATCH_SIZE = 5
 SILENCE_DURATION = 0.3
 DECIBEL_THRESHOLD = -60
+# Detection profile: "throughput" lets ffmpeg use every core, "low-memory" halves the
+# decoder threads, "low-power" keeps ffmpeg and the worker pools to a quarter of the cores
+DETECTION_PROFILE = "throughput"
+# cpu_budget: share of CPU cores (0-1) used for ffmpeg threads and detection worker pools
+# skip_loop_filter: skip deblocking when decoding video for black frame detection
+# audio_only_demux: drop video packets while reading audio for silence detection
+# scale_flags: scaler used to downscale frames, silence_sample_rate: audio rate of silence detection
+# encode_preset: x264 preset of the temporary files written by the "segments" engine
+DETECTION_PROFILES = {
+    "throughput": {"cpu_budget": 1.0, "skip_loop_filter": False, "audio_only_demux": True,
+                   "scale_flags": "neighbor", "silence_sample_rate": 8000, "encode_preset": "ultrafast"},
+    "low-memory": {"cpu_budget": 0.5, "skip_loop_filter": False, "audio_only_demux": True,
+                   "scale_flags": "neighbor", "silence_sample_rate": 8000, "encode_preset": "ultrafast"},
+    "low-power": {"cpu_budget": 0.25, "skip_loop_filter": True, "audio_only_demux": True,
+                  "scale_flags": "neighbor", "silence_sample_rate": 4000, "encode_preset": "ultrafast"},
+}
+# Number of silence detections run at the same time; each video is analyzed as soon as its scan finishes
+SILENCE_SCAN_WORKERS = 4
+# Number of videos run through black frame detection at the same time (1 = one after another)
+DETECTION_WORKERS = 1
+# "pipe" streams downscaled frames straight from ffmpeg, "segments" writes temporary downscaled files first
+DETECTION_ENGINE = "pipe"
+# Number of sampled frames scored together in one NumPy reduction
+ANALYSIS_BATCH_FRAMES = 256
+# "grab" skips unsampled frames without converting them, "read" decodes and converts every frame
+FRAME_SAMPLING_MODE = "grab"
+# Reuse chapters, silence periods, black frames, durations and FPS of unchanged files between runs
+ANALYSIS_CACHE_ENABLED = True
+# Also hash the first and last megabyte of each file to detect changes that keep size and modification time
+ANALYSIS_CACHE_PARTIAL_HASH = False
+# "reencode" copies video and re-encodes audio to AAC at the exact breaks, "copy" moves
+# breaks to the nearest video keyframe and stream-copies audio and video
+CUT_MODE = "reencode"
+# With CUT_MODE "copy", check breaks against each video's keyframe index before cutting and report the ones copied video can't split on
+VALIDATE_CUT_POINTS = True
+# Number of videos cut at the same time, and at most how many of them may use one storage device (0 = no limit)
+CUT_WORKERS = 4
+CUT_WORKERS_PER_DEVICE = 2
+# Journal each file's detection stages so an interrupted run resumes where it stopped
+DETECTION_JOURNAL_ENABLED = True
+# Maximum progress updates per second sent to the UI, repetitive status lines are limited to the same rate
+REPORTING_RATE_HZ = 10
+# Number of ffprobe metadata reads run at the same time
+PROBE_WORKERS = 8
+# Also write each video's break times to a <video>.txt file next to its cut parts, for tools that edit them by hand
+TIMESTAMP_EXPORT_TXT = False
+# Record the time and resources every ComBreak stage and file take, appended as JSON lines to TRACE_FILE
+TRACE_ENABLED = True
+TRACE_FILE = os.path.join(DATABASE_DIR, "combreak_trace.jsonl")
 API_KEY = "PUT YOUR OPEN AI KEY HERE"
 
 AUTO_RUN_DEFAULT_CONFIG = {
@@ -52,6 +101,12 @@ AUTO_RUN_DEFAULT_CONFIG = {
     "platform_type": "dizquetv"
 }
 
+# Seed of the random picks Multilineup makes while chaining multibumps, None for a different order every run
+MULTILINEUP_SEED = None
+# "graph" orders multibumps into the fewest possible chains up front, "greedy" picks each bump after the one before it,
+# both make bumps featuring one of the last few announced shows less likely to come next
+MULTILINEUP_PLANNER = "graph"
+
 TOONAMI_CONFIG = {
     "OG": {"table": "lineup_v9", "merger_bump_list": "multibumps_v9_data_reordered", "merger_out": "lineup_v9", "encoder_in": "commercial_injector_final", "uncut": False},
     "2": {"table": "lineup_v2", "merger_bump_list": "multibumps_v2_data_reordered", "merger_out": "lineup_v2", "encoder_in": "commercial_injector_final", "uncut": False},
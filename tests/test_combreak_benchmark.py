@@ -0,0 +1,214 @@
+import pytest
+import os
+import sys
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+test_db_dir = str(Path(__file__).parent.resolve())
+os.environ["DB_DIR"] = test_db_dir
+os.environ["DB_PATH"] = str(Path(test_db_dir) / "test_toonami.db")
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import config
+from ComBreak import CommercialBreakerLogic
+from ComBreak.VideoFileManager import VideoFilesManager
+from ComBreak.SilentBlackFrameDetector import (
+    SilenceDetector, VideoPreprocessor, BlackFrameAnalyzer, FrameStreamAnalyzer
+)
+from ComBreak.AnalysisCache import get_analysis_cache
+from ComBreak.TimestampStore import get_timestamp_store
+from ComBreak.Tracer import get_tracer
+
+# Size of the generated library, override with environment variables for longer runs
+EPISODES = int(os.environ.get("COMBREAK_BENCH_EPISODES", 3))
+BREAKS_PER_EPISODE = int(os.environ.get("COMBREAK_BENCH_BREAKS", 2))
+FPS = 24
+FRAME_SIZE = "320x240"
+# Each break is black and silent long enough to hold two sampled frames (every FRAME_RATE-th frame)
+BREAK_SECONDS = max(1.0, 2 * config.FRAME_RATE / FPS)
+# Detected breaks may land anywhere in the black window, give or take half a second
+TOLERANCE = 0.5
+
+FFMPEG = shutil.which("ffmpeg")
+FFPROBE = shutil.which("ffprobe")
+
+pytestmark = pytest.mark.skipif(
+    not (FFMPEG and FFPROBE), reason="ffmpeg and ffprobe are needed to generate and probe synthetic media"
+)
+
+def break_times():
+    """Ground truth break starts, spaced so TimestampReducer keeps every one of them."""
+    first = config.START_BUFFER + 30
+    spacing = config.TIMESTAMP_THRESHOLD + 30
+    return [first + i * spacing for i in range(BREAKS_PER_EPISODE)]
+
+
+def generate_episode(path, duration, breaks, with_chapters=False):
+    """Render a test pattern episode with a sine tone, blacked out and muted during every break."""
+    windows = "+".join(f"between(t,{start},{start + BREAK_SECONDS})" for start in breaks)
+    command = [
+        FFMPEG, "-y", "-hide_banner", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc=size={FRAME_SIZE}:rate={FPS}:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={duration}",
+    ]
+    if with_chapters:
+        metadata = path.with_suffix(".ffmetadata")
+        bounds = [0, *breaks, duration]
+        chapters = "".join(
+            f"[CHAPTER]\nTIMEBASE=1/1000\nSTART={int(start * 1000)}\nEND={int(end * 1000)}\n"
+            for start, end in zip(bounds, bounds[1:])
+        )
+        metadata.write_text(";FFMETADATA1\n" + chapters)
+        command += ["-i", str(metadata), "-map", "0:v", "-map", "1:a", "-map_chapters", "2"]
+    command += [
+        "-vf", f"drawbox=color=black:t=fill:enable='{windows}'",
+        "-af", f"volume=0:enable='{windows}'",
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", "-g", str(FPS * 2),
+        "-c:a", "aac",
+        str(path)
+    ]
+    subprocess.run(command, check=True)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far in MB, None where it can't be read."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def timed(name, function):
+    """Wrap a function so every call is traced as a span of its own, counting the frames it returns."""
+    def wrapper(*args, **kwargs):
+        with get_tracer().span(name) as span:
+            result = function(*args, **kwargs)
+            span.add(frames=result[1])
+        return result
+    return wrapper
+
+
+def read_summary(trace_file):
+    """Per span name totals of the last run written to the trace."""
+    lines = Path(trace_file).read_text().splitlines()
+    return json.loads(lines[-1])['summary']
+
+
+def report(summary):
+    lines = [f"{'span':<26}{'count':>7}{'wall s':>9}{'frames':>9}{'fps':>10}{'spawns':>8}"]
+    for name, stage in summary.items():
+        frames = stage.get('frames', 0)
+        fps = frames / stage['wall'] if frames and stage['wall'] else 0
+        lines.append(
+            f"{name:<26}{stage['count']:>7}{stage['wall']:>9.2f}{frames:>9}{fps:>10.1f}{stage['spawns']:>8}"
+        )
+    # ru_maxrss only keeps the high-water mark, so memory can't be split up per span
+    lines.append(f"peak rss MB of the whole test process, not per span: {peak_rss_mb() or '-'}")
+    return "\n".join(lines)
+
+
+class TestComBreakBenchmark:
+    """Runs the ComBreak pipeline on generated episodes with known breaks and reports per-stage costs"""
+
+    @pytest.fixture(autouse=True)
+    def setup_library(self, tmp_path, monkeypatch):
+        """Generate the synthetic library, the first episode carrying its breaks as chapters"""
+        self.input_dir = tmp_path / "input"
+        self.output_dir = tmp_path / "output"
+        show_dir = self.input_dir / "Bench"
+        show_dir.mkdir(parents=True)
+        self.output_dir.mkdir()
+
+        self.breaks = break_times()
+        self.duration = self.breaks[-1] + 60
+        self.episodes = []
+        for number in range(1, EPISODES + 1):
+            path = show_dir / f"Bench - S01E{number:02d} - Synthetic.mkv"
+            generate_episode(path, self.duration, self.breaks, with_chapters=number == 1)
+            self.episodes.append(path)
+        for metadata in show_dir.glob("*.ffmetadata"):
+            metadata.unlink()
+
+        # Analyze everything from scratch, in this process so every stage is traced in the same run
+        monkeypatch.setattr(config, "DETECTION_JOURNAL_ENABLED", False)
+        monkeypatch.setattr(config, "DETECTION_WORKERS", 1)
+        monkeypatch.setattr(config, "TRACE_ENABLED", True)
+        monkeypatch.setattr(config, "TRACE_FILE", str(tmp_path / "combreak_trace.jsonl"))
+        get_analysis_cache().clear()
+
+        self.logic = CommercialBreakerLogic()
+        self.tracer = get_tracer()
+        self.statuses = []
+
+    @pytest.mark.parametrize("engine", ["pipe", "segments"])
+    def test_pipeline_finds_generated_breaks(self, engine, monkeypatch):
+        monkeypatch.setattr(config, "DETECTION_ENGINE", engine)
+        monkeypatch.setattr(VideoPreprocessor, "preprocess_segments",
+                            self._timed_downscale(VideoPreprocessor.preprocess_segments))
+        monkeypatch.setattr(BlackFrameAnalyzer, "analyze_segments",
+                            timed("black frames", BlackFrameAnalyzer.analyze_segments))
+        monkeypatch.setattr(FrameStreamAnalyzer, "analyze_periods",
+                            timed("downscale + black frames", FrameStreamAnalyzer.analyze_periods))
+
+        # Spans the pipeline traces itself, such as probe, silence, analysis and cut, land in the same run
+        with self.tracer.run("benchmark", self.statuses.append):
+            manager = VideoFilesManager()
+            manager.clear_files()
+            for episode in self.episodes:
+                manager.add_file(str(episode), str(episode.parent), episode.name)
+
+            with self.tracer.span("chapters"):
+                self.logic.chapter_extractor.extract_chapters(
+                    str(self.input_dir), str(self.output_dir), manager, self.statuses.append
+                )
+            assert len(manager) == EPISODES - 1
+
+            # Scanning first fills the silence cache, so detection below only times downscale and analysis
+            detector = SilenceDetector()
+            with self.tracer.span("silence scan"):
+                for video_file in manager.iter_files():
+                    assert detector.detect(video_file['original_file'], self.statuses.append)
+
+            with self.tracer.span("detection"):
+                self.logic.silent_black_frame_detector.detect_silent_black_frames(
+                    str(self.input_dir), str(self.output_dir), 0, [], 0, 0, manager,
+                    None, self.statuses.append, None
+                )
+                self.logic.timestamp_manager.cleanup_timestamps(str(self.output_dir), None, self.statuses.append)
+
+            entries = {Path(entry['prefix']).name: entry for entry in get_timestamp_store().entries(self.output_dir)}
+            assert sorted(entries) == sorted(episode.name for episode in self.episodes)
+            for name, entry in entries.items():
+                expected_source = "chapter" if name == self.episodes[0].name else "detected"
+                assert entry['source'] == expected_source
+                assert len(entry['break_times']) == len(self.breaks), f"{name}: {entry['break_times']}"
+                for found, start in zip(entry['break_times'], self.breaks):
+                    assert start - TOLERANCE <= found <= start + BREAK_SECONDS + TOLERANCE, f"{name}: {entry['break_times']}"
+
+            with self.tracer.span("cutting"):
+                self.logic.cut_videos(str(self.input_dir), str(self.output_dir), None, self.statuses.append)
+
+            for episode in self.episodes:
+                parts = sorted(self.output_dir.rglob(f"{episode.stem} - Part *.mp4"))
+                assert len(parts) == len(self.breaks) + 1, [part.name for part in parts]
+            assert not (self.output_dir / "failedtocut.txt").exists()
+
+        summary = read_summary(config.TRACE_FILE)
+        print(f"\nComBreak benchmark, {engine} engine, {EPISODES} episodes of {self.duration}s:\n{report(summary)}")
+        (self.output_dir / f"benchmark-{engine}.json").write_text(json.dumps(summary, indent=2))
+
+    def _timed_downscale(self, preprocess_segments):
+        """Time the segment downscale, counting the frames of the silent periods it encodes"""
+        def wrapper(preprocessor, original_file, out_dir, silence_periods, *args, **kwargs):
+            with self.tracer.span("downscale") as span:
+                segments = preprocess_segments(preprocessor, original_file, out_dir, silence_periods, *args, **kwargs)
+                span.add(frames=int(sum(p['end'] - p['start'] for p in silence_periods) * FPS))
+            return segments
+        return wrapper
@@ -0,0 +1,161 @@
+import pytest
+import os
+from pathlib import Path
+
+test_db_dir = str(Path(__file__).parent.resolve())
+os.environ["DB_DIR"] = test_db_dir
+os.environ["DB_PATH"] = str(Path(test_db_dir) / "test_toonami.db")
+
+import numpy as np
+import pandas as pd
+import config
+from API.utils import get_db_manager
+from ToonamiTools.MultiLineup import BumpChainPlanner, Multilineup
+
+TABLE = "multibumps_v3_data"
+COLUMNS = ["FULL_FILE_PATH", "SHOW_NAME_1", "PLACEMENT_2", "SHOW_NAME_2", "PLACEMENT_3", "SHOW_NAME_3"]
+SHOWS = [f"Show {i}" for i in range(8)]
+
+
+def random_bumps(count, seed):
+    """Bump rows over a few shows, using every PLACEMENT_2 the reordering handles."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(count):
+        placement = rng.choice(["next", "next", "next from", "from", "later"])
+        show_1, show_2, show_3 = rng.choice(SHOWS, 3, replace=False)
+        rows.append([
+            f"/bumps/{i}.mp4", show_1, placement, show_2,
+            "later" if placement == "next" else None, show_3 if placement == "next" else None
+        ])
+    return rows
+
+
+def random_ends(count, seed):
+    """Entry and exit shows of bumps, some of which can't follow or be followed by any bump."""
+    rng = np.random.default_rng(seed)
+    shows = SHOWS[:int(rng.integers(1, len(SHOWS) + 1))]
+    entries = [None if rng.random() < 0.1 else str(rng.choice(shows)) for _ in range(count)]
+    exits = [None if rng.random() < 0.1 else str(rng.choice(shows)) for _ in range(count)]
+    return entries, exits
+
+
+def fewest_chains(entries, exits):
+    """
+    Lower bound on the chains covering every bump, from the graph of bumps between shows.
+
+    Every connected component needs a chain starting at each show more bumps leave than
+    enter, or a single chain if it is balanced.
+    """
+    parent = {}
+
+    def find(node):
+        while parent.setdefault(node, node) != node:
+            node = parent[node]
+        return node
+
+    balance = {}
+    for position, (entry, exit) in enumerate(zip(entries, exits)):
+        source = entry if entry is not None else ("entry", position)
+        target = exit if exit is not None else ("exit", position)
+        balance[source] = balance.get(source, 0) + 1
+        balance[target] = balance.get(target, 0) - 1
+        parent[find(source)] = find(target)
+    surplus = {}
+    for node, value in balance.items():
+        surplus[find(node)] = surplus.get(find(node), 0) + max(0, value)
+    return sum(max(1, value) for value in surplus.values())
+
+
+def write_bumps(rows, table=TABLE):
+    with get_db_manager().transaction() as conn:
+        pd.DataFrame(rows, columns=COLUMNS).to_sql(table, conn, index=False, if_exists="replace")
+
+
+def read_reordered(table=TABLE):
+    with get_db_manager().transaction() as conn:
+        return pd.read_sql_query(f"SELECT * FROM {table}_reordered", conn)
+
+
+@pytest.fixture(autouse=True)
+def bump_database(tmp_path, monkeypatch):
+    """Point the database manager at an empty database of its own for every test."""
+    db_manager = get_db_manager()
+    db_manager.close_thread_connection()
+    monkeypatch.setattr(db_manager, "db_path", str(tmp_path / "multilineup.db"))
+    yield
+    db_manager.close_thread_connection()
+
+
+class TestMultilineup:
+    """Reorders generated multibump tables and checks the order the rules and the seed give"""
+
+    @pytest.mark.parametrize("planner", ["greedy", "graph"])
+    def test_seeded_order_is_deterministic(self, planner, monkeypatch):
+        monkeypatch.setattr(config, "MULTILINEUP_PLANNER", planner)
+        monkeypatch.setattr(config, "MULTILINEUP_SEED", 1234)
+        rows = random_bumps(200, seed=7)
+        write_bumps(rows)
+
+        orders = []
+        for _ in range(2):
+            Multilineup().reorder_table(TABLE)
+            orders.append(read_reordered())
+
+        pd.testing.assert_frame_equal(orders[0], orders[1])
+        paths = orders[0]["FULL_FILE_PATH"].tolist()
+        assert len(paths) == len(set(paths))
+        assert sorted(paths) == sorted(row[0] for row in rows)
+
+    def test_greedy_picks_follow_the_placement_rules(self):
+        write_bumps([
+            ["/bumps/0.mp4", "A", "next", "X", "later", "B"],
+            ["/bumps/1.mp4", "C", "next from", "A", None, None],
+            ["/bumps/2.mp4", "D", "from", "A", None, None],
+            ["/bumps/3.mp4", "A", "next", "Y", "later", "Z"],
+            ["/bumps/4.mp4", "B", "next", "X", "later", "A"],
+        ])
+        lineup = Multilineup(seed=1)
+        lineup.load_table(TABLE)
+
+        # After A: a 'next' bump announcing a show another bump starts with, then 'next from',
+        # then 'from', then a 'next' bump announcing a show no bump starts with
+        for expected in (0, 1, 2, 3):
+            lineup.next_show_name = "A"
+            assert lineup.get_next_row() == expected
+            lineup.use_row(expected)
+
+        # Nothing follows on from an unknown show, so an unused bump is picked at random
+        lineup.next_show_name = "Unknown"
+        assert lineup.get_next_row() == 4
+
+
+class TestBumpChainPlanner:
+    """Checks the chains planned on random bump graphs cover every bump with the fewest chains"""
+
+    @pytest.mark.parametrize("weighted", [False, True])
+    @pytest.mark.parametrize("seed", range(25))
+    def test_chains_are_fewest_trails_covering_every_bump(self, seed, weighted):
+        count = int(np.random.default_rng(seed).integers(0, 300))
+        entries, exits = random_ends(count, seed)
+        if weighted:
+            planner = BumpChainPlanner(np.random.default_rng(seed), recent_limit=5, recent_weight=0.5)
+            chains = planner.plan(entries, exits, [{entry, exit} for entry, exit in zip(entries, exits)])
+        else:
+            chains = BumpChainPlanner(np.random.default_rng(seed)).plan(entries, exits)
+
+        assert sorted(position for chain in chains for position in chain) == list(range(count))
+        for chain in chains:
+            for previous, position in zip(chain, chain[1:]):
+                assert exits[previous] is not None and entries[position] == exits[previous]
+        assert len(chains) == (fewest_chains(entries, exits) if count else 0)
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_dead_ends_are_the_jumps_between_chains(self, seed, monkeypatch):
+        monkeypatch.setattr(config, "MULTILINEUP_PLANNER", "graph")
+        write_bumps(random_bumps(150, seed))
+        lineup = Multilineup(seed=seed)
+        lineup.reorder_table(TABLE)
+
+        assert sorted(lineup._order) == list(range(150))
+        assert lineup.dead_ends[TABLE] == fewest_chains(lineup._entry, lineup._exit) - 1